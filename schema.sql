@@ -3,6 +3,23 @@ CREATE TABLE IF NOT EXISTS meta (
     value TEXT NOT NULL
 );
 
+CREATE TABLE IF NOT EXISTS apps (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS process_sets (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    names TEXT NOT NULL
+);
+
+-- project roots detected from markers (.git, pyproject.toml, package.json, ...)
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+
 CREATE TABLE IF NOT EXISTS logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     timestamp TEXT NOT NULL,
@@ -11,10 +28,54 @@ CREATE TABLE IF NOT EXISTS logs (
     idle_seconds INTEGER NOT NULL,
     project_path TEXT,
     event_type TEXT NOT NULL,
-    meta TEXT
+    meta TEXT,
+    ts_ms INTEGER,
+    app_id INTEGER REFERENCES apps(id),
+    procset_id INTEGER REFERENCES process_sets(id),
+    -- identical consecutive sampling ticks this row stands for, ending at ts_ms
+    samples INTEGER NOT NULL DEFAULT 1,
+    project_id INTEGER REFERENCES projects(id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
-CREATE INDEX IF NOT EXISTS idx_logs_event_type ON logs(event_type);
+CREATE INDEX IF NOT EXISTS idx_logs_type_ts ON logs(event_type, ts_ms, idle_seconds, app_id, project_path, samples);
+CREATE INDEX IF NOT EXISTS idx_logs_ts_cover ON logs(ts_ms, event_type, idle_seconds, app_id, samples);
+
+-- hourly rollups maintained on every write (hour = epoch ms of the hour start, app_id 0 = no window)
+CREATE TABLE IF NOT EXISTS rollup_hourly (
+    hour INTEGER NOT NULL,
+    app_id INTEGER NOT NULL,
+    active_samples INTEGER NOT NULL DEFAULT 0,
+    idle_samples INTEGER NOT NULL DEFAULT 0,
+    idle_seconds INTEGER NOT NULL DEFAULT 0,
+    file_events INTEGER NOT NULL DEFAULT 0,
+    proof_events INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, app_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_project_hourly (
+    hour INTEGER NOT NULL,
+    project_path TEXT NOT NULL,
+    file_events INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, project_path)
+) WITHOUT ROWID;
 
+CREATE VIEW IF NOT EXISTS logs_v AS
+SELECT l.id, l.timestamp, l.ts_ms,
+       COALESCE(a.title, l.active_app) AS active_app,
+       COALESCE(ps.names, l.running_apps) AS running_apps,
+       l.idle_seconds, l.project_path, l.event_type, l.meta, l.app_id, l.procset_id, l.samples
+FROM logs l
+LEFT JOIN apps a ON a.id = l.app_id
+LEFT JOIN process_sets ps ON ps.id = l.procset_id;
 
+-- periodic drains of the in-process stage timers, counters and gauges (kind = timer|counter|gauge)
+CREATE TABLE IF NOT EXISTS metrics (
+    ts_ms INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    max REAL,
+    buckets TEXT,
+    PRIMARY KEY (ts_ms, name)
+) WITHOUT ROWID;
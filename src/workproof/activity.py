@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# counters stored per ``input_activity`` row (see InputCounters.drain)
+INPUT_ACTIVITY_FIELDS = ("keys", "clicks", "scrolls", "moves", "distance_px")
+
+# mouse moves closer together than this are only noted as input, not measured
+MOVE_THROTTLE_SECONDS = 0.05
+
+
+class InputCounters:
+    """Coalesced input accounting for the pynput listener callbacks.
+
+    Callbacks only bump integers in a list that ``drain`` swaps out, so there
+    is no lock on the hot path; an event racing a drain may land in either
+    period or, rarely, be dropped. Mouse moves are throttled to one measured
+    move per ``MOVE_THROTTLE_SECONDS``; distance is the straight line between
+    measured positions. Only counts are kept, never which key or where.
+    """
+
+    def __init__(self) -> None:
+        self.last_input = time.time()
+        # set on every input so a backed-off sampler wakes at once
+        self.wake = threading.Event()
+        self._counts = [0] * len(INPUT_ACTIVITY_FIELDS)
+        self._last_move = 0.0
+        self._pos: Optional[tuple] = None
+
+    def _touch(self) -> None:
+        self.last_input = time.time()
+        if not self.wake.is_set():
+            self.wake.set()
+
+    def on_press(self, key=None) -> None:
+        self._counts[0] += 1
+        self._touch()
+
+    def on_release(self, key=None) -> None:
+        self._touch()
+
+    def on_click(self, x=0, y=0, button=None, pressed=True) -> None:
+        if pressed:
+            self._counts[1] += 1
+        self._touch()
+
+    def on_scroll(self, x=0, y=0, dx=0, dy=0) -> None:
+        self._counts[2] += 1
+        self._touch()
+
+    def on_move(self, x: float, y: float) -> None:
+        self._touch()  # every move is input, measured or not
+        now = time.monotonic()
+        if now - self._last_move < MOVE_THROTTLE_SECONDS:
+            return
+        self._last_move = now
+        counts = self._counts
+        counts[3] += 1
+        if self._pos is not None:
+            counts[4] += int(math.hypot(x - self._pos[0], y - self._pos[1]))
+        self._pos = (x, y)
+
+    def drain(self) -> Dict[str, int]:
+        """Counts since the previous drain, resetting them."""
+        counts, self._counts = self._counts, [0] * len(INPUT_ACTIVITY_FIELDS)
+        return dict(zip(INPUT_ACTIVITY_FIELDS, counts))
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import collections
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .activity import INPUT_ACTIVITY_FIELDS
+from .database import FILE_EVENT_TYPES, from_epoch_ms, routed_ranges, routed_session, to_epoch_ms
+from .sessions import SessionRow, Sessionizer, session_payload
+
+LOGGER = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+
+@dataclass
+class DayMetrics:
+    date: date
+    active_seconds: int = 0
+    idle_seconds: int = 0
+    top_apps: List[Dict[str, Any]] = field(default_factory=list)
+    top_projects: List[Dict[str, Any]] = field(default_factory=list)
+    proofs_count: int = 0
+    sessions: List[SessionRow] = field(default_factory=list)
+    # keys/clicks/scrolls/moves/distance_px totals plus "minutes" with any input
+    input_activity: Dict[str, int] = field(default_factory=dict)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """The ``dashboard`` JSON shape for one day."""
+        return {
+            "date": self.date.isoformat(),
+            "active_seconds": self.active_seconds,
+            "idle_seconds": self.idle_seconds,
+            "top_apps": self.top_apps,
+            "top_projects": self.top_projects,
+            "proofs_count": self.proofs_count,
+            "sessions": [session_payload(s) for s in self.sessions],
+            "input_activity": self.input_activity,
+        }
+
+
+class DayAggregator:
+    """Computes every dashboard metric for a UTC day from one ordered pass over its rows.
+
+    Feed rows in time order; finished ``DayMetrics`` are returned once a row has
+    crossed into a later day and no open session still overlaps them, and
+    ``finish`` returns the rest. One ``Sessionizer`` runs across day boundaries,
+    so a session spanning midnight is listed whole under every day it overlaps.
+    """
+
+    def __init__(self, sampling_interval: int, idle_threshold: int, session_gap_seconds: int, top_n: int = 10) -> None:
+        self.sampling_interval = sampling_interval
+        self.idle_threshold = idle_threshold
+        self.session_gap_seconds = session_gap_seconds
+        self.top_n = top_n
+        self._day: Optional[int] = None
+        self._sessionizer = Sessionizer(idle_threshold, session_gap_seconds)
+        # finished days whose last session may still be open
+        self._waiting: List[DayMetrics] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._active = 0
+        self._idle = 0
+        self._proofs = 0
+        self._apps: Dict[str, int] = collections.Counter()
+        self._projects: Dict[str, int] = collections.Counter()
+        self._sessions: List[SessionRow] = []
+
+    def feed(
+        self,
+        ts_ms: int,
+        app: Optional[str],
+        idle_seconds: Optional[int],
+        event_type: str,
+        project_path: Optional[str],
+        samples: int = 1,
+    ) -> List[DayMetrics]:
+        day = ts_ms // DAY_MS
+        if self._day is not None and day != self._day:
+            self._end_day(self._day, day)
+        self._day = day
+        if event_type == "sample":
+            idle = int(idle_seconds or 0)
+            self._idle += idle * samples
+            if idle < self.idle_threshold:
+                self._active += samples
+            self._apps[app or "Unknown"] += samples
+        elif event_type in FILE_EVENT_TYPES:
+            self._projects[project_path or "Unknown"] += 1
+        elif event_type == "proof_capture":
+            self._proofs += 1
+        self._sessionizer.feed(from_epoch_ms(ts_ms), app, idle_seconds, event_type, samples=samples)
+        for s in self._sessionizer.drain():
+            self._attach(s)
+        current = self._sessionizer.current
+        done = []
+        while self._waiting and (current is None or current.start_time.date() > self._waiting[0].date):
+            done.append(self._waiting.pop(0))
+        return done
+
+    def finish(self) -> List[DayMetrics]:
+        if self._day is not None:
+            self._end_day(self._day, None)
+        for s in self._sessionizer.finish():
+            self._attach(s)
+        self._sessionizer = Sessionizer(self.idle_threshold, self.session_gap_seconds)
+        done, self._waiting = self._waiting, []
+        return done
+
+    def _end_day(self, day: int, next_day: Optional[int]) -> None:
+        """Park ``day`` (and any empty days before ``next_day``) until its sessions are closed."""
+        self._waiting.append(
+            DayMetrics(
+                date=_date(day),
+                active_seconds=self._active * self.sampling_interval,
+                idle_seconds=self._idle,
+                top_apps=[
+                    {"app": app, "seconds": n * self.sampling_interval}
+                    for app, n in self._apps.most_common(self.top_n)
+                ],
+                top_projects=[{"project": p, "events": n} for p, n in self._projects.most_common(self.top_n)],
+                proofs_count=self._proofs,
+                sessions=self._sessions,
+            )
+        )
+        if next_day is not None:
+            # a session can run through a day without rows of its own
+            self._waiting.extend(DayMetrics(date=_date(n)) for n in range(day + 1, next_day))
+        self._day = None
+        self._reset()
+
+    def _attach(self, s: SessionRow) -> None:
+        first, last = s.start_time.date(), (s.end_time or s.start_time).date()
+        for m in self._waiting:
+            if first <= m.date <= last:
+                m.sessions.append(s)
+        if self._day is not None and first <= _date(self._day) <= last:
+            self._sessions.append(s)
+
+
+def _date(day: int) -> date:
+    return from_epoch_ms(day * DAY_MS).date()
+
+
+_INPUT_BY_DAY_SQL = f"""
+    SELECT ts_ms / {DAY_MS}, COUNT(*), {", ".join(f"SUM(json_extract(meta, '$.{k}'))" for k in INPUT_ACTIVITY_FIELDS)}
+    FROM logs
+    WHERE event_type = 'input_activity' AND ts_ms BETWEEN ? AND ?
+    GROUP BY 1
+"""
+
+
+def iter_day_metrics(
+    db_path: Path,
+    first: date,
+    last: date,
+    sampling_interval: int,
+    idle_threshold: int,
+    session_gap_seconds: int,
+    chunk_size: int = 5000,
+) -> Iterator[DayMetrics]:
+    """Stream ``DayMetrics`` for every day in ``[first, last]`` (empty days included) from one scan."""
+    start = datetime(first.year, first.month, first.day, tzinfo=timezone.utc)
+    end = datetime(last.year, last.month, last.day, tzinfo=timezone.utc) + timedelta(days=1) - timedelta(milliseconds=1)
+    agg = DayAggregator(sampling_interval, idle_threshold, session_gap_seconds)
+    expected = first
+
+    inputs: Dict[date, Dict[str, int]] = {}
+
+    def day(d: date, metrics: Optional[DayMetrics] = None) -> DayMetrics:
+        metrics = metrics or DayMetrics(date=d)
+        metrics.input_activity = inputs.pop(d, {})
+        return metrics
+
+    def emit(metrics: DayMetrics) -> Iterator[DayMetrics]:
+        nonlocal expected
+        while expected < metrics.date:
+            yield day(expected)
+            expected += timedelta(days=1)
+        yield day(metrics.date, metrics)
+        expected = metrics.date + timedelta(days=1)
+
+    for lo, hi in routed_ranges(db_path, start, end):
+        with routed_session(db_path, lo, hi) as conn:
+            # one row per minute of input at most, so a separate grouped read is cheap
+            for day_n, minutes, *totals in conn.execute(_INPUT_BY_DAY_SQL, (to_epoch_ms(lo), to_epoch_ms(hi))):
+                counts = {k: int(v or 0) for k, v in zip(INPUT_ACTIVITY_FIELDS, totals)}
+                inputs[_date(day_n)] = {**counts, "minutes": minutes}
+            cur = conn.execute(
+                """
+                SELECT l.ts_ms, a.title, l.idle_seconds, l.event_type, l.project_path, l.samples
+                FROM logs l
+                LEFT JOIN apps a ON a.id = l.app_id
+                WHERE l.ts_ms BETWEEN ? AND ?
+                ORDER BY l.ts_ms ASC
+                """,
+                (to_epoch_ms(lo), to_epoch_ms(hi)),
+            )
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    for done in agg.feed(*row):
+                        yield from emit(done)
+    for done in agg.finish():
+        yield from emit(done)
+    while expected <= last:
+        yield day(expected)
+        expected += timedelta(days=1)
@@ -5,9 +5,11 @@ from datetime import date, datetime, time, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 
-from .database import db_session
+from .database import from_epoch_ms, hour_aligned, read_session, rollup_idle_threshold, routed_ranges, routed_session, to_epoch_ms
+from .sessions import SessionRow
 
 
 def _bounds(d0: date, d1: date) -> tuple[datetime, datetime]:
@@ -17,18 +19,51 @@ def _bounds(d0: date, d1: date) -> tuple[datetime, datetime]:
 
 
 def load_samples_df(db_path: Path, start: datetime, end: datetime) -> pd.DataFrame:
-    with db_session(db_path) as conn:
-        df = pd.read_sql_query(
-            """
-            SELECT timestamp, active_app, idle_seconds
-            FROM logs
-            WHERE event_type='sample' AND timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-            """,
-            conn,
-            params=(start.isoformat(), end.isoformat()),
-            parse_dates=["timestamp"],
-        )
+    frames = []
+    # one query per group of monthly partitions, concatenated in time order
+    for lo, hi in routed_ranges(db_path, start, end):
+        with routed_session(db_path, lo, hi) as conn:
+            frames.append(pd.read_sql_query(
+                """
+                SELECT l.ts_ms, a.title AS active_app, l.idle_seconds, l.samples
+                FROM logs l
+                LEFT JOIN apps a ON a.id = l.app_id
+                WHERE l.event_type='sample' AND l.ts_ms BETWEEN ? AND ?
+                ORDER BY l.ts_ms ASC
+                """,
+                conn,
+                params=(to_epoch_ms(lo), to_epoch_ms(hi)),
+            ))
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    # vectorised integer -> datetime conversion instead of per-row ISO parsing
+    df.insert(0, "timestamp", pd.to_datetime(df.pop("ts_ms"), unit="ms", utc=True))
+    return df
+
+
+def load_hourly_df(db_path: Path, start: datetime, end: datetime, idle_threshold: int) -> pd.DataFrame:
+    """Per-(hour, app) sample counts from the rollups; falls back to raw samples when the
+    range is not whole hours or the rollups were built with another idle threshold."""
+    if not hour_aligned(start, end):
+        return load_samples_df(db_path, start, end)
+    with read_session(db_path) as conn:
+        if rollup_idle_threshold(conn) != idle_threshold:
+            df = None
+        else:
+            df = pd.read_sql_query(
+                """
+                SELECT r.hour, a.title AS active_app,
+                       r.active_samples + r.idle_samples AS samples, r.active_samples
+                FROM rollup_hourly r
+                LEFT JOIN apps a ON a.id = r.app_id
+                WHERE r.hour BETWEEN ? AND ? AND r.active_samples + r.idle_samples > 0
+                ORDER BY r.hour ASC
+                """,
+                conn,
+                params=(to_epoch_ms(start), to_epoch_ms(end)),
+            )
+    if df is None:
+        return load_samples_df(db_path, start, end)
+    df.insert(0, "timestamp", pd.to_datetime(df.pop("hour"), unit="ms", utc=True))
     return df
 
 
@@ -37,8 +72,13 @@ def daily_active_seconds(df: pd.DataFrame, sampling_interval: int, idle_threshol
         return pd.DataFrame(columns=["date", "active_seconds"])
     df = df.copy()
     df["date"] = df["timestamp"].dt.date
-    df["is_active"] = df["idle_seconds"] < idle_threshold
-    agg = df.groupby("date")["is_active"].sum().reset_index(name="active_samples")
+    if "active_samples" in df:
+        # hourly rollup frame (see load_hourly_df)
+        agg = df.groupby("date")["active_samples"].sum().reset_index(name="active_samples")
+    else:
+        # each row stands for ``samples`` ticks (change-driven sampling)
+        df["is_active"] = (df["idle_seconds"] < idle_threshold) * df["samples"]
+        agg = df.groupby("date")["is_active"].sum().reset_index(name="active_samples")
     agg["active_seconds"] = agg["active_samples"] * sampling_interval
     return agg[["date", "active_seconds"]]
 
@@ -48,8 +88,96 @@ def app_usage_seconds(df: pd.DataFrame, sampling_interval: int) -> pd.DataFrame:
         return pd.DataFrame(columns=["app", "seconds"])
     df = df.copy()
     df["app"] = df["active_app"].fillna("Unknown")
-    agg = df.groupby("app")["timestamp"].count().reset_index(name="samples")
+    agg = df.groupby("app")["samples"].sum().reset_index(name="samples")
     agg["seconds"] = agg["samples"] * sampling_interval
     return agg[["app", "seconds"]].sort_values("seconds", ascending=False)
 
 
+def load_events_df(db_path: Path, start: datetime, end: datetime) -> pd.DataFrame:
+    """Every event in ``[start, end]`` in time order, with integer ``ts_ms`` (for sessionization)."""
+    frames = []
+    for lo, hi in routed_ranges(db_path, start, end):
+        with routed_session(db_path, lo, hi) as conn:
+            frames.append(pd.read_sql_query(
+                """
+                SELECT l.ts_ms, a.title AS active_app, l.idle_seconds, l.event_type, l.samples
+                FROM logs l
+                LEFT JOIN apps a ON a.id = l.app_id
+                WHERE l.ts_ms BETWEEN ? AND ?
+                ORDER BY l.ts_ms ASC
+                """,
+                conn,
+                params=(to_epoch_ms(lo), to_epoch_ms(hi)),
+            ))
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def sessionize_df(df: pd.DataFrame, idle_threshold: int, session_gap_seconds: int) -> List[SessionRow]:
+    """Array version of ``sessions.Sessionizer`` over a time-ordered ``load_events_df`` frame.
+
+    A session closes at the first idle sample more than the gap after its last
+    active sample; later idle samples with no activity in between are no-ops.
+    File and proof events count only while a session is open.
+    """
+    if df.empty:
+        return []
+    t = df["ts_ms"].to_numpy(dtype="int64")
+    # a handful of distinct event types: classify those, then index by code
+    codes, kinds = pd.factorize(df["event_type"])
+    is_sample = np.array([k == "sample" for k in kinds], dtype=bool)[codes]
+    is_file = np.array([str(k).startswith("file_") for k in kinds], dtype=bool)[codes]
+    is_proof = np.array([k == "proof_capture" for k in kinds], dtype=bool)[codes]
+    pos = np.arange(len(df))
+    active = is_sample & (df["idle_seconds"].fillna(0).to_numpy() < idle_threshold)
+    last_active = np.maximum.accumulate(np.where(active, pos, -1))
+    gap_exceeded = (t - t[np.maximum(last_active, 0)]) > session_gap_seconds * 1000
+    candidate = is_sample & ~active & (last_active >= 0) & gap_exceeded
+    # only the first candidate after each stretch of activity actually closes a session
+    cand_pos = pos[candidate]
+    cand_last = last_active[candidate]
+    first = np.r_[True, cand_last[1:] != cand_last[:-1]] if len(cand_pos) else np.zeros(0, dtype=bool)
+    closer = np.zeros(len(df), dtype=bool)
+    closer[cand_pos[first]] = True
+    segment = np.cumsum(closer)
+    is_open = last_active > np.maximum.accumulate(np.where(closer, pos, -1))
+    frame = pd.DataFrame({
+        "segment": segment,
+        "ts_ms": t,
+        # empty titles never replace a known app, as with ``app or main_app``
+        "app": df["active_app"].where(active & df["active_app"].fillna("").astype(bool).to_numpy()),
+        "first_app": df["active_app"],
+        "active": active,
+        "weight": df["samples"].to_numpy() if "samples" in df else 1,
+        "files": is_file & is_open,
+        "proofs": is_proof & is_open,
+    })
+    active_rows = frame[frame["active"]]
+    acts = active_rows.groupby("segment")
+    agg = pd.DataFrame({
+        "start": acts["ts_ms"].min(),
+        "end": acts["ts_ms"].max(),
+        "samples": acts["weight"].sum(),
+        # most recent non-empty window, else whatever the session opened with
+        "main_app": acts["app"].last().combine_first(
+            active_rows.drop_duplicates("segment").set_index("segment")["first_app"]
+        ),
+    })
+    counts = frame.groupby("segment")[["files", "proofs"]].sum()
+    agg = agg.join(counts)
+    return [
+        SessionRow(
+            id=None,
+            start_time=from_epoch_ms(int(r.start)),
+            end_time=from_epoch_ms(int(r.end)),
+            main_app=None if pd.isna(r.main_app) else r.main_app,
+            samples=int(r.samples),
+            idle_seconds=0,
+            files_edited=int(r.files),
+            proofs_count=int(r.proofs),
+        )
+        for r in agg.itertuples()
+    ]
+
+
+def sessions_between(db_path: Path, start: datetime, end: datetime, idle_threshold: int, session_gap_seconds: int) -> List[SessionRow]:
+    return sessionize_df(load_events_df(db_path, start, end), idle_threshold, session_gap_seconds)
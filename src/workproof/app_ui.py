@@ -4,14 +4,14 @@ import os
 import sys
 import threading
 import time
-from datetime import date
+from datetime import date, datetime, time as dtime, timezone
 from pathlib import Path
 
 import customtkinter as ctk  # type: ignore
 
 from .autostart_win import add_startup_shortcut, remove_startup_shortcut
 from .config import default_config
-from .report_generator import generate_text_summary
+from .report_generator import format_live_summary
 from .reports import client_report
 from .sessions import build_sessions_for_day
 from .supervisor import Supervisor
@@ -157,18 +157,25 @@ class WorkProofApp(ctk.CTk):
         threading.Thread(target=self._refresh_loop, daemon=True).start()
 
     def _refresh_loop(self) -> None:
+        # the summary and the open session come from the in-memory counters; closed
+        # sessions are re-read from the database only after one ends
+        history: list = []
+        history_key = None
         while True:
             try:
                 self._set_status(self.sup.is_running(), self.sup.is_paused())
-                today = date.today()
-                summary = generate_text_summary(today, self.cfg.sampling_interval_seconds, self.cfg.db_path, self.cfg.idle_threshold_seconds)
+                snap = self.sup.live.snapshot()
+                today = snap.day or date.today()
+                if history_key != (today, snap.sessions_closed):
+                    start = datetime.combine(today, dtime.min).replace(tzinfo=timezone.utc)
+                    end = datetime.combine(today, dtime.max).replace(tzinfo=timezone.utc)
+                    history = build_sessions_for_day(self.cfg.db_path, start, end, self.cfg.idle_threshold_seconds, self.cfg.session_gap_seconds)
+                    if snap.current_session is not None:
+                        history = [s for s in history if s.start_time < snap.current_session.start_time]
+                    history_key = (today, snap.sessions_closed)
+                sessions = history + ([snap.current_session] if snap.current_session is not None else [])
                 self.txt.delete("1.0", "end")
-                self.txt.insert("1.0", f"Today's Summary\n\n{summary}\n\nRecent Sessions\n")
-                # list last few sessions (rebuilt from logs)
-                from datetime import datetime, time, timezone
-                start = datetime.combine(today, time.min).replace(tzinfo=timezone.utc)
-                end = datetime.combine(today, time.max).replace(tzinfo=timezone.utc)
-                sessions = build_sessions_for_day(self.cfg.db_path, start, end, self.cfg.sampling_interval_seconds, self.cfg.idle_threshold_seconds, self.cfg.session_gap_seconds)
+                self.txt.insert("1.0", f"Today's Summary\n\n{format_live_summary(snap)}\n\nRecent Sessions\n")
                 for s in sessions[-10:]:
                     dur = (s.end_time - s.start_time).total_seconds() if s.end_time else 0
                     self.txt.insert("end", f"- {s.start_time.isoformat()} → {s.end_time and s.end_time.isoformat()}  {int(dur//60)}m  {s.main_app}\n")
@@ -176,7 +183,6 @@ class WorkProofApp(ctk.CTk):
                 self.txt.insert("end", f"\n[Error updating summary: {e}]\n")
             time.sleep(5)
 
-
 if __name__ == "__main__":
     app = WorkProofApp()
     app.mainloop()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import IO, Optional
+
+import click
+
+from .config import default_config
+from .database import initialize
+from .metrics import load_stats
+from .transfer import ImportStats, export_logs, export_sessions, import_jsonl
+
+
+def _parse_day(value: str) -> date:
+    return date.today() if value == "today" else datetime.strptime(value, "%Y-%m-%d").date()
+
+
+@click.group()
+def cli() -> None:
+    """WorkProof command line tools."""
+
+
+@cli.command("import")
+@click.argument("src", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--db", "db_arg", default=None, help="Database path (defaults to the configured DB)")
+@click.option("--batch-size", default=5000, show_default=True, help="Rows per transaction")
+def import_cmd(src: Path, db_arg: Optional[str], batch_size: int) -> None:
+    """Import a JSONL file of log records, skipping duplicates."""
+    cfg = default_config()
+    db_path = Path(db_arg) if db_arg else cfg.db_path
+    initialize(db_path, cfg.idle_threshold_seconds)
+
+    def progress(stats: ImportStats) -> None:
+        click.echo(f"  {stats.read} read, {stats.inserted} inserted ({stats.rows_per_second:,.0f} rows/s)", err=True)
+
+    stats = import_jsonl(db_path, src, batch_size=batch_size, progress=progress)
+    click.echo(
+        f"Imported {stats.inserted} rows from {src} "
+        f"({stats.skipped} duplicates, {stats.invalid} invalid) in {stats.seconds:.2f}s"
+    )
+
+
+@cli.command("export")
+@click.option("--from", "from_arg", default="today", help="First day, YYYY-MM-DD or 'today'")
+@click.option("--to", "to_arg", default="today", help="Last day (inclusive), YYYY-MM-DD or 'today'")
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "csv"]), default="jsonl", show_default=True)
+@click.option("--out", "out", type=click.File("w", encoding="utf-8"), default="-", help="Output file (default stdout)")
+@click.option("--db", "db_arg", default=None, help="Database path (defaults to the configured DB)")
+def export_cmd(from_arg: str, to_arg: str, fmt: str, out: IO[str], db_arg: Optional[str]) -> None:
+    """Export a date range of log records as JSONL or CSV."""
+    db_path = Path(db_arg) if db_arg else default_config().db_path
+    start = datetime.combine(_parse_day(from_arg), time.min).replace(tzinfo=timezone.utc)
+    end = datetime.combine(_parse_day(to_arg), time.max).replace(tzinfo=timezone.utc)
+    n = export_logs(db_path, out, start, end, fmt=fmt)
+    click.echo(f"Exported {n} rows", err=True)
+
+
+@cli.command("export-sessions")
+@click.option("--from", "from_arg", default="today", help="First day, YYYY-MM-DD or 'today'")
+@click.option("--to", "to_arg", default="today", help="Last day (inclusive), YYYY-MM-DD or 'today'")
+@click.option("--out", "out", type=click.File("w", encoding="utf-8"), default="-", help="Output file (default stdout)")
+@click.option("--db", "db_arg", default=None, help="Database path (defaults to the configured DB)")
+def export_sessions_cmd(from_arg: str, to_arg: str, out: IO[str], db_arg: Optional[str]) -> None:
+    """Export activity sessions for a date range as JSONL, streamed from the raw logs."""
+    cfg = default_config()
+    db_path = Path(db_arg) if db_arg else cfg.db_path
+    start = datetime.combine(_parse_day(from_arg), time.min).replace(tzinfo=timezone.utc)
+    end = datetime.combine(_parse_day(to_arg), time.max).replace(tzinfo=timezone.utc)
+    n = export_sessions(db_path, out, start, end, cfg.idle_threshold_seconds, cfg.session_gap_seconds)
+    click.echo(f"Exported {n} sessions", err=True)
+
+
+@cli.command("stats")
+@click.option("--since", "since_minutes", default=60, show_default=True, help="Window in minutes")
+@click.option("--json", "as_json", is_flag=True, help="Print the merged metrics as JSON")
+@click.option("--db", "db_arg", default=None, help="Database path (defaults to the configured DB)")
+def stats_cmd(since_minutes: int, as_json: bool, db_arg: Optional[str]) -> None:
+    """Show per-stage timings, counters and queue depths recorded by the running tracker."""
+    db_path = Path(db_arg) if db_arg else default_config().db_path
+    stats = load_stats(db_path, datetime.now(timezone.utc) - timedelta(minutes=since_minutes))
+    if as_json:
+        click.echo(json.dumps(stats, indent=2))
+        return
+    if not stats:
+        click.echo(f"No metrics recorded in the last {since_minutes} minutes", err=True)
+        return
+    for name, m in stats.items():
+        if m["kind"] == "timer":
+            click.echo(
+                f"{name:<22} n={m['count']:<7} mean={m['mean_ms']:8.2f}ms p50={m['p50_ms']:8.2f}ms "
+                f"p95={m['p95_ms']:8.2f}ms max={m['max_ms']:8.2f}ms"
+            )
+        elif m["kind"] == "counter":
+            click.echo(f"{name:<22} total={m['total']}")
+        else:
+            click.echo(f"{name:<22} last={m['last']:g} max={m['max']:g}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -19,15 +19,24 @@ class Config:
     reports_dir: Path
     proofs_dir: Path | None = None
     sampling_interval_seconds: int = 10
+    sampling_mode: str = "every"  # "every" tick, or "changes": one row per run of identical samples
+    sample_heartbeat_seconds: int = 300  # longest run written as one row in "changes" mode
+    idle_max_interval_seconds: int = 300  # sampling backs off up to this while idle (capped at session_gap_seconds)
     flush_interval_seconds: int = 30
+    metrics_interval_minutes: int = 5  # stage timings and counters drained to the metrics table
     retention_days: int = 60
     idle_threshold_seconds: int = 60
     silent: bool = True
-    ignored_globs: tuple[str, ...] = (".git", "node_modules", "__pycache__", "build", "dist")
+    ignored_globs: tuple[str, ...] = (".git", "node_modules", "__pycache__", "build", "dist")  # gitignore-style patterns
+    honor_gitignore: bool = True  # also skip what each project's .gitignore files exclude
+    file_debounce_seconds: float = 2.0  # quiet time before a file's burst of events becomes one row
+    file_bulk_threshold: int = 200  # files in flight per project before it is summarized as one file_bulk row
     proof_interval_minutes: int = 10
+    process_keyframe_minutes: int = 60  # full process list; spawn/exit deltas in between
     session_gap_seconds: int = 300
     proof_blur_radius: int = 8
     proof_watermark: bool = True
+    partition_by_month: bool = True
 
 
 def default_config(overrides: Optional[dict] = None) -> Config:
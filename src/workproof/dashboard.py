@@ -8,9 +8,9 @@ from typing import Dict, Any, List
 
 import click
 
+from .aggregator import iter_day_metrics
 from .config import default_config
-from .database import db_session
-from .sessions import build_sessions_for_day
+from .database import FILE_EVENTS_SQL, hour_aligned, pool_stats, read_session, rollup_idle_threshold, routed_session, to_epoch_ms
 
 LOGGER = logging.getLogger(__name__)
 
@@ -22,102 +22,153 @@ def day_bounds_utc(d: date) -> tuple[datetime, datetime]:
 
 
 def q_active_seconds(db_path: Path, start: datetime, end: datetime, interval: int, idle_threshold: int) -> int:
-    with db_session(db_path) as conn:
+    if hour_aligned(start, end):
+        with read_session(db_path) as conn:
+            if rollup_idle_threshold(conn) == idle_threshold:
+                cur = conn.execute(
+                    "SELECT COALESCE(SUM(active_samples),0) FROM rollup_hourly WHERE hour BETWEEN ? AND ?",
+                    (to_epoch_ms(start), to_epoch_ms(end)),
+                )
+                return int(cur.fetchone()[0]) * interval
+    with routed_session(db_path, start, end) as conn:
         cur = conn.execute(
             """
-            SELECT COUNT(*) FROM logs
-            WHERE event_type='sample' AND timestamp BETWEEN ? AND ? AND idle_seconds < ?
+            SELECT COALESCE(SUM(samples),0) FROM logs
+            WHERE event_type='sample' AND ts_ms BETWEEN ? AND ? AND idle_seconds < ?
             """,
-            (start.isoformat(), end.isoformat(), idle_threshold),
+            (to_epoch_ms(start), to_epoch_ms(end), idle_threshold),
         )
         n = int(cur.fetchone()[0])
     return n * interval
 
 
 def q_idle_sum(db_path: Path, start: datetime, end: datetime) -> int:
-    with db_session(db_path) as conn:
+    if hour_aligned(start, end):
+        with read_session(db_path) as conn:
+            cur = conn.execute(
+                "SELECT COALESCE(SUM(idle_seconds),0) FROM rollup_hourly WHERE hour BETWEEN ? AND ?",
+                (to_epoch_ms(start), to_epoch_ms(end)),
+            )
+            return int(cur.fetchone()[0])
+    with routed_session(db_path, start, end) as conn:
         cur = conn.execute(
             """
-            SELECT COALESCE(SUM(idle_seconds),0) FROM logs
-            WHERE event_type='sample' AND timestamp BETWEEN ? AND ?
+            SELECT COALESCE(SUM(idle_seconds * samples),0) FROM logs
+            WHERE event_type='sample' AND ts_ms BETWEEN ? AND ?
             """,
-            (start.isoformat(), end.isoformat()),
+            (to_epoch_ms(start), to_epoch_ms(end)),
         )
         return int(cur.fetchone()[0] or 0)
 
 
 def q_top_apps(db_path: Path, start: datetime, end: datetime, interval: int) -> List[Dict[str, Any]]:
-    with db_session(db_path) as conn:
+    if hour_aligned(start, end):
+        with read_session(db_path) as conn:
+            cur = conn.execute(
+                """
+                SELECT COALESCE(a.title,'Unknown') as app, c.cnt
+                FROM (
+                    SELECT app_id, SUM(active_samples + idle_samples) as cnt
+                    FROM rollup_hourly
+                    WHERE hour BETWEEN ? AND ?
+                    GROUP BY app_id
+                    HAVING cnt > 0
+                ) c
+                LEFT JOIN apps a ON a.id = c.app_id
+                ORDER BY c.cnt DESC LIMIT 10
+                """,
+                (to_epoch_ms(start), to_epoch_ms(end)),
+            )
+            return [{"app": r[0], "seconds": int(r[1]) * interval} for r in cur.fetchall()]
+    with routed_session(db_path, start, end) as conn:
         cur = conn.execute(
             """
-            SELECT COALESCE(active_app,'Unknown') as app, COUNT(*) as cnt
-            FROM logs
-            WHERE event_type='sample' AND timestamp BETWEEN ? AND ?
-            GROUP BY app ORDER BY cnt DESC LIMIT 10
+            SELECT COALESCE(a.title,'Unknown') as app, c.cnt
+            FROM (
+                SELECT app_id, SUM(samples) as cnt
+                FROM logs
+                WHERE event_type='sample' AND ts_ms BETWEEN ? AND ?
+                GROUP BY app_id
+            ) c
+            LEFT JOIN apps a ON a.id = c.app_id
+            ORDER BY c.cnt DESC LIMIT 10
             """,
-            (start.isoformat(), end.isoformat()),
+            (to_epoch_ms(start), to_epoch_ms(end)),
         )
         return [{"app": r[0], "seconds": int(r[1]) * interval} for r in cur.fetchall()]
 
 
 def q_top_projects(db_path: Path, start: datetime, end: datetime) -> List[Dict[str, Any]]:
-    with db_session(db_path) as conn:
+    if hour_aligned(start, end):
+        with read_session(db_path) as conn:
+            cur = conn.execute(
+                """
+                SELECT CASE project_path WHEN '' THEN 'Unknown' ELSE project_path END as proj, SUM(file_events) as cnt
+                FROM rollup_project_hourly
+                WHERE hour BETWEEN ? AND ?
+                GROUP BY proj ORDER BY cnt DESC LIMIT 10
+                """,
+                (to_epoch_ms(start), to_epoch_ms(end)),
+            )
+            return [{"project": r[0], "events": int(r[1])} for r in cur.fetchall()]
+    with routed_session(db_path, start, end) as conn:
         cur = conn.execute(
-            """
+            f"""
             SELECT COALESCE(project_path,'Unknown') as proj, COUNT(*) as cnt
             FROM logs
-            WHERE event_type LIKE 'file_%' AND timestamp BETWEEN ? AND ?
+            WHERE {FILE_EVENTS_SQL} AND ts_ms BETWEEN ? AND ?
             GROUP BY proj ORDER BY cnt DESC LIMIT 10
             """,
-            (start.isoformat(), end.isoformat()),
+            (to_epoch_ms(start), to_epoch_ms(end)),
         )
         return [{"project": r[0], "events": int(r[1])} for r in cur.fetchall()]
 
 
 def q_proofs_count(db_path: Path, start: datetime, end: datetime) -> int:
-    with db_session(db_path) as conn:
+    if hour_aligned(start, end):
+        with read_session(db_path) as conn:
+            cur = conn.execute(
+                "SELECT COALESCE(SUM(proof_events),0) FROM rollup_hourly WHERE hour BETWEEN ? AND ?",
+                (to_epoch_ms(start), to_epoch_ms(end)),
+            )
+            return int(cur.fetchone()[0])
+    with routed_session(db_path, start, end) as conn:
         cur = conn.execute(
             """
             SELECT COUNT(*) FROM logs
-            WHERE event_type='proof_capture' AND timestamp BETWEEN ? AND ?
+            WHERE event_type='proof_capture' AND ts_ms BETWEEN ? AND ?
             """,
-            (start.isoformat(), end.isoformat()),
+            (to_epoch_ms(start), to_epoch_ms(end)),
         )
         return int(cur.fetchone()[0] or 0)
 
 
+def _parse_day(value: str) -> date:
+    return date.today() if value == "today" else datetime.strptime(value, "%Y-%m-%d").date()
+
+
 @click.command()
 @click.option("--date", "date_arg", default="today", help="Date in YYYY-MM-DD or 'today'")
+@click.option("--from", "from_arg", default=None, help="First day of a range (YYYY-MM-DD); emits a JSON list")
+@click.option("--to", "to_arg", default=None, help="Last day of the range (YYYY-MM-DD or 'today', default today)")
 @click.option("--json", "json_out", default=None, help="Output JSON file path")
-def cli(date_arg: str, json_out: str | None) -> None:
+def cli(date_arg: str, from_arg: str | None, to_arg: str | None, json_out: str | None) -> None:
     cfg = default_config()
-    d = date.today() if date_arg == "today" else datetime.strptime(date_arg, "%Y-%m-%d").date()
-    start, end = day_bounds_utc(d)
-    active_seconds = q_active_seconds(cfg.db_path, start, end, cfg.sampling_interval_seconds, cfg.idle_threshold_seconds)
-    idle_seconds = q_idle_sum(cfg.db_path, start, end)
-    top_apps = q_top_apps(cfg.db_path, start, end, cfg.sampling_interval_seconds)
-    top_projects = q_top_projects(cfg.db_path, start, end)
-    proofs_count = q_proofs_count(cfg.db_path, start, end)
-    sessions = build_sessions_for_day(cfg.db_path, start, end, cfg.sampling_interval_seconds, cfg.idle_threshold_seconds, cfg.session_gap_seconds)
-    payload = {
-        "date": d.isoformat(),
-        "active_seconds": active_seconds,
-        "idle_seconds": idle_seconds,
-        "top_apps": top_apps,
-        "top_projects": top_projects,
-        "proofs_count": proofs_count,
-        "sessions": [
-            {
-                "start": s.start_time.isoformat(),
-                "end": (s.end_time.isoformat() if s.end_time else None),
-                "main_app": s.main_app,
-                "samples": s.samples,
-                "files_edited": s.files_edited,
-                "proofs_count": s.proofs_count,
-            }
-            for s in sessions
-        ],
-    }
+    if from_arg:
+        first, last = _parse_day(from_arg), _parse_day(to_arg or "today")
+        if last < first:
+            raise click.BadParameter("--to is before --from")
+    else:
+        first = last = _parse_day(date_arg)
+    # one ordered scan yields every metric for every day
+    days = [
+        m.to_payload()
+        for m in iter_day_metrics(
+            cfg.db_path, first, last, cfg.sampling_interval_seconds, cfg.idle_threshold_seconds, cfg.session_gap_seconds
+        )
+    ]
+    LOGGER.debug("Connection pool after report: %s", pool_stats())
+    payload: Any = days if from_arg else days[0]
     if json_out:
         out = Path(json_out)
         out.parent.mkdir(parents=True, exist_ok=True)
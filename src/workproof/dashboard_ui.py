@@ -4,7 +4,7 @@ import tkinter as tk
 from datetime import date, timedelta
 from pathlib import Path
 
-from .analytics import load_samples_df, daily_active_seconds, app_usage_seconds
+from .analytics import load_hourly_df, daily_active_seconds, app_usage_seconds
 from .charts_builder import build_bar_daily_hours, build_pie_app_usage, build_line_weekly_trend
 from .config import default_config
 
@@ -29,7 +29,7 @@ class DashboardApp(tk.Tk):
         d1 = date.today() - timedelta(days=6)
         d2 = date.today()
         start, end = d1, d2
-        df = load_samples_df(self.cfg.db_path, *self._bounds(d1, d2))
+        df = load_hourly_df(self.cfg.db_path, *self._bounds(d1, d2), self.cfg.idle_threshold_seconds)
         daily = daily_active_seconds(df, self.cfg.sampling_interval_seconds, self.cfg.idle_threshold_seconds)
         apps = app_usage_seconds(df, self.cfg.sampling_interval_seconds).head(8)
         bar_uri = build_bar_daily_hours(daily["date"].astype(str).tolist(), daily["active_seconds"].tolist())
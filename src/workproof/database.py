@@ -1,17 +1,47 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
+import re
 import sqlite3
+import stat
+import threading
+import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, Generator, Iterable, Optional, Tuple
+from typing import Any, Callable, ContextManager, Dict, Generator, Iterable, Iterator, List, Optional, Tuple
 
 LOGGER = logging.getLogger(__name__)
 
-CURRENT_SCHEMA_VERSION = 2
+CURRENT_SCHEMA_VERSION = 12
+STATEMENT_CACHE_SIZE = 128
+BACKFILL_CHUNK_ROWS = 5000
+# one row per settled file burst, or one ``file_bulk`` summary per bulk operation (see file_events.py)
+FILE_EVENT_TYPES = ("file_created", "file_modified", "file_deleted", "file_bulk")
+# running processes: a full name list every keyframe, spawn/exit name deltas in between
+PROCESS_EVENT_TYPES = ("proc_keyframe", "proc_delta")
+# sargable replacement for ``event_type LIKE 'file_%'``
+FILE_EVENTS_SQL = "event_type IN ({})".format(",".join(f"'{t}'" for t in FILE_EVENT_TYPES))
+HOUR_MS = 3_600_000
+# rollups split samples into active/idle with the threshold they were built with
+DEFAULT_IDLE_THRESHOLD = 60
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_ms(dt: datetime) -> int:
+    """UTC epoch milliseconds; naive datetimes are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(milliseconds=1)
+
+
+def from_epoch_ms(ms: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=ms)
 
 
 @dataclass
@@ -23,13 +53,25 @@ class LogRecord:
     project_path: Optional[str]
     event_type: str  # 'sample' | 'file_event'
     meta: Optional[str]  # JSON object
+    samples: int = 1  # identical consecutive sampling ticks this row stands for, ending at ``timestamp``
 
 
-def _connect(path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(path), timeout=10, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    conn.execute("PRAGMA foreign_keys=ON;")
+def _connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        str(path),
+        timeout=10,
+        isolation_level=None,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    if readonly:
+        # journal mode is persistent in the file; readers only need the timeout
+        conn.execute("PRAGMA query_only=ON;")
+    else:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA foreign_keys=ON;")
     conn.execute("PRAGMA busy_timeout=5000;")
     return conn
 
@@ -43,7 +85,140 @@ def db_session(path: Path) -> Generator[sqlite3.Connection, None, None]:
         conn.close()
 
 
-def initialize(path: Path) -> None:
+class ConnectionPool:
+    """Long-lived connections keyed by (thread, db path, read-only).
+
+    Each thread gets its own connection per database so the sqlite3 statement
+    cache (prepared statements keyed by SQL text) survives across queries.
+    Connections idle for longer than ``health_check_after`` seconds are pinged
+    before reuse and transparently reopened if the ping fails. Connections of
+    threads that have exited are closed whenever a new one is opened.
+    """
+
+    def __init__(self, health_check_after: float = 30.0) -> None:
+        self.health_check_after = health_check_after
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: Dict[sqlite3.Connection, threading.Thread] = {}  # connection -> owning thread
+        self.opened = 0
+        self.reused = 0
+        self.reopened = 0
+        self._trace: Optional[Callable[[str], None]] = None
+
+    def _conns(self) -> Dict[Tuple[str, bool], List[Any]]:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        return conns
+
+    def acquire(self, path: Path, readonly: bool = True) -> sqlite3.Connection:
+        key = (str(Path(path).resolve()), readonly)
+        conns = self._conns()
+        entry = conns.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            conn, last_used = entry
+            if now - last_used < self.health_check_after or self._healthy(conn):
+                entry[1] = now
+                with self._lock:
+                    self.reused += 1
+                return conn
+            self._discard(conn)
+            with self._lock:
+                self.reopened += 1
+        conn = _connect(Path(path), readonly=readonly)
+        if self._trace is not None:
+            conn.set_trace_callback(self._trace)
+        conns[key] = [conn, now]
+        with self._lock:
+            self._all[conn] = threading.current_thread()
+            self.opened += 1
+        self._close_orphans()
+        return conn
+
+    @contextmanager
+    def session(self, path: Path, readonly: bool = True) -> Generator[sqlite3.Connection, None, None]:
+        conn = self.acquire(path, readonly=readonly)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+    @staticmethod
+    def _healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._all.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _close_orphans(self) -> int:
+        """Close connections whose thread has exited (its thread-local mapping is gone with it)."""
+        with self._lock:
+            dead = [conn for conn, owner in self._all.items() if not owner.is_alive()]
+            for conn in dead:
+                del self._all[conn]
+        for conn in dead:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        if dead:
+            LOGGER.debug("Closed %s pooled connections of exited threads", len(dead))
+        return len(dead)
+
+    def set_trace_callback(self, callback: Optional[Callable[[str], None]]) -> None:
+        """Install ``callback`` on every pooled connection, current and future (used by the query-plan checks)."""
+        with self._lock:
+            self._trace = callback
+            for conn in self._all:
+                conn.set_trace_callback(callback)
+
+    def stats(self) -> Dict[str, int]:
+        self._close_orphans()
+        with self._lock:
+            return {
+                "open": len(self._all),
+                "opened": self.opened,
+                "reused": self.reused,
+                "reopened": self.reopened,
+            }
+
+    def close_all(self) -> None:
+        """Close every pooled connection (all threads), e.g. on shutdown or before deleting the DB."""
+        with self._lock:
+            conns, self._all = list(self._all), {}
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # drop every thread's mapping so the next acquire reconnects
+        self._local = threading.local()
+
+
+POOL = ConnectionPool()
+
+
+def read_session(path: Path) -> ContextManager[sqlite3.Connection]:
+    """Pooled read-only connection for report/dashboard queries."""
+    return POOL.session(path, readonly=True)
+
+
+def pool_stats() -> Dict[str, int]:
+    return POOL.stats()
+
+
+def initialize(path: Path, idle_threshold: int = DEFAULT_IDLE_THRESHOLD) -> None:
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     with db_session(path) as conn:
         conn.execute("BEGIN")
@@ -65,12 +240,11 @@ def initialize(path: Path) -> None:
                 idle_seconds INTEGER NOT NULL,
                 project_path TEXT,
                 event_type TEXT NOT NULL,
-                meta TEXT
+                meta TEXT,
+                ts_ms INTEGER
             )
             """
         )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_event_type ON logs(event_type)")
         version = _get_schema_version(conn)
         if version is None:
             _set_schema_version(conn, 1)
@@ -79,7 +253,51 @@ def initialize(path: Path) -> None:
         if version < 2:
             _migrate_to_v2(conn)
             _set_schema_version(conn, 2)
+        if version < 3:
+            _migrate_to_v3(conn)
+        if version < 4:
+            _migrate_to_v4(conn)
+        if version < 5:
+            _migrate_to_v5(conn)
+        if version < 7:
+            _migrate_to_v7(conn, idle_threshold)
+        if version < 8:
+            _migrate_to_v8(conn)
+        if version < 9:
+            _migrate_to_v9(conn)
+        if version < 10:
+            _migrate_to_v10(conn)
+        if version < 11:
+            _migrate_to_v11(conn)
+        if version < 12:
+            _migrate_to_v12(conn)
         conn.execute("COMMIT")
+        # backfills run outside the DDL transaction so the tracker is never blocked for long
+        if version < 3:
+            _backfill_ts_ms(conn)
+            _set_schema_version(conn, 3)
+        if version < 4:
+            _backfill_dictionary(conn)
+            _set_schema_version(conn, 4)
+        if version < 5:
+            _set_schema_version(conn, 5)
+        if version < 6:
+            _enable_incremental_vacuum(conn)
+            _set_schema_version(conn, 6)
+        if version < 7:
+            _backfill_rollups(conn)
+            _set_schema_version(conn, 7)
+        if version < 8:
+            _set_schema_version(conn, 8)
+        if version < 9:
+            _set_schema_version(conn, 9)
+        if version < 10:
+            _set_schema_version(conn, 10)
+        if version < 11:
+            _set_schema_version(conn, 11)
+        if version < 12:
+            _backfill_project_ids(conn)
+            _set_schema_version(conn, 12)
 
 
 def _get_schema_version(conn: sqlite3.Connection) -> Optional[int]:
@@ -121,73 +339,917 @@ def _migrate_to_v2(conn: sqlite3.Connection) -> None:
     conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions(start_time)")
 
 
-def insert_log(path: Path, record: LogRecord) -> None:
-    payload: Tuple[Any, ...] = (
-        record.timestamp.replace(tzinfo=timezone.utc).isoformat(),
-        record.active_app,
-        record.running_apps,
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _migrate_to_v3(conn: sqlite3.Connection) -> None:
+    # integer epoch-ms timestamps: range queries compare integers, readers skip ISO parsing
+    if "ts_ms" not in _column_names(conn, "logs"):
+        conn.execute("ALTER TABLE logs ADD COLUMN ts_ms INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_ts_ms ON logs(ts_ms)")
+    conn.execute("DROP INDEX IF EXISTS idx_logs_timestamp")
+
+
+def _backfill_ts_ms(conn: sqlite3.Connection, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> int:
+    last_id = 0
+    done = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, timestamp FROM logs WHERE id > ? AND ts_ms IS NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_rows),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for log_id, ts_s in rows:
+            try:
+                updates.append((to_epoch_ms(datetime.fromisoformat(ts_s)), log_id))
+            except (TypeError, ValueError):
+                LOGGER.warning("Cannot backfill ts_ms for log %s (timestamp %r)", log_id, ts_s)
+        conn.execute("BEGIN")
+        conn.executemany("UPDATE logs SET ts_ms=? WHERE id=?", updates)
+        conn.execute("COMMIT")
+        last_id = rows[-1][0]
+        done += len(updates)
+    if done:
+        LOGGER.info("Backfilled ts_ms for %s log rows", done)
+    return done
+
+
+_LOGS_V_SELECT = """
+    SELECT l.id, l.timestamp, l.ts_ms,
+           COALESCE(a.title, l.active_app) AS active_app,
+           COALESCE(ps.names, l.running_apps) AS running_apps,
+           l.idle_seconds, l.project_path, l.event_type, l.meta, l.app_id, l.procset_id, {samples} AS samples
+    FROM logs l
+    LEFT JOIN apps a ON a.id = l.app_id
+    LEFT JOIN process_sets ps ON ps.id = l.procset_id
+"""
+
+
+def _migrate_to_v4(conn: sqlite3.Connection) -> None:
+    # dictionary encoding: window titles and process snapshots are stored once
+    # and samples only carry integer keys
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS apps (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS process_sets (
+            id INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL UNIQUE,
+            names TEXT NOT NULL
+        )
+        """
+    )
+    cols = _column_names(conn, "logs")
+    if "app_id" not in cols:
+        conn.execute("ALTER TABLE logs ADD COLUMN app_id INTEGER REFERENCES apps(id)")
+    if "procset_id" not in cols:
+        conn.execute("ALTER TABLE logs ADD COLUMN procset_id INTEGER REFERENCES process_sets(id)")
+    # decoded view; legacy rows that still carry text fall through the COALESCE
+    _create_logs_view(conn)
+
+
+def _create_logs_view(conn: sqlite3.Connection) -> None:
+    samples = "l.samples" if "samples" in _column_names(conn, "logs") else "1"
+    conn.execute("DROP VIEW IF EXISTS logs_v")
+    conn.execute(f"CREATE VIEW logs_v AS {_LOGS_V_SELECT.format(samples=samples)}")
+
+
+def _migrate_to_v5(conn: sqlite3.Connection) -> None:
+    # covering indexes so dashboard/report queries never touch the table:
+    # typed queries (samples, file events, proofs) seek on event_type then the
+    # time range; sessionization reads every event type in time order
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_type_ts ON logs(event_type, ts_ms, idle_seconds, app_id, project_path)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_ts_cover ON logs(ts_ms, event_type, idle_seconds, app_id)")
+    # both are prefixes of the covering indexes above
+    conn.execute("DROP INDEX IF EXISTS idx_logs_event_type")
+    conn.execute("DROP INDEX IF EXISTS idx_logs_ts_ms")
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    # auto_vacuum can only change through a VACUUM; this is the last full
+    # rewrite the file gets, retention afterwards frees pages incrementally
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        LOGGER.info("Enabling incremental auto-vacuum (one-time VACUUM)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+def _migrate_to_v7(conn: sqlite3.Connection, idle_threshold: int) -> None:
+    # hourly rollups so reports read one row per (hour, app) instead of every sample;
+    # app_id 0 collects rows without an active window
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollup_hourly (
+            hour INTEGER NOT NULL,
+            app_id INTEGER NOT NULL,
+            active_samples INTEGER NOT NULL DEFAULT 0,
+            idle_samples INTEGER NOT NULL DEFAULT 0,
+            idle_seconds INTEGER NOT NULL DEFAULT 0,
+            file_events INTEGER NOT NULL DEFAULT 0,
+            proof_events INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, app_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollup_project_hourly (
+            hour INTEGER NOT NULL,
+            project_path TEXT NOT NULL,
+            file_events INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, project_path)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("INSERT OR IGNORE INTO meta(key,value) VALUES('rollup_watermark', '0')")
+    conn.execute("INSERT OR IGNORE INTO meta(key,value) VALUES('rollup_idle_threshold', ?)", (str(int(idle_threshold)),))
+
+
+def _migrate_to_v8(conn: sqlite3.Connection) -> None:
+    # persisted sessions: range reads seek on end_time, cascaded deletes on session_id
+    if not _column_names(conn, "sessions"):
+        return  # pre-v2 layout without session tables
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_end ON sessions(end_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_session_events_session ON session_events(session_id)")
+
+
+def _iso_to_ms_sql(col: str) -> str:
+    return f"CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _migrate_to_v9(conn: sqlite3.Connection) -> None:
+    # interval indexes for point-in-time and overlap lookups. R*Tree coordinates
+    # are 32-bit floats rounded outward, so lookups filter candidates exactly
+    # against the base tables.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS focus_spans (
+            id INTEGER PRIMARY KEY,
+            app_id INTEGER REFERENCES apps(id),
+            start_ms INTEGER NOT NULL,
+            end_ms INTEGER NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 1
+        )
+        """
+    )
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS focus_rtree USING rtree(id, start_ms, end_ms)")
+    for event in ("INSERT", "UPDATE"):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS focus_rtree_{event.lower()} AFTER {event} ON focus_spans BEGIN
+                INSERT OR REPLACE INTO focus_rtree(id, start_ms, end_ms) VALUES (new.id, new.start_ms, new.end_ms);
+            END
+            """
+        )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS focus_rtree_delete AFTER DELETE ON focus_spans BEGIN
+            DELETE FROM focus_rtree WHERE id = old.id;
+        END
+        """
+    )
+    if not _column_names(conn, "sessions"):
+        return  # pre-v2 layout without session tables
+    start_ms = _iso_to_ms_sql("new.start_time")
+    end_ms = _iso_to_ms_sql("COALESCE(new.end_time, new.start_time)")
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS sessions_rtree USING rtree(id, start_ms, end_ms)")
+    for event in ("INSERT", "UPDATE"):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS sessions_rtree_{event.lower()} AFTER {event} ON sessions BEGIN
+                INSERT OR REPLACE INTO sessions_rtree(id, start_ms, end_ms) VALUES (new.id, {start_ms}, {end_ms});
+            END
+            """
+        )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS sessions_rtree_delete AFTER DELETE ON sessions BEGIN
+            DELETE FROM sessions_rtree WHERE id = old.id;
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO sessions_rtree(id, start_ms, end_ms)
+        SELECT id, {_iso_to_ms_sql("start_time")}, {_iso_to_ms_sql("COALESCE(end_time, start_time)")} FROM sessions
+        """
+    )
+
+
+def _migrate_to_v10(conn: sqlite3.Connection) -> None:
+    # change-driven sampling: a row stands for ``samples`` identical ticks, so
+    # the covering indexes carry the weight too
+    if "samples" not in _column_names(conn, "logs"):
+        conn.execute("ALTER TABLE logs ADD COLUMN samples INTEGER NOT NULL DEFAULT 1")
+    conn.execute("DROP INDEX IF EXISTS idx_logs_type_ts")
+    conn.execute("DROP INDEX IF EXISTS idx_logs_ts_cover")
+    conn.execute(
+        "CREATE INDEX idx_logs_type_ts ON logs(event_type, ts_ms, idle_seconds, app_id, project_path, samples)"
+    )
+    conn.execute("CREATE INDEX idx_logs_ts_cover ON logs(ts_ms, event_type, idle_seconds, app_id, samples)")
+    _create_logs_view(conn)
+
+
+def _migrate_to_v11(conn: sqlite3.Connection) -> None:
+    # periodic drains of the in-process metrics registry (see metrics.py)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS metrics (
+            ts_ms INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            max REAL,
+            buckets TEXT,
+            PRIMARY KEY (ts_ms, name)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migrate_to_v12(conn: sqlite3.Connection) -> None:
+    # project roots are interned like window titles; project_path stays for readers
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    if "project_id" not in _column_names(conn, "logs"):
+        conn.execute("ALTER TABLE logs ADD COLUMN project_id INTEGER REFERENCES projects(id)")
+
+
+def _backfill_project_ids(conn: sqlite3.Connection) -> None:
+    # only file events carry a project, so one pass is cheap
+    conn.execute("BEGIN")
+    conn.execute("INSERT OR IGNORE INTO projects(path) SELECT DISTINCT project_path FROM logs WHERE project_path IS NOT NULL")
+    conn.execute(
+        """
+        UPDATE logs SET project_id = (SELECT id FROM projects p WHERE p.path = logs.project_path)
+        WHERE project_path IS NOT NULL AND project_id IS NULL
+        """
+    )
+    conn.execute("COMMIT")
+
+
+def _backfill_dictionary(conn: sqlite3.Connection, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> int:
+    interner = Interner()
+    last_id = 0
+    done = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, active_app, running_apps FROM logs
+            WHERE id > ? AND app_id IS NULL AND procset_id IS NULL
+            ORDER BY id LIMIT ?
+            """,
+            (last_id, chunk_rows),
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute("BEGIN")
+        try:
+            updates = [
+                (interner.app_id(conn, app), interner.procset_id(conn, running), log_id)
+                for log_id, app, running in rows
+            ]
+            conn.executemany(
+                "UPDATE logs SET app_id=?, procset_id=?, active_app=NULL, running_apps='' WHERE id=?",
+                updates,
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        last_id = rows[-1][0]
+        done += len(rows)
+    if done:
+        LOGGER.info("Dictionary-encoded %s log rows", done)
+    return done
+
+
+def canonical_process_set(running_apps: str) -> str:
+    """Order-independent JSON text for a running-apps snapshot so identical sets share a row."""
+    try:
+        names = json.loads(running_apps) if running_apps else []
+    except ValueError:
+        return running_apps
+    if not isinstance(names, list):
+        return running_apps
+    return json.dumps(sorted({str(n) for n in names}), ensure_ascii=False)
+
+
+class Interner:
+    """Per-connection cache of ``apps`` / ``process_sets`` / ``projects`` ids.
+
+    Must be cleared when a transaction that created ids is rolled back.
+    """
+
+    def __init__(self) -> None:
+        self._apps: Dict[str, int] = {}
+        self._procsets: Dict[str, int] = {}
+        self._projects: Dict[str, int] = {}
+
+    def clear(self) -> None:
+        self._apps.clear()
+        self._procsets.clear()
+        self._projects.clear()
+
+    def app_id(self, conn: sqlite3.Connection, title: Optional[str]) -> Optional[int]:
+        if title is None:
+            return None
+        app_id = self._apps.get(title)
+        if app_id is None:
+            row = conn.execute("SELECT id FROM apps WHERE title=?", (title,)).fetchone()
+            if row is None:
+                conn.execute("INSERT OR IGNORE INTO apps(title) VALUES(?)", (title,))
+                row = conn.execute("SELECT id FROM apps WHERE title=?", (title,)).fetchone()
+            app_id = self._apps[title] = int(row[0])
+        return app_id
+
+    def procset_id(self, conn: sqlite3.Connection, running_apps: Optional[str]) -> Optional[int]:
+        if running_apps is None:
+            return None
+        names = canonical_process_set(running_apps)
+        digest = hashlib.sha1(names.encode("utf-8")).hexdigest()
+        ps_id = self._procsets.get(digest)
+        if ps_id is None:
+            row = conn.execute("SELECT id FROM process_sets WHERE hash=?", (digest,)).fetchone()
+            if row is None:
+                conn.execute("INSERT OR IGNORE INTO process_sets(hash, names) VALUES(?,?)", (digest, names))
+                row = conn.execute("SELECT id FROM process_sets WHERE hash=?", (digest,)).fetchone()
+            ps_id = self._procsets[digest] = int(row[0])
+        return ps_id
+
+    def project_id(self, conn: sqlite3.Connection, path: Optional[str]) -> Optional[int]:
+        if path is None:
+            return None
+        project_id = self._projects.get(path)
+        if project_id is None:
+            row = conn.execute("SELECT id FROM projects WHERE path=?", (path,)).fetchone()
+            if row is None:
+                conn.execute("INSERT OR IGNORE INTO projects(path) VALUES(?)", (path,))
+                row = conn.execute("SELECT id FROM projects WHERE path=?", (path,)).fetchone()
+            project_id = self._projects[path] = int(row[0])
+        return project_id
+
+
+_INSERT_LOG_SQL = """
+    INSERT INTO logs(timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta, ts_ms, app_id, procset_id, samples, project_id)
+    VALUES(?,NULL,'',?,?,?,?,?,?,?,?,?)
+"""
+
+
+# natural key for imports: same instant, event type, app and project
+_INSERT_LOG_DEDUP_SQL = """
+    INSERT INTO logs(timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta, ts_ms, app_id, procset_id, samples, project_id)
+    SELECT ?1,NULL,'',?2,?3,?4,?5,?6,?7,?8,?9,?10
+    WHERE NOT EXISTS (
+        SELECT 1 FROM logs
+        WHERE ts_ms = ?6 AND event_type = ?4 AND app_id IS ?7 AND project_path IS ?3
+    )
+"""
+
+
+def _log_params(conn: sqlite3.Connection, interner: Interner, record: LogRecord) -> Tuple[Any, ...]:
+    ts = record.timestamp
+    ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+    return (
+        ts.isoformat(),
         record.idle_seconds,
         record.project_path,
         record.event_type,
         record.meta,
+        to_epoch_ms(ts),
+        interner.app_id(conn, record.active_app),
+        interner.procset_id(conn, record.running_apps),
+        max(1, int(record.samples or 1)),
+        interner.project_id(conn, record.project_path),
     )
+
+
+def insert_log(path: Path, record: LogRecord) -> None:
     for attempt in range(3):
         try:
             with db_session(path) as conn:
-                conn.execute(
-                    """
-                    INSERT INTO logs(timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta)
-                    VALUES(?,?,?,?,?,?,?)
-                    """,
-                    payload,
-                )
+                insert_logs(conn, [record])
             return
         except sqlite3.OperationalError as e:
             LOGGER.warning("DB insert retry %s due to %s", attempt + 1, e)
     # final attempt raise
     with db_session(path) as conn:
+        insert_logs(conn, [record])
+
+
+def insert_logs(
+    conn: sqlite3.Connection,
+    records: List[LogRecord],
+    skip_duplicates: bool = False,
+    interner: Optional[Interner] = None,
+) -> int:
+    """Write a batch of records in a single transaction on an open connection.
+
+    Returns the number of rows actually inserted (duplicates by natural key
+    are skipped when ``skip_duplicates`` is set). Pass a long-lived
+    ``interner`` to avoid re-resolving app / process-set ids per batch.
+    """
+    if not records:
+        return 0
+    if interner is None:
+        interner = Interner()
+    sql = _INSERT_LOG_DEDUP_SQL if skip_duplicates else _INSERT_LOG_SQL
+    # take the write lock up front: the interner reads first, and a deferred transaction
+    # whose snapshot went stale fails its lock upgrade at once, ignoring busy_timeout
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        params = [_log_params(conn, interner, r) for r in records]
+        before = conn.total_changes
+        conn.executemany(sql, params)
+        inserted = conn.total_changes - before
+        _fold_rollups(conn)
+    except Exception:
+        conn.execute("ROLLBACK")
+        # ids created inside the rolled back transaction no longer exist
+        interner.clear()
+        raise
+    conn.execute("COMMIT")
+    return inserted
+
+
+# ---------------------------------------------------------------------------
+# Hourly rollups
+#
+# ``rollup_hourly`` / ``rollup_project_hourly`` are kept in step with ``logs``:
+# every write folds the rows past the ``rollup_watermark`` id into their hour
+# inside the same transaction, so readers never see the two disagree.
+
+_ROLLUP_APPS_SQL = f"""
+    INSERT INTO rollup_hourly(hour, app_id, active_samples, idle_samples, idle_seconds, file_events, proof_events)
+    SELECT ts_ms - ts_ms % {HOUR_MS}, COALESCE(app_id, 0),
+           SUM(CASE WHEN event_type='sample' AND idle_seconds < :threshold THEN samples ELSE 0 END),
+           SUM(CASE WHEN event_type='sample' AND idle_seconds >= :threshold THEN samples ELSE 0 END),
+           SUM(CASE WHEN event_type='sample' THEN idle_seconds * samples ELSE 0 END),
+           SUM({FILE_EVENTS_SQL}),
+           SUM(event_type='proof_capture')
+    FROM logs
+    WHERE id > :lo AND id <= :hi AND ts_ms IS NOT NULL
+    GROUP BY 1, 2
+    ON CONFLICT(hour, app_id) DO UPDATE SET
+        active_samples = active_samples + excluded.active_samples,
+        idle_samples = idle_samples + excluded.idle_samples,
+        idle_seconds = idle_seconds + excluded.idle_seconds,
+        file_events = file_events + excluded.file_events,
+        proof_events = proof_events + excluded.proof_events
+"""
+
+_ROLLUP_PROJECTS_SQL = f"""
+    INSERT INTO rollup_project_hourly(hour, project_path, file_events)
+    SELECT ts_ms - ts_ms % {HOUR_MS}, COALESCE(project_path, ''), COUNT(*)
+    FROM logs
+    WHERE id > :lo AND id <= :hi AND ts_ms IS NOT NULL AND {FILE_EVENTS_SQL}
+    GROUP BY 1, 2
+    ON CONFLICT(hour, project_path) DO UPDATE SET file_events = file_events + excluded.file_events
+"""
+
+
+def _fold_rollups(conn: sqlite3.Connection, upto_id: Optional[int] = None) -> int:
+    """Add logs rows past the watermark (up to ``upto_id``) to the rollups; the caller owns the transaction."""
+    meta = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('rollup_watermark', 'rollup_idle_threshold')"
+    ).fetchall())
+    if "rollup_watermark" not in meta:
+        return 0  # not migrated yet; the v7 backfill will pick these rows up
+    lo = int(meta["rollup_watermark"])
+    hi = upto_id if upto_id is not None else (conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] or 0)
+    if hi <= lo:
+        return 0
+    params = {"lo": lo, "hi": hi, "threshold": int(meta["rollup_idle_threshold"])}
+    conn.execute(_ROLLUP_APPS_SQL, params)
+    conn.execute(_ROLLUP_PROJECTS_SQL, params)
+    conn.execute("UPDATE meta SET value=? WHERE key='rollup_watermark'", (str(hi),))
+    return hi - lo
+
+
+def _backfill_rollups(conn: sqlite3.Connection, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> None:
+    hi = conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] or 0
+    lo = 0
+    while lo < hi:
+        conn.execute("BEGIN IMMEDIATE")
+        lo = int(conn.execute("SELECT value FROM meta WHERE key='rollup_watermark'").fetchone()[0])
+        if lo < hi:
+            _fold_rollups(conn, min(lo + chunk_rows, hi))
+            lo = min(lo + chunk_rows, hi)
+        conn.execute("COMMIT")
+    if hi:
+        LOGGER.info("Built hourly rollups up to log id %s", hi)
+
+
+def rollup_idle_threshold(conn: sqlite3.Connection) -> Optional[int]:
+    row = conn.execute("SELECT value FROM meta WHERE key='rollup_idle_threshold'").fetchone()
+    return int(row[0]) if row else None
+
+
+def hour_aligned(start: datetime, end: datetime) -> bool:
+    """True when ``[start, end]`` covers whole hours, i.e. it can be answered from the rollups."""
+    return to_epoch_ms(start) % HOUR_MS == 0 and (to_epoch_ms(end) + 1) % HOUR_MS == 0
+
+
+def _delete_in_chunks(
+    conn: sqlite3.Connection,
+    select_ids_sql: str,
+    delete_sql: str,
+    params: Tuple[Any, ...],
+    chunk_rows: int,
+    chunk_budget_seconds: float,
+    pause_seconds: float,
+    vacuum_pages: int,
+) -> int:
+    """Delete in short transactions sized to ``chunk_budget_seconds`` each.
+
+    The writer thread gets the lock back between chunks, and freed pages are
+    returned to the OS a few at a time with ``incremental_vacuum``.
+    """
+    total = 0
+    chunk = chunk_rows
+    while True:
+        t0 = time.monotonic()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [(r[0],) for r in conn.execute(select_ids_sql, (*params, chunk))]
+            conn.executemany(delete_sql, ids)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        total += len(ids)
+        elapsed = time.monotonic() - t0
+        if ids:
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        if len(ids) < chunk:
+            return total
+        if elapsed > chunk_budget_seconds:
+            chunk = max(100, chunk // 2)
+        elif elapsed < chunk_budget_seconds / 2:
+            chunk = min(chunk_rows * 8, chunk * 2)
+        time.sleep(pause_seconds)
+
+
+def purge_older_than(
+    path: Path,
+    days: int,
+    chunk_rows: int = 2000,
+    chunk_budget_seconds: float = 0.05,
+    pause_seconds: float = 0.02,
+    vacuum_pages: int = 256,
+) -> int:
+    """Incrementally delete logs and sessions older than ``days``; returns log rows deleted."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    opts = (chunk_rows, chunk_budget_seconds, pause_seconds, vacuum_pages)
+    with db_session(path) as conn:
+        purged = _delete_in_chunks(
+            conn,
+            "SELECT id FROM logs WHERE ts_ms < ? LIMIT ?",
+            "DELETE FROM logs WHERE id=?",
+            (to_epoch_ms(cutoff),),
+            *opts,
+        )
+        conn.execute("BEGIN IMMEDIATE")
+        # only whole hours before the cutoff; the partial hour ages out tomorrow
+        last_hour = to_epoch_ms(cutoff) - HOUR_MS
+        conn.execute("DELETE FROM rollup_hourly WHERE hour <= ?", (last_hour,))
+        conn.execute("DELETE FROM rollup_project_hourly WHERE hour <= ?", (last_hour,))
+        # candidates from the focus_rtree interval index (start <= end, so its start bound is safe);
+        # focus_rtree follows through its trigger
         conn.execute(
             """
-            INSERT INTO logs(timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta)
-            VALUES(?,?,?,?,?,?,?)
+            DELETE FROM focus_spans
+            WHERE id IN (SELECT id FROM focus_rtree WHERE start_ms < :cutoff) AND end_ms < :cutoff
             """,
-            payload,
+            {"cutoff": to_epoch_ms(cutoff)},
         )
+        conn.execute("DELETE FROM metrics WHERE ts_ms < ?", (to_epoch_ms(cutoff),))
+        conn.execute("COMMIT")
+        # session_events follow through ON DELETE CASCADE
+        sessions = _delete_in_chunks(
+            conn,
+            "SELECT id FROM sessions WHERE start_time < ? LIMIT ?",
+            "DELETE FROM sessions WHERE id=?",
+            (cutoff.isoformat(),),
+            *opts,
+        )
+        # drain whatever free pages the chunks left behind
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            while free > 0:
+                conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+                left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if left >= free:
+                    break
+                free = left
+                time.sleep(pause_seconds)
+    LOGGER.info("Retention purged %s log rows and %s sessions older than %s days", purged, sessions, days)
+    return purged
 
 
-def purge_older_than(path: Path, days: int) -> int:
-    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-    with db_session(path) as conn:
-        cur = conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff.isoformat(),))
-        conn.execute("VACUUM")
-        return cur.rowcount
+# ---------------------------------------------------------------------------
+# Monthly partitions
+#
+# The main DB holds the open month. Closed months are moved into
+# ``<stem>-YYYY-MM<suffix>`` next to it, compacted and made read-only.
+# ``routed_session`` attaches only the partitions a range touches and
+# shadows ``logs`` / ``logs_v`` with TEMP views over all of them, so range
+# queries run unchanged. Retention of a closed month is a file unlink.
+# ---------------------------------------------------------------------------
 
+# SQLite's default SQLITE_LIMIT_ATTACHED is 10
+MAX_ATTACHED_PARTITIONS = 9
 
-def fetch_logs_between(path: Path, start: datetime, end: datetime) -> Iterable[Dict[str, Any]]:
+LOG_COLUMNS = (
+    "id", "timestamp", "active_app", "running_apps", "idle_seconds", "project_path",
+    "event_type", "meta", "ts_ms", "app_id", "procset_id", "samples", "project_id",
+)
+# what a partition archived before a column existed reads instead of NULL
+_LOG_COLUMN_DEFAULTS = {"samples": "1"}
+
+
+def partition_path(path: Path, year: int, month: int) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}-{year:04d}-{month:02d}{path.suffix}")
+
+
+def list_partitions(path: Path) -> Dict[Tuple[int, int], Path]:
+    path = Path(path)
+    pattern = re.compile(rf"^{re.escape(path.stem)}-(\d{{4}})-(\d{{2}}){re.escape(path.suffix)}$")
+    found: Dict[Tuple[int, int], Path] = {}
+    if path.parent.exists():
+        for p in path.parent.iterdir():
+            m = pattern.match(p.name)
+            if m:
+                found[(int(m.group(1)), int(m.group(2)))] = p
+    return found
+
+
+def _month_bounds_ms(year: int, month: int) -> Tuple[int, int]:
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    nxt = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return to_epoch_ms(start), to_epoch_ms(nxt)
+
+
+def _months_between(start: datetime, end: datetime) -> List[Tuple[int, int]]:
+    start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+    y, m = start.year, start.month
+    months = []
+    while (y, m) <= (end.year, end.month):
+        months.append((y, m))
+        y, m = y + (m == 12), m % 12 + 1
+    return months
+
+
+def _set_writable(path: Path, writable: bool) -> None:
+    mode = os.stat(path).st_mode
+    if writable:
+        os.chmod(path, mode | stat.S_IWUSR)
+    else:
+        os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def routed_ranges(path: Path, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Split ``[start, end]`` into ordered sub-ranges that each touch at most ``MAX_ATTACHED_PARTITIONS`` partitions."""
+    partitions = list_partitions(path)
+    months = _months_between(start, end)
+    touched = [ym for ym in months if ym in partitions]
+    if len(touched) <= MAX_ATTACHED_PARTITIONS:
+        return [(start, end)]
+    ranges = []
+    lo = start
+    for ym in touched[MAX_ATTACHED_PARTITIONS::MAX_ATTACHED_PARTITIONS]:
+        boundary = from_epoch_ms(_month_bounds_ms(*ym)[0])
+        ranges.append((lo, boundary - timedelta(milliseconds=1)))
+        lo = boundary
+    ranges.append((lo, end))
+    return ranges
+
+
+@contextmanager
+def routed_session(path: Path, start: datetime, end: datetime) -> Generator[sqlite3.Connection, None, None]:
+    """Read-only connection whose ``logs`` / ``logs_v`` span every partition overlapping ``[start, end]``."""
+    partitions = list_partitions(path)
+    touched = [partitions[ym] for ym in _months_between(start, end) if ym in partitions]
+    if len(touched) > MAX_ATTACHED_PARTITIONS:
+        raise ValueError(f"range touches {len(touched)} partitions; split it with routed_ranges()")
+    if not touched:
+        with read_session(path) as conn:
+            yield conn
+        return
+    conn = _connect(path)
+    try:
+        selects = [f"SELECT {', '.join(LOG_COLUMNS)} FROM main.logs"]
+        for i, part in enumerate(touched):
+            schema = f"part{i}"
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(part),))
+            have = {r[1] for r in conn.execute(f"PRAGMA {schema}.table_info(logs)")}
+            # partitions archived before a later column existed read it as NULL
+            cols = ", ".join(c if c in have else f"{_LOG_COLUMN_DEFAULTS.get(c, 'NULL')} AS {c}" for c in LOG_COLUMNS)
+            selects.append(f"SELECT {cols} FROM {schema}.logs")
+        conn.execute(f"CREATE TEMP VIEW logs AS {' UNION ALL '.join(selects)}")
+        conn.execute(f"CREATE TEMP VIEW logs_v AS {_LOGS_V_SELECT.format(samples='l.samples')}")
+        conn.execute("PRAGMA query_only=ON;")
+        yield conn
+    finally:
+        conn.close()
+
+
+def filter_archived_duplicates(conn: sqlite3.Connection, path: Path, records: List[LogRecord]) -> List[LogRecord]:
+    """Drop records whose natural key is already in a closed-month partition.
+
+    ``insert_logs(skip_duplicates=True)`` only sees the main DB; imports run this
+    first so re-importing archived history stays a no-op. Must run outside a
+    transaction (it attaches each partition in turn).
+    """
+    partitions = list_partitions(path)
+    by_month: Dict[Tuple[int, int], List[int]] = {}
+    for i, r in enumerate(records):
+        ts = r.timestamp.astimezone(timezone.utc) if r.timestamp.tzinfo else r.timestamp
+        if (ts.year, ts.month) in partitions:
+            by_month.setdefault((ts.year, ts.month), []).append(i)
+    if not by_month:
+        return records
+    app_ids: Dict[Optional[str], Optional[int]] = {None: None}
+    for title in {r.active_app for r in records} - {None}:
+        row = conn.execute("SELECT id FROM apps WHERE title=?", (title,)).fetchone()
+        app_ids[title] = int(row[0]) if row else -1  # never archived under an unknown title
+    dupes = set()
+    for ym, idxs in by_month.items():
+        conn.execute("ATTACH DATABASE ? AS arch", (str(partitions[ym]),))
+        try:
+            for i in idxs:
+                r = records[i]
+                hit = conn.execute(
+                    "SELECT 1 FROM arch.logs WHERE ts_ms=? AND event_type=? AND app_id IS ? AND project_path IS ? LIMIT 1",
+                    (to_epoch_ms(r.timestamp), r.event_type, app_ids[r.active_app], r.project_path),
+                ).fetchone()
+                if hit is not None:
+                    dupes.add(i)
+        finally:
+            conn.execute("DETACH DATABASE arch")
+    return [r for i, r in enumerate(records) if i not in dupes]
+
+
+def archive_closed_months(path: Path, now: Optional[datetime] = None) -> List[Path]:
+    """Move every month before the current one out of the main DB into its partition file."""
+    now = now or datetime.now(timezone.utc)
+    current = (now.year, now.month)
+    archived: List[Path] = []
+    cols = ", ".join(LOG_COLUMNS)
     with db_session(path) as conn:
-        cur = conn.execute(
-            """
-            SELECT timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta
-            FROM logs
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-            """,
-            (start.isoformat(), end.isoformat()),
-        )
-        cols = [c[0] for c in cur.description]
-        for row in cur.fetchall():
-            d = dict(zip(cols, row))
-            # parse JSON fields
-            try:
-                d["running_apps"] = json.loads(d["running_apps"])
-            except Exception:
-                pass
+        oldest = conn.execute("SELECT MIN(ts_ms) FROM logs").fetchone()[0]
+        if oldest is None:
+            return archived
+        for year, month in _months_between(from_epoch_ms(oldest), now):
+            if (year, month) >= current:
+                break
+            lo, hi = _month_bounds_ms(year, month)
+            if conn.execute("SELECT 1 FROM logs WHERE ts_ms >= ? AND ts_ms < ? LIMIT 1", (lo, hi)).fetchone() is None:
+                continue
+            target = partition_path(path, year, month)
+            if target.exists():
+                _set_writable(target, True)  # late rows for an already closed month
+            initialize(target)
+            conn.execute("ATTACH DATABASE ? AS arch", (str(target),))
             try:
-                d["meta"] = json.loads(d["meta"]) if d["meta"] else None
-            except Exception:
-                pass
-            return_item = d
-            yield return_item
+                conn.execute("BEGIN")
+                # ids are never reused in the main DB, so copying the dictionaries keeps app_id/procset_id/project_id valid
+                conn.execute("INSERT OR IGNORE INTO arch.apps SELECT id, title FROM main.apps")
+                conn.execute("INSERT OR IGNORE INTO arch.process_sets SELECT id, hash, names FROM main.process_sets")
+                conn.execute("INSERT OR IGNORE INTO arch.projects SELECT id, path FROM main.projects")
+                conn.execute(
+                    f"INSERT OR IGNORE INTO arch.logs({cols}) SELECT {cols} FROM main.logs WHERE ts_ms >= ? AND ts_ms < ?",
+                    (lo, hi),
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.execute("DETACH DATABASE arch")
+            _delete_in_chunks(
+                conn,
+                "SELECT id FROM logs WHERE ts_ms >= ? AND ts_ms < ? LIMIT ?",
+                "DELETE FROM logs WHERE id=?",
+                (lo, hi),
+                chunk_rows=2000,
+                chunk_budget_seconds=0.05,
+                pause_seconds=0.02,
+                vacuum_pages=256,
+            )
+            with db_session(target) as part:
+                part.execute("VACUUM")
+                # rollback journal so the file opens cleanly once read-only
+                part.execute("PRAGMA journal_mode=DELETE;")
+            _set_writable(target, False)
+            archived.append(target)
+            LOGGER.info("Archived %04d-%02d to %s", year, month, target)
+    return archived
 
 
+def drop_partitions_older_than(path: Path, days: int) -> int:
+    """Retention for closed months: unlink partitions that end before the cutoff."""
+    cutoff_ms = to_epoch_ms(datetime.now(timezone.utc) - timedelta(days=days))
+    dropped = 0
+    for (year, month), part in sorted(list_partitions(path).items()):
+        if _month_bounds_ms(year, month)[1] <= cutoff_ms:
+            _set_writable(part, True)  # Windows refuses to delete read-only files
+            part.unlink()
+            dropped += 1
+            LOGGER.info("Dropped partition %s", part)
+    return dropped
 
+
+def iter_log_rows(path: Path, start: datetime, end: datetime, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Stream raw log rows in timestamp order using ``fetchmany`` (constant memory)."""
+    for lo, hi in routed_ranges(path, start, end):
+        with routed_session(path, lo, hi) as conn:
+            cur = conn.execute(
+                """
+                SELECT timestamp, active_app, running_apps, idle_seconds, project_path, event_type, meta, ts_ms, samples
+                FROM logs_v
+                WHERE ts_ms BETWEEN ? AND ?
+                ORDER BY ts_ms ASC
+                """,
+                (to_epoch_ms(lo), to_epoch_ms(hi)),
+            )
+            cols = [c[0] for c in cur.description]
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(cols, row))
+
+
+def process_set_at(path: Path, ts: datetime, lookback: timedelta = timedelta(days=1)) -> Optional[List[str]]:
+    """Rebuild the running-process names at ``ts`` from the last keyframe plus later deltas.
+
+    Returns ``None`` when no keyframe lies within ``lookback``; rows written before
+    delta encoding fall back to the full list stored on the latest sample.
+    """
+    hi = to_epoch_ms(ts)
+    lo = to_epoch_ms(ts - lookback)
+    with routed_session(path, ts - lookback, ts) as conn:
+        row = conn.execute(
+            """
+            SELECT ts_ms, running_apps FROM logs_v
+            WHERE event_type = 'proc_keyframe' AND ts_ms BETWEEN ? AND ?
+            ORDER BY ts_ms DESC LIMIT 1
+            """,
+            (lo, hi),
+        ).fetchone()
+        if row is None:
+            legacy = conn.execute(
+                """
+                SELECT running_apps FROM logs_v
+                WHERE event_type = 'sample' AND ts_ms BETWEEN ? AND ?
+                ORDER BY ts_ms DESC LIMIT 1
+                """,
+                (lo, hi),
+            ).fetchone()
+            names = json.loads(legacy[0]) if legacy and legacy[0] else []
+            return sorted(set(names)) if names else None
+        names = set(json.loads(row[1]) if row[1] else [])
+        for (meta,) in conn.execute(
+            """
+            SELECT meta FROM logs_v
+            WHERE event_type = 'proc_delta' AND ts_ms > ? AND ts_ms <= ?
+            ORDER BY ts_ms ASC, id ASC
+            """,
+            (row[0], hi),
+        ):
+            delta = json.loads(meta) if meta else {}
+            names.difference_update(delta.get("exited", ()))
+            names.update(delta.get("spawned", ()))
+    return sorted(names)
+
+
+def fetch_logs_between(path: Path, start: datetime, end: datetime) -> Iterable[Dict[str, Any]]:
+    for d in iter_log_rows(path, start, end):
+        # parse JSON fields
+        try:
+            d["running_apps"] = json.loads(d["running_apps"])
+        except Exception:
+            pass
+        try:
+            d["meta"] = json.loads(d["meta"]) if d["meta"] else None
+        except Exception:
+            pass
+        yield d
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .database import LogRecord
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _PathBurst:
+    first: str  # raw kinds: created | modified | deleted
+    last: str
+    first_ts: datetime
+    last_ts: datetime
+    started: float  # monotonic
+    last_seen: float
+    events: int = 1
+
+
+@dataclass
+class _BulkBurst:
+    first_ts: datetime
+    last_ts: datetime
+    started: float
+    last_seen: float
+    paths: Dict[str, str] = field(default_factory=dict)  # path -> outcome so far
+    events: int = 0
+
+
+def _outcome(prev: Optional[str], kind: str) -> str:
+    if prev is None or kind == "deleted":
+        return kind
+    return "created" if prev == "created" else "modified"
+
+
+class FileEventCoalescer:
+    """Fold raw watcher events into one row per settled file, or one summary per bulk operation.
+
+    A path's burst is written once no event arrived for it in ``debounce_seconds``
+    (an editor save's created + modified x3 becomes one ``file_created`` with
+    ``events=4``; a file created and deleted within the burst is dropped as a
+    temporary). When more than ``bulk_threshold`` paths of one project are in flight
+    at once (``npm install``, ``git checkout``, build output), the project's burst
+    becomes a single ``file_bulk`` row written when the project settles. No burst is
+    held longer than ``max_hold_seconds``.
+
+    Not thread-safe: the file watcher feeds it from its flush thread only.
+    """
+
+    def __init__(self, debounce_seconds: float = 2.0, bulk_threshold: int = 200, max_hold_seconds: float = 60.0) -> None:
+        self.debounce_seconds = debounce_seconds
+        self.bulk_threshold = bulk_threshold
+        self.max_hold_seconds = max_hold_seconds
+        self._paths: Dict[str, Dict[str, _PathBurst]] = {}
+        self._bulk: Dict[str, _BulkBurst] = {}
+
+    def pending(self) -> int:
+        return sum(len(p) for p in self._paths.values()) + len(self._bulk)
+
+    def push(self, project: str, path: str, kind: str, ts: datetime, mono: Optional[float] = None) -> None:
+        mono = time.monotonic() if mono is None else mono
+        bulk = self._bulk.get(project)
+        if bulk is not None:
+            bulk.paths[path] = _outcome(bulk.paths.get(path), kind)
+            bulk.events += 1
+            bulk.last_ts, bulk.last_seen = ts, mono
+            return
+        paths = self._paths.setdefault(project, {})
+        burst = paths.get(path)
+        if burst is None:
+            paths[path] = _PathBurst(kind, kind, ts, ts, mono, mono)
+        else:
+            burst.last, burst.last_ts, burst.last_seen = kind, ts, mono
+            burst.events += 1
+        if len(paths) > self.bulk_threshold:
+            self._to_bulk(project, mono)
+
+    def _to_bulk(self, project: str, mono: float) -> None:
+        paths = self._paths.pop(project)
+        bursts = paths.values()
+        bulk = _BulkBurst(
+            first_ts=min(b.first_ts for b in bursts),
+            last_ts=max(b.last_ts for b in bursts),
+            started=min(b.started for b in bursts),
+            last_seen=mono,
+            paths={p: _outcome(_outcome(None, b.first), b.last) for p, b in paths.items()},
+            events=sum(b.events for b in bursts),
+        )
+        self._bulk[project] = bulk
+        LOGGER.debug("Bulk file operation in %s (%s paths so far)", project, len(paths))
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> List[LogRecord]:
+        """Return rows for every settled burst (all of them with ``force``), oldest first."""
+        now = time.monotonic() if now is None else now
+        out: List[LogRecord] = []
+        for project, bulk in list(self._bulk.items()):
+            if force or self._settled(bulk.started, bulk.last_seen, now):
+                del self._bulk[project]
+                out.append(self._bulk_record(project, bulk))
+        for project, paths in list(self._paths.items()):
+            for path, burst in list(paths.items()):
+                if not (force or self._settled(burst.started, burst.last_seen, now)):
+                    continue
+                del paths[path]
+                rec = self._path_record(project, path, burst)
+                if rec is not None:
+                    out.append(rec)
+            if not paths:
+                del self._paths[project]
+        out.sort(key=lambda r: r.timestamp)
+        return out
+
+    def _settled(self, started: float, last_seen: float, now: float) -> bool:
+        return now - last_seen >= self.debounce_seconds or now - started >= self.max_hold_seconds
+
+    @staticmethod
+    def _path_record(project: str, path: str, burst: _PathBurst) -> Optional[LogRecord]:
+        if burst.first == "created" and burst.last == "deleted":
+            return None  # temporary file (editor swap, atomic-save scratch)
+        if burst.last == "deleted":
+            kind = "deleted"
+        elif burst.first == "created":
+            kind = "created"
+        else:
+            kind = "modified"
+        meta = json.dumps({"src_path": path, "events": burst.events}, ensure_ascii=False)
+        return LogRecord(burst.last_ts, None, "[]", 0, project, f"file_{kind}", meta)
+
+    @staticmethod
+    def _bulk_record(project: str, bulk: _BulkBurst) -> LogRecord:
+        outcomes = collections.Counter(bulk.paths.values())
+        meta = {
+            "files": len(bulk.paths),
+            "events": bulk.events,
+            **{k: outcomes.get(k, 0) for k in ("created", "modified", "deleted")},
+            "started": bulk.first_ts.isoformat(),
+        }
+        return LogRecord(bulk.last_ts, None, "[]", 0, project, "file_bulk", json.dumps(meta, ensure_ascii=False))
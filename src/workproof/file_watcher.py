@@ -1,83 +1,253 @@
 from __future__ import annotations
 
-import json
+import collections
 import logging
+import os
+import platform
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Iterable
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
 from watchdog.events import FileSystemEventHandler, FileSystemEvent  # type: ignore
 from watchdog.observers import Observer  # type: ignore
+from watchdog.observers.api import ObservedWatch  # type: ignore
 
-from .database import LogRecord, insert_log
+from .database import insert_log
+from .file_events import FileEventCoalescer
+from .ignore import GITIGNORE, IgnoreMatcher
+from .live import LiveStats
+from .metrics import METRICS
+from .projects import ProjectResolver
+from .writer import LogWriter
 
 LOGGER = logging.getLogger(__name__)
 
 
 class ProjectFileEventHandler(FileSystemEventHandler):
-    def __init__(self, db_path: Path, root: Path, ignored_globs: Iterable[str] | None = None) -> None:
+    """Watchdog callbacks only enqueue; a flush thread coalesces and writes.
+
+    ``on_any_event`` runs on the observer thread and appends the raw event to a
+    deque. Every ``flush_interval_seconds`` the flush thread drains it through a
+    ``FileEventCoalescer`` so a burst of events costs one row per file (or one
+    ``file_bulk`` row per bulk operation). Directory events are handed to
+    ``on_directory`` (the ``FileWatcher`` extends its watches with them).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        root: Path,
+        ignored_globs: Iterable[str] | None = None,
+        writer: Optional[LogWriter] = None,
+        live: Optional[LiveStats] = None,
+        debounce_seconds: float = 2.0,
+        bulk_threshold: int = 200,
+        flush_interval_seconds: float = 0.5,
+        honor_gitignore: bool = True,
+    ) -> None:
         super().__init__()
         self.db_path = db_path
+        self.writer = writer
+        self.live = live
         self.root = root
         self.ignored_globs = tuple(ignored_globs or ())
+        self.ignore = IgnoreMatcher(root, self.ignored_globs, honor_gitignore)
+        self.projects = ProjectResolver(root)
+        self.on_directory: Optional[Callable[[str, str], None]] = None
+        self.flush_interval_seconds = flush_interval_seconds
+        self.coalescer = FileEventCoalescer(debounce_seconds, bulk_threshold)
+        self._raw: Deque[Tuple[float, datetime, str, str]] = collections.deque()
+        self._dirs: Deque[Tuple[str, str]] = collections.deque()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        METRICS.gauge("file_event.pending", self.coalescer.pending)
 
     def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type in ("opened", "closed_no_write"):
+            return
         if event.is_directory:
+            src, dest = str(event.src_path), str(event.dest_path or "")
+            if os.path.basename(src) in self.projects.markers or os.path.basename(dest) in self.projects.markers:
+                self._dirs.append(("marker", dest or src))  # e.g. a `git init`; .git itself is ignored
+            if event.event_type in ("moved", "deleted"):
+                self._dirs.append(("deleted", str(event.src_path)))
+            if event.event_type in ("moved", "created"):
+                dest = str(event.dest_path or event.src_path)
+                if not self.ignore.is_ignored(dest, is_dir=True):
+                    self._dirs.append(("created", dest))
             return
-        if self._is_ignored(event.src_path):
+        if self.ignore.is_ignored(str(event.src_path)):
+            METRICS.incr("file_event.ignored")
             return
-        ev_type = "modified"
-        if event.event_type == "created":
-            ev_type = "created"
-        elif event.event_type == "deleted":
-            ev_type = "deleted"
-        meta = {
-            "src_path": str(event.src_path),
-        }
-        ts = datetime.now(timezone.utc)
-        rec = LogRecord(
-            timestamp=ts,
-            active_app=None,
-            running_apps="[]",
-            idle_seconds=0,
-            project_path=str(self._project_for(event.src_path)),
-            event_type=f"file_{ev_type}",
-            meta=json.dumps(meta, ensure_ascii=False),
-        )
-        insert_log(self.db_path, rec)
+        # deque.append is atomic; everything else happens on the flush thread
+        self._raw.append((time.monotonic(), datetime.now(timezone.utc), event.event_type, str(event.src_path)))
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="workproof-file-events")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write every pending burst."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self.flush(force=True)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                LOGGER.warning("File event flush failed: %s", e)
+
+    def flush(self, force: bool = False) -> int:
+        """Drain raw events into the coalescer and write whatever settled; returns rows written."""
+        t0 = time.perf_counter()
+        raw = 0
+        while self._dirs:
+            kind, path = self._dirs.popleft()
+            if kind == "marker":
+                self.projects.invalidate(os.path.dirname(path))
+            elif self.on_directory is not None:
+                self.on_directory(kind, path)
+        while True:
+            try:
+                mono, ts, kind, path = self._raw.popleft()
+            except IndexError:
+                break
+            raw += 1
+            name = os.path.basename(path)
+            if name == GITIGNORE:
+                self.ignore.load_gitignore(os.path.dirname(path))
+            if name in self.projects.markers and kind in ("created", "deleted", "moved"):
+                self.projects.invalidate(os.path.dirname(path))
+            kind = kind if kind in ("created", "deleted") else "modified"
+            self.coalescer.push(self.projects.project_for(path), path, kind, ts, mono)
+        rows = self.coalescer.flush(force=force)
+        for rec in rows:
+            if self.writer is not None:
+                self.writer.submit(rec)
+            else:
+                insert_log(self.db_path, rec)
+            if self.live is not None:
+                self.live.record(rec)
+        if raw or rows:
+            METRICS.incr("file_event.raw", raw)
+            METRICS.incr("file_event.rows", len(rows))
+            METRICS.observe("file_event.flush", time.perf_counter() - t0)
+        return len(rows)
 
-    def _project_for(self, path: str) -> Path:
-        try:
-            p = Path(path)
-            # project == immediate child dir of root, else root
-            rel = p.relative_to(self.root)
-            if len(rel.parts) > 0:
-                return self.root / rel.parts[0]
-        except Exception:
-            pass
-        return self.root
-    
-    def _is_ignored(self, path: str) -> bool:
-        p = Path(path)
-        parts = set(p.parts)
-        for g in self.ignored_globs:
-            if g in parts:
-                return True
-        return False
+
+def plan_watches(root: str, ignore: IgnoreMatcher) -> List[Tuple[str, bool]]:
+    """Cover ``root`` with ``(directory, recursive)`` watches that leave ignored subtrees out.
+
+    A directory with no ignored descendants gets one recursive watch; one that
+    has some gets a flat watch and its children are planned in turn. Loads
+    ``.gitignore`` files on the way down so their rules prune the walk.
+    """
+    dirty = set()
+    children: Dict[str, List[str]] = {}
+    for cur, dirnames, filenames in os.walk(root):
+        if GITIGNORE in filenames:
+            ignore.load_gitignore(cur)
+        keep = [d for d in dirnames if not ignore.is_ignored(os.path.join(cur, d), is_dir=True)]
+        if len(keep) != len(dirnames):
+            d = cur
+            while d not in dirty:
+                dirty.add(d)
+                if d == root:
+                    break
+                d = os.path.dirname(d)
+        dirnames[:] = keep
+        children[cur] = [os.path.join(cur, d) for d in keep]
+    plan: List[Tuple[str, bool]] = []
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        plan.append((d, d not in dirty))
+        if d in dirty:
+            stack.extend(children.get(d, ()))
+    return plan
 
 
 class FileWatcher:
-    def __init__(self, projects_dir: Path, db_path: Path, ignored_globs: Iterable[str] | None = None) -> None:
+    """Watches ``projects_dir`` for file events.
+
+    On Linux, where every watched directory costs an inotify watch, ignored
+    subtrees (``node_modules``, build output, ``.gitignore``d paths) are never
+    registered; see ``plan_watches``. Elsewhere one recursive watch is filtered
+    in Python. Ignored directories created inside an already recursively
+    watched directory are filtered, not pruned, until the next start.
+    """
+
+    def __init__(
+        self,
+        projects_dir: Path,
+        db_path: Path,
+        ignored_globs: Iterable[str] | None = None,
+        writer: Optional[LogWriter] = None,
+        live: Optional[LiveStats] = None,
+        debounce_seconds: float = 2.0,
+        bulk_threshold: int = 200,
+        honor_gitignore: bool = True,
+        prune: Optional[bool] = None,
+    ) -> None:
         self.projects_dir = projects_dir
         self.db_path = db_path
-        self.handler = ProjectFileEventHandler(db_path, projects_dir, ignored_globs=ignored_globs)
+        self.handler = ProjectFileEventHandler(
+            db_path,
+            projects_dir,
+            ignored_globs=ignored_globs,
+            writer=writer,
+            live=live,
+            debounce_seconds=debounce_seconds,
+            bulk_threshold=bulk_threshold,
+            honor_gitignore=honor_gitignore,
+        )
+        self.handler.on_directory = self._on_directory
+        self.prune = platform.system() == "Linux" if prune is None else prune
         self.observer = Observer()
+        self._watches: Dict[str, ObservedWatch] = {}
+        self._flat: Set[str] = set()
 
     def start(self) -> None:
         self.projects_dir.mkdir(parents=True, exist_ok=True)
-        self.observer.schedule(self.handler, str(self.projects_dir), recursive=True)
+        self.handler.start()
+        if self.prune:
+            self._watch_tree(str(self.projects_dir))
+        else:
+            plan_watches(str(self.projects_dir), self.handler.ignore)  # loads the .gitignore files
+            self._watch(str(self.projects_dir), recursive=True)
         self.observer.start()
-        LOGGER.info("File watcher started at %s", self.projects_dir)
+        LOGGER.info("File watcher started at %s (%s watches)", self.projects_dir, len(self._watches))
+
+    def _watch(self, path: str, recursive: bool) -> None:
+        try:
+            self._watches[path] = self.observer.schedule(self.handler, path, recursive=recursive)
+        except OSError as e:
+            LOGGER.warning("Cannot watch %s: %s", path, e)
+            return
+        if not recursive:
+            self._flat.add(path)
+
+    def _watch_tree(self, root: str) -> None:
+        for path, recursive in plan_watches(root, self.handler.ignore):
+            self._watch(path, recursive)
+
+    def _on_directory(self, kind: str, path: str) -> None:
+        if kind == "deleted":
+            for watched in [w for w in self._watches if w == path or w.startswith(path + os.sep)]:
+                self._flat.discard(watched)
+                try:
+                    self.observer.unschedule(self._watches.pop(watched))
+                except Exception:
+                    pass
+        elif kind == "created" and os.path.dirname(path) in self._flat and path not in self._watches:
+            # a recursive parent watch picks new directories up by itself; a flat one does not
+            self._watch_tree(path)
 
     def stop(self) -> None:
         try:
@@ -85,7 +255,7 @@ class FileWatcher:
             self.observer.join(timeout=2)
         except Exception:
             pass
+        self.handler.stop()
+        self._watches.clear()
+        self._flat.clear()
         LOGGER.info("File watcher stopped")
-
-
-
@@ -16,8 +16,9 @@ LOGGER = logging.getLogger(__name__)
 
 
 class TrayController:
-    def __init__(self, icon_path: Path, on_pause: Callable[[], None], on_resume: Callable[[], None], on_quit: Callable[[], None], on_report: Callable[[], None]) -> None:
+    def __init__(self, icon_path: Path, on_pause: Callable[[], None], on_resume: Callable[[], None], on_quit: Callable[[], None], on_report: Callable[[], None], status: Optional[Callable[[], str]] = None) -> None:
         self.icon_path = icon_path
+        self.status = status  # e.g. ``format_live_status(live.snapshot())``; called on every menu open
         self.on_pause = on_pause
         self.on_resume = on_resume
         self.on_quit = on_quit
@@ -30,7 +31,11 @@ class TrayController:
             LOGGER.warning("pystray/PIL not installed; skipping tray")
             return
         image = Image.open(self.icon_path) if self.icon_path.exists() else Image.new("RGB", (64, 64), color=(50, 100, 200))
+        items = []
+        if self.status is not None:
+            items.append(pystray.MenuItem(lambda item: self.status(), None, enabled=False))
         menu = pystray.Menu(
+            *items,
             pystray.MenuItem("Pause", lambda: self.on_pause()),
             pystray.MenuItem("Resume", lambda: self.on_resume()),
             pystray.MenuItem("Generate Report", lambda: self.on_report()),
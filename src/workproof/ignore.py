@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+GITIGNORE = ".gitignore"
+
+
+def glob_to_regex(pattern: str) -> Optional[Tuple[str, bool]]:
+    """Translate one gitignore-style line into ``(regex, negated)``; ``None`` for blanks and comments.
+
+    The regex matches root-relative posix paths; directories are tested with a
+    trailing ``/`` so a pattern that matches a directory also matches everything
+    below it.
+    """
+    p = pattern.rstrip()
+    if not p or p.startswith("#"):
+        return None
+    negated = p.startswith("!")
+    if negated:
+        p = p[1:]
+    dir_only = p.endswith("/")
+    p = p.rstrip("/")
+    anchored = "/" in p
+    p = p.lstrip("/")
+    if not p:
+        return None
+    out: List[str] = []
+    i, n = 0, len(p)
+    while i < n:
+        if p.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif p.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif p.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif p[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif p[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif p[i] == "[" and "]" in p[i + 2 :]:
+            j = p.index("]", i + 2)
+            body = p[i + 1 : j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = j + 1
+        elif p[i] == "\\" and i + 1 < n:
+            out.append(re.escape(p[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(p[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    suffix = "/.*" if dir_only else "(?:/.*)?"
+    return prefix + "".join(out) + suffix, negated
+
+
+@dataclass
+class _Rules:
+    combined: Optional[Pattern[str]]  # all patterns in one regex when there is no negation
+    ordered: List[Tuple[Pattern[str], bool]]  # otherwise, last match wins
+
+    @classmethod
+    def compile(cls, patterns: Iterable[str]) -> "_Rules":
+        parsed = [r for r in map(glob_to_regex, patterns) if r is not None]
+        if not any(neg for _, neg in parsed):
+            combined = re.compile("|".join(f"(?:{rx})" for rx, _ in parsed)) if parsed else None
+            return cls(combined, [])
+        return cls(None, [(re.compile(rx), neg) for rx, neg in parsed])
+
+    def match(self, rel: str) -> Optional[bool]:
+        """True if ignored, False if re-included by a ``!`` pattern, None if no pattern applies."""
+        if self.combined is not None:
+            return True if self.combined.fullmatch(rel) else None
+        for rx, negated in reversed(self.ordered):
+            if rx.fullmatch(rel):
+                return not negated
+        return None
+
+
+class IgnoreMatcher:
+    """Compiled ignore rules for everything below ``root``.
+
+    ``patterns`` (``Config.ignored_globs``) always apply; with ``honor_gitignore``
+    each directory's ``.gitignore`` applies below it, deeper files taking
+    precedence. Directory verdicts are cached, so files in a hot directory cost
+    one dict lookup plus one regex match on the name.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        patterns: Iterable[str] = (),
+        honor_gitignore: bool = False,
+        cache_size: int = 4096,
+    ) -> None:
+        self.root = str(root).rstrip(os.sep)
+        self.honor_gitignore = honor_gitignore
+        self.cache_size = cache_size
+        self._global = _Rules.compile(patterns)
+        self._gitignores: Dict[str, _Rules] = {}  # root-relative dir ("" = root) -> rules
+        self._dirs: Dict[str, bool] = {}
+
+    def relative(self, path: str) -> Optional[str]:
+        if path.startswith(self.root + os.sep):
+            rel = path[len(self.root) + 1 :]
+        elif path == self.root:
+            rel = ""
+        else:
+            return None
+        return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+    def load_gitignore(self, directory: str) -> bool:
+        """(Re)load ``directory/.gitignore``; returns whether one is in effect."""
+        if not self.honor_gitignore:
+            return False
+        base = self.relative(str(directory).rstrip(os.sep))
+        if base is None:
+            return False
+        try:
+            lines = Path(directory, GITIGNORE).read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            lines = None
+        if lines is None:
+            self._gitignores.pop(base, None)
+        else:
+            self._gitignores[base] = _Rules.compile(lines)
+        self._dirs.clear()
+        return lines is not None
+
+    def is_ignored(self, path: str, is_dir: bool = False) -> bool:
+        rel = self.relative(path)
+        if not rel:
+            return False  # outside the root, or the root itself
+        head = rel.rpartition("/")[0]
+        if head and self._dir_ignored(head):
+            return True
+        return self._match(rel + "/" if is_dir else rel)
+
+    def _dir_ignored(self, rel_dir: str) -> bool:
+        hit = self._dirs.get(rel_dir)
+        if hit is None:
+            if len(self._dirs) >= self.cache_size:
+                self._dirs.clear()
+            hit = self._dirs[rel_dir] = self._match(rel_dir + "/")
+        return hit
+
+    def _match(self, rel: str) -> bool:
+        if self._global.match(rel):
+            return True
+        if self._gitignores:
+            parts = rel.rstrip("/").split("/")
+            for i in range(len(parts) - 1, -1, -1):
+                base = "/".join(parts[:i])
+                rules = self._gitignores.get(base)
+                if rules is not None:
+                    verdict = rules.match(rel[len(base) + 1 :] if base else rel)
+                    if verdict is not None:
+                        return verdict
+        return False
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+from .config import Config
+from .database import FILE_EVENT_TYPES, LogRecord, read_session, rollup_idle_threshold, to_epoch_ms
+from .sessions import SessionRow, Sessionizer, build_sessions_for_day
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LiveSnapshot:
+    """Immutable view of today's activity; replaced wholesale on every update."""
+
+    day: Optional[date]
+    samples: int = 0
+    active_seconds: int = 0
+    idle_seconds: int = 0
+    proofs_count: int = 0
+    app_seconds: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    project_events: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    current_app: Optional[str] = None
+    current_session: Optional[SessionRow] = None
+    sessions_closed: int = 0  # bumps whenever a session ends; readers refresh history on change
+    updated_at: Optional[datetime] = None
+
+
+# per app: active samples, all samples, idle seconds, proofs
+_SEED_FROM_ROLLUPS_SQL = """
+    SELECT a.title, SUM(r.active_samples), SUM(r.active_samples + r.idle_samples),
+           SUM(r.idle_seconds), SUM(r.proof_events)
+    FROM rollup_hourly r
+    LEFT JOIN apps a ON a.id = r.app_id
+    WHERE r.hour BETWEEN :lo AND :hi
+    GROUP BY r.app_id
+"""
+
+_SEED_FROM_LOGS_SQL = """
+    SELECT a.title,
+           SUM(CASE WHEN l.event_type = 'sample' AND l.idle_seconds < :threshold THEN l.samples ELSE 0 END),
+           SUM(CASE WHEN l.event_type = 'sample' THEN l.samples ELSE 0 END),
+           SUM(CASE WHEN l.event_type = 'sample' THEN l.idle_seconds * l.samples ELSE 0 END),
+           SUM(l.event_type = 'proof_capture')
+    FROM logs l
+    LEFT JOIN apps a ON a.id = l.app_id
+    WHERE l.event_type IN ('sample', 'proof_capture') AND l.ts_ms BETWEEN :lo AND :hi
+    GROUP BY l.app_id
+"""
+
+
+class LiveStats:
+    """In-process counters fed by the tracker, file watcher and proof capture.
+
+    ``record`` is called from producer threads; ``snapshot`` returns the
+    latest published ``LiveSnapshot`` without locking or touching SQLite.
+    """
+
+    def __init__(self, cfg: Config) -> None:
+        self.interval = cfg.sampling_interval_seconds
+        self.idle_threshold = cfg.idle_threshold_seconds
+        self._lock = threading.Lock()
+        self._sessionizer = Sessionizer(cfg.idle_threshold_seconds, cfg.session_gap_seconds)
+        self._sessions_closed = 0
+        self._reset(None)
+        self._snapshot = LiveSnapshot(day=None)
+
+    def _reset(self, day: Optional[date]) -> None:
+        self._day = day
+        self._samples = 0
+        self._active = 0
+        self._idle = 0
+        self._proofs = 0
+        self._apps: Dict[str, int] = collections.Counter()
+        self._projects: Dict[str, int] = collections.Counter()
+        self._current_app: Optional[str] = None
+
+    def snapshot(self) -> LiveSnapshot:
+        return self._snapshot
+
+    def record(self, rec: LogRecord) -> None:
+        ts = rec.timestamp if rec.timestamp.tzinfo else rec.timestamp.replace(tzinfo=timezone.utc)
+        ts = ts.astimezone(timezone.utc)
+        with self._lock:
+            if ts.date() != self._day:
+                self._reset(ts.date())  # the open session carries over midnight
+            n = rec.samples
+            if rec.event_type == "sample":
+                self._samples += n
+                self._idle += int(rec.idle_seconds or 0) * n
+                if int(rec.idle_seconds or 0) < self.idle_threshold:
+                    self._active += n
+                self._apps[rec.active_app or "Unknown"] += n
+                self._current_app = rec.active_app
+            elif rec.event_type in FILE_EVENT_TYPES:
+                self._projects[rec.project_path or "Unknown"] += 1
+            elif rec.event_type == "proof_capture":
+                self._proofs += 1
+            self._sessionizer.feed(ts, rec.active_app, rec.idle_seconds, rec.event_type, samples=n)
+            self._sessions_closed += len(self._sessionizer.drain())
+            self._publish(ts)
+
+    def _publish(self, ts: Optional[datetime]) -> None:
+        current = self._sessionizer.current
+        if current is not None:
+            current = replace(current, end_time=self._sessionizer.last_active_ts)
+        self._snapshot = LiveSnapshot(
+            day=self._day,
+            samples=self._samples,
+            active_seconds=self._active * self.interval,
+            idle_seconds=self._idle,
+            proofs_count=self._proofs,
+            app_seconds=MappingProxyType({k: v * self.interval for k, v in self._apps.items()}),
+            project_events=MappingProxyType(dict(self._projects)),
+            current_app=self._current_app,
+            current_session=current,
+            sessions_closed=self._sessions_closed,
+            updated_at=ts,
+        )
+
+    def seed(self, db_path: Path, now: Optional[datetime] = None) -> None:
+        """Load today's totals and the open session from SQLite once, at startup."""
+        now = now or datetime.now(timezone.utc)
+        day = now.astimezone(timezone.utc).date()
+        start = datetime.combine(day, time.min).replace(tzinfo=timezone.utc)
+        end = datetime.combine(day, time.max).replace(tzinfo=timezone.utc)
+        bounds = {"lo": to_epoch_ms(start), "hi": to_epoch_ms(end), "threshold": self.idle_threshold}
+        with read_session(db_path) as conn:
+            if rollup_idle_threshold(conn) == self.idle_threshold:
+                rows = conn.execute(_SEED_FROM_ROLLUPS_SQL, bounds).fetchall()
+            else:
+                # the rollups split active/idle at another threshold; today's raw rows are few
+                LOGGER.info("Rollups use another idle threshold; seeding live counters from raw rows")
+                rows = conn.execute(_SEED_FROM_LOGS_SQL, bounds).fetchall()
+            projects = conn.execute(
+                """
+                SELECT project_path, SUM(file_events) FROM rollup_project_hourly
+                WHERE hour BETWEEN ? AND ? GROUP BY project_path
+                """,
+                (bounds["lo"], bounds["hi"]),
+            ).fetchall()
+        gap = self._sessionizer.session_gap_seconds
+        sessions = build_sessions_for_day(db_path, start, end, self.idle_threshold, gap)
+        with self._lock:
+            self._reset(day)
+            for app, active, samples, idle, proofs in rows:
+                self._active += int(active)
+                self._samples += int(samples)
+                self._idle += int(idle)
+                self._proofs += int(proofs)
+                if samples:
+                    self._apps[app or "Unknown"] += int(samples)
+            for proj, events in projects:
+                self._projects[proj or "Unknown"] += int(events)
+            last = sessions[-1] if sessions else None
+            if last is not None and last.end_time and (now - last.end_time).total_seconds() <= gap:
+                self._sessionizer = Sessionizer(self.idle_threshold, gap, last)
+                self._current_app = last.main_app
+            self._publish(now)
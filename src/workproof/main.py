@@ -5,16 +5,25 @@ import signal
 import sys
 import threading
 import time
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from pathlib import Path
 import os
 
 import schedule  # type: ignore
 
 from .config import default_config
-from .database import initialize, purge_older_than
+from .database import POOL, initialize
 from .file_watcher import FileWatcher
+from .gui import TrayController
+from .live import LiveStats
+from .metrics import persist_metrics
 from .proofs import ProofOptions, capture_proof
+from .report_generator import format_live_status
+from .reports import client_report
+from .retention import run_retention
+from .sessions import sessionizer_hook
 from .tracker import Tracker
+from .writer import LogWriter
 from .backup import backup_all
 from .utils.logging_setup import setup_logging
 
@@ -24,20 +33,33 @@ LOGGER = logging.getLogger(__name__)
 def _setup() -> tuple:
     cfg = default_config()
     setup_logging(cfg.logs_dir)
-    initialize(cfg.db_path)
+    initialize(cfg.db_path, cfg.idle_threshold_seconds)
     return cfg
 
 
 def main() -> int:
     cfg = _setup()
-    tracker = Tracker(cfg, cfg.db_path)
-    watcher = FileWatcher(cfg.projects_dir, cfg.db_path, ignored_globs=cfg.ignored_globs)
+    writer = LogWriter(cfg.db_path, flush_interval_seconds=cfg.flush_interval_seconds, after_flush=sessionizer_hook(cfg))
+    live = LiveStats(cfg)
+    tracker = Tracker(cfg, cfg.db_path, writer=writer, live=live)
+    watcher = FileWatcher(
+        cfg.projects_dir,
+        cfg.db_path,
+        ignored_globs=cfg.ignored_globs,
+        writer=writer,
+        live=live,
+        debounce_seconds=cfg.file_debounce_seconds,
+        bulk_threshold=cfg.file_bulk_threshold,
+        honor_gitignore=cfg.honor_gitignore,
+    )
 
     # Retention schedule (daily)
-    schedule.every().day.at("03:10").do(lambda: purge_older_than(cfg.db_path, cfg.retention_days))
+    schedule.every().day.at("03:10").do(lambda: run_retention(cfg))
+    # Stage timings and counters (see `workproof stats`)
+    schedule.every(cfg.metrics_interval_minutes).minutes.do(lambda: persist_metrics(cfg.db_path))
     # Proof capture schedule
     schedule.every(cfg.proof_interval_minutes).minutes.do(
-        lambda: capture_proof(cfg, ProofOptions(cfg.proof_blur_radius, cfg.proof_watermark))
+        lambda: capture_proof(cfg, ProofOptions(cfg.proof_blur_radius, cfg.proof_watermark), writer=writer, live=live)
     )
     # Optional weekly backup on Sunday 04:00 - requires env WORKPROOF_BACKUP_PW
     schedule.every().sunday.at("04:00").do(
@@ -56,17 +78,36 @@ def main() -> int:
         except Exception:
             pass
 
+    tray = TrayController(
+        Path("assets/icon.png"),
+        on_pause=tracker.pause,
+        on_resume=tracker.resume,
+        on_quit=stop_event.set,
+        on_report=lambda: client_report(cfg, date.today(), date.today()),
+        status=lambda: format_live_status(live.snapshot()),
+    )
+
     try:
+        try:
+            live.seed(cfg.db_path)
+        except Exception as e:
+            LOGGER.warning("Could not seed live counters: %s", e)
+        writer.start()
         watcher.start()
         tracker.start()
+        tray.start()
         LOGGER.info("WorkProof running. Silent=%s", cfg.silent)
         while not stop_event.is_set():
             schedule.run_pending()
             time.sleep(0.5)
     finally:
+        tray.stop()
         tracker.stop()
         watcher.stop()
         tracker.join(timeout=2)
+        writer.stop()
+        persist_metrics(cfg.db_path)
+        POOL.close_all()
     LOGGER.info("Shutdown complete.")
     return 0
 
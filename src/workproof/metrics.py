@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .database import db_session, read_session, to_epoch_ms
+
+LOGGER = logging.getLogger(__name__)
+
+# upper bounds (seconds) of the latency buckets; one more bucket catches anything slower
+BUCKET_BOUNDS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+@dataclass
+class Histogram:
+    """Fixed log-scale latency histogram; histograms merge by adding buckets."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKET_BOUNDS) + 1))
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (``max`` for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1e3,
+            "p95_ms": self.percentile(0.95) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class Metrics:
+    """Process-wide stage timings, counters and gauges for the producers and the writer.
+
+    Timers and counters accumulate until ``drain`` (``persist_metrics`` calls it
+    periodically); gauges are sampled when drained.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._timers: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._timers.get(stage)
+            if hist is None:
+                hist = self._timers[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def incr(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Register a callable read at drain time (e.g. a queue depth)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def drain(self) -> Dict[str, Any]:
+        """Return and reset timers and counters; gauges are read now."""
+        with self._lock:
+            timers, self._timers = self._timers, {}
+            counters, self._counters = self._counters, {}
+            gauges = dict(self._gauges)
+        values = {}
+        for name, fn in gauges.items():
+            try:
+                values[name] = float(fn())
+            except Exception as e:
+                LOGGER.debug("Gauge %s failed: %s", name, e)
+        return {"timers": timers, "counters": counters, "gauges": values}
+
+
+METRICS = Metrics()
+
+
+def persist_metrics(db_path: Path, now: Optional[datetime] = None) -> int:
+    """Drain ``METRICS`` into the ``metrics`` table as one row per name; returns rows written."""
+    snap = METRICS.drain()
+    ts = to_epoch_ms(now or datetime.now(timezone.utc))
+    rows = [
+        (ts, name, "timer", h.count, h.total, h.max, json.dumps(h.buckets)) for name, h in snap["timers"].items()
+    ]
+    rows += [(ts, name, "counter", n, float(n), None, None) for name, n in snap["counters"].items()]
+    rows += [(ts, name, "gauge", 1, v, v, None) for name, v in snap["gauges"].items()]
+    if not rows:
+        return 0
+    try:
+        with db_session(db_path) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO metrics(ts_ms, name, kind, count, total, max, buckets) VALUES(?,?,?,?,?,?,?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        LOGGER.warning("Could not persist metrics: %s", e)
+        return 0
+    return len(rows)
+
+
+def load_stats(db_path: Path, since: datetime) -> Dict[str, Dict[str, Any]]:
+    """Merge persisted metrics since ``since``: timers into one histogram summary,
+    counters summed, gauges as last/max."""
+    with read_session(db_path) as conn:
+        try:
+            cur = conn.execute(
+                "SELECT ts_ms, name, kind, count, total, max, buckets FROM metrics WHERE ts_ms >= ? ORDER BY ts_ms",
+                (to_epoch_ms(since),),
+            )
+            rows = cur.fetchall()
+        except sqlite3.OperationalError:
+            return {}  # DB predates the metrics table
+    timers: Dict[str, Histogram] = {}
+    out: Dict[str, Dict[str, Any]] = {}
+    for _, name, kind, count, total, mx, buckets in rows:
+        if kind == "timer":
+            timers.setdefault(name, Histogram()).merge(Histogram(count, total, mx or 0.0, json.loads(buckets)))
+        elif kind == "counter":
+            entry = out.setdefault(name, {"kind": "counter", "total": 0})
+            entry["total"] += int(count)
+        else:
+            entry = out.setdefault(name, {"kind": "gauge", "max": total})
+            entry["last"] = total
+            entry["max"] = max(entry["max"], total)
+    for name, h in timers.items():
+        out[name] = {"kind": "timer", **h.summary()}
+    return dict(sorted(out.items()))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import collections
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# files or directories whose presence makes a directory a project root
+PROJECT_MARKERS = (
+    ".git", ".hg", ".svn", "pyproject.toml", "setup.py", "package.json", "Cargo.toml",
+    "go.mod", "pom.xml", "build.gradle", "Gemfile", "composer.json", "CMakeLists.txt",
+)
+
+
+class ProjectResolver:
+    """Map paths below ``root`` to the project directory that owns them.
+
+    The project is the nearest ancestor directory holding one of ``markers``
+    (so nested checkouts and monorepo packages are their own projects); paths
+    with no marker up to ``root`` fall back to the top-level directory under it.
+    Directory verdicts are kept in an LRU cache, so events in a hot directory
+    cost one lookup; ``invalidate`` drops a subtree when a marker appears or
+    disappears.
+    """
+
+    def __init__(self, root: Path, markers: Iterable[str] = PROJECT_MARKERS, cache_size: int = 4096) -> None:
+        self.root = str(root).rstrip(os.sep)
+        self.markers = frozenset(markers)
+        self.cache_size = cache_size
+        self._cache: "collections.OrderedDict[str, str]" = collections.OrderedDict()
+
+    def project_for(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        hit = self._cache.get(directory)
+        if hit is not None:
+            self._cache.move_to_end(directory)
+            return hit
+        chain: List[str] = []
+        cur = directory
+        project: Optional[str] = None
+        while cur.startswith(self.root + os.sep):
+            hit = self._cache.get(cur)
+            if hit is not None:
+                project = hit
+                break
+            chain.append(cur)
+            if self._has_marker(cur):
+                project = cur
+                break
+            cur = os.path.dirname(cur)
+        if project is None:
+            project = self._fallback(directory)
+        for d in chain:
+            self._cache[d] = project
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return project
+
+    def invalidate(self, directory: str) -> None:
+        """Forget verdicts for ``directory`` and everything below it."""
+        directory = directory.rstrip(os.sep)
+        stale = [d for d in self._cache if d == directory or d.startswith(directory + os.sep)]
+        for d in stale:
+            del self._cache[d]
+        if stale:
+            LOGGER.debug("Project markers changed in %s; %s cached directories dropped", directory, len(stale))
+
+    def _has_marker(self, directory: str) -> bool:
+        return any(os.path.exists(os.path.join(directory, m)) for m in self.markers)
+
+    def _fallback(self, directory: str) -> str:
+        # no marker: the top-level directory under the root, as before marker detection
+        if not directory.startswith(self.root + os.sep):
+            return self.root
+        top = directory[len(self.root) + 1 :].split(os.sep, 1)[0]
+        return os.path.join(self.root, top)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -11,7 +12,10 @@ from PIL import Image, ImageDraw, ImageFilter  # type: ignore
 
 from .config import Config
 from .database import LogRecord, insert_log
+from .live import LiveStats
+from .metrics import METRICS
 from .utils.platform_adapters import get_active_window_title
+from .writer import LogWriter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -22,7 +26,13 @@ class ProofOptions:
     watermark: bool
 
 
-def capture_proof(cfg: Config, opts: ProofOptions | None = None) -> Path | None:
+def capture_proof(
+    cfg: Config,
+    opts: ProofOptions | None = None,
+    writer: LogWriter | None = None,
+    live: LiveStats | None = None,
+) -> Path | None:
+    t0 = time.perf_counter()
     try:
         ts = datetime.now(timezone.utc)
         day_dir = (cfg.proofs_dir or cfg.reports_dir).joinpath(ts.strftime("%Y-%m-%d"))
@@ -31,7 +41,8 @@ def capture_proof(cfg: Config, opts: ProofOptions | None = None) -> Path | None:
         base = f"{ts.strftime('%H-%M-%S')}__{active_app.replace(' ','_')}"
         img_path = day_dir / f"{base}.png"
         meta_path = day_dir / f"{base}.json"
-        img = pyautogui.screenshot()
+        with METRICS.timer("proof.screenshot"):
+            img = pyautogui.screenshot()
         if opts is None:
             opts = ProofOptions(cfg.proof_blur_radius, cfg.proof_watermark)
         if opts.blur_radius > 0:
@@ -39,7 +50,8 @@ def capture_proof(cfg: Config, opts: ProofOptions | None = None) -> Path | None:
         if opts.watermark:
             d = ImageDraw.Draw(img)
             d.text((10, 10), "WorkProof — Local Only", fill=(255, 255, 255))
-        img.save(str(img_path))
+        with METRICS.timer("proof.save"):
+            img.save(str(img_path))
         meta = {
             "timestamp": ts.isoformat(),
             "active_app": active_app,
@@ -49,14 +61,22 @@ def capture_proof(cfg: Config, opts: ProofOptions | None = None) -> Path | None:
             "path": str(img_path),
         }
         meta_path.write_text(json.dumps(meta), encoding="utf-8")
-        insert_log(cfg.db_path, LogRecord(
+        rec = LogRecord(
             timestamp=ts, active_app=active_app, running_apps="[]", idle_seconds=0,
             project_path=None, event_type="proof_capture", meta=json.dumps({"path": str(img_path)})
-        ))
+        )
+        if writer is not None:
+            writer.submit(rec)
+        else:
+            insert_log(cfg.db_path, rec)
+        if live is not None:
+            live.record(rec)
         LOGGER.info("Proof captured: %s", img_path)
+        METRICS.observe("proof.total", time.perf_counter() - t0)
         return img_path
     except Exception as e:
         LOGGER.warning("Proof capture failed: %s", e)
+        METRICS.incr("proof.failed")
         return None
 
 
@@ -12,6 +12,7 @@ import matplotlib.pyplot as plt  # type: ignore
 from jinja2 import Environment, FileSystemLoader, select_autoescape  # type: ignore
 
 from .config import default_config
+from .live import LiveSnapshot
 from .summarizer import summarize_day
 
 LOGGER = logging.getLogger(__name__)
@@ -120,6 +121,33 @@ def generate_text_summary(day: date, sampling_interval: int, db_path: Path, idle
     return text
 
 
+def format_live_summary(snap: LiveSnapshot) -> str:
+    """Text summary rendered from in-memory ``LiveStats`` counters (no database reads)."""
+    top_apps = sorted(snap.app_seconds.items(), key=lambda x: x[1], reverse=True)[:5]
+    top_apps_text = ", ".join(f"{app} ({_format_seconds(sec)})" for app, sec in top_apps)
+    top_projects = sorted(snap.project_events.items(), key=lambda x: x[1], reverse=True)[:5]
+    top_projects_text = ", ".join(f"{p} ({n})" for p, n in top_projects) if top_projects else "None"
+    return (
+        f"Date: {snap.day.isoformat() if snap.day else '-'}\n"
+        f"Active time: {_format_seconds(snap.active_seconds)}\n"
+        f"Idle time (sum): {_format_seconds(snap.idle_seconds)}\n"
+        f"Top apps: {top_apps_text or 'None'}\n"
+        f"File activity: {top_projects_text}\n"
+        f"Proofs: {snap.proofs_count}\n"
+    )
+
+
+def format_live_status(snap: LiveSnapshot) -> str:
+    """One-line live status for the tray menu."""
+    parts = [f"Active today: {_format_seconds(snap.active_seconds)}"]
+    current = snap.current_session
+    if current is not None and current.end_time is not None:
+        parts.append(f"session {_format_seconds(int((current.end_time - current.start_time).total_seconds()))}")
+    if snap.current_app:
+        parts.append(snap.current_app)
+    return " · ".join(parts)
+
+
 @click.command()
 @click.option("--date", "date_arg", default="today", help="Date in YYYY-MM-DD or 'today'")
 @click.option("--out", "out_html", default=None, help="Output HTML path")
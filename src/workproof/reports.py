@@ -10,7 +10,7 @@ import click
 import pandas as pd  # type: ignore
 from jinja2 import Environment, FileSystemLoader, select_autoescape  # type: ignore
 
-from .analytics import load_samples_df, daily_active_seconds, app_usage_seconds
+from .analytics import load_hourly_df, daily_active_seconds, app_usage_seconds, sessions_between
 from .charts_builder import build_bar_daily_hours, build_line_weekly_trend, build_pie_app_usage
 from .config import default_config
 from .report_generator import try_export_pdf
@@ -27,7 +27,7 @@ def _bounds(d0: date, d1: date):
 
 def client_report(cfg, start_d: date, end_d: date, project: Optional[str] = None) -> Path:
     start, end = _bounds(start_d, end_d)
-    df = load_samples_df(cfg.db_path, start, end)
+    df = load_hourly_df(cfg.db_path, start, end, cfg.idle_threshold_seconds)
     daily = daily_active_seconds(df, cfg.sampling_interval_seconds, cfg.idle_threshold_seconds)
     apps = app_usage_seconds(df, cfg.sampling_interval_seconds).head(10)
     charts = {
@@ -49,8 +49,10 @@ def client_report(cfg, start_d: date, end_d: date, project: Optional[str] = None
     if not ok:
         # Rich fallback: embed charts and some stats directly into PDF
         _render_pdf_fallback(pdf_path, charts, int(daily["active_seconds"].sum()), apps.to_dict(orient="records"), str(start_d), str(end_d), project or "All Projects")
+    sessions = sessions_between(cfg.db_path, start, end, cfg.idle_threshold_seconds, cfg.session_gap_seconds)
     (out_dir / "report.json").write_text(json.dumps({
-        "start": str(start_d), "end": str(end_d), "project": project, "top_apps": apps.to_dict(orient="records")
+        "start": str(start_d), "end": str(end_d), "project": project, "top_apps": apps.to_dict(orient="records"),
+        "sessions_count": len(sessions),
     }, indent=2), encoding="utf-8")
     return html_path
 
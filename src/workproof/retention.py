@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import logging
+import shutil
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from .config import Config
+from .database import archive_closed_months, db_session, drop_partitions_older_than, purge_older_than
+from .sessions import refresh_sessions
+
+LOGGER = logging.getLogger(__name__)
+
+
+def purge_proof_files(proofs_dir: Optional[Path], days: int) -> int:
+    """Remove proof day folders (``<proofs_dir>/YYYY-MM-DD``, see ``capture_proof``) older than ``days``."""
+    if proofs_dir is None or not proofs_dir.exists():
+        return 0
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+    removed = 0
+    for day_dir in proofs_dir.iterdir():
+        if not day_dir.is_dir():
+            continue
+        try:
+            day = date.fromisoformat(day_dir.name)
+        except ValueError:
+            continue
+        if day < cutoff:
+            shutil.rmtree(day_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        LOGGER.info("Removed %s proof folders older than %s days", removed, days)
+    return removed
+
+
+def run_retention(cfg: Config) -> int:
+    """Daily retention job: archive closed months, drop expired partitions, purge what is left and old screenshots."""
+    try:
+        # sessionize first: rows moved into a partition are out of the sessionizer's reach
+        with db_session(cfg.db_path) as conn:
+            refresh_sessions(conn, cfg.idle_threshold_seconds, cfg.session_gap_seconds)
+        if cfg.partition_by_month:
+            archive_closed_months(cfg.db_path)
+        drop_partitions_older_than(cfg.db_path, cfg.retention_days)
+        purged = purge_older_than(cfg.db_path, cfg.retention_days)
+        purge_proof_files(cfg.proofs_dir, cfg.retention_days)
+        return purged
+    except Exception as e:
+        LOGGER.warning("Retention run failed: %s", e)
+        return 0
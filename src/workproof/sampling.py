@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from .database import HOUR_MS, LogRecord, to_epoch_ms
+
+LOGGER = logging.getLogger(__name__)
+
+# wall and monotonic clocks disagreeing by more than this means the machine slept
+SUSPEND_SLACK_SECONDS = 5.0
+
+
+class SampleCoalescer:
+    """Change-driven sampling: collapses runs of identical samples into single rows.
+
+    The first tick of a new state (window, idle/active, meta) is written as it
+    happens so sessions open on time. Further ticks of the same state are held
+    and written as one row stamped with the last tick and carrying the tick
+    count in ``samples``. That happens when the state changes, the run reaches
+    ``heartbeat_seconds``, or the hour rolls over, so hourly rollups stay exact.
+    """
+
+    def __init__(self, idle_threshold: int, heartbeat_seconds: int) -> None:
+        self.idle_threshold = idle_threshold
+        self.heartbeat_seconds = heartbeat_seconds
+        self._key: Optional[Tuple[Optional[str], bool, Optional[str]]] = None
+        self._first: Optional[datetime] = None
+        self._last: Optional[LogRecord] = None
+        self._count = 0
+        self._idle_sum = 0
+
+    def push(self, rec: LogRecord) -> List[LogRecord]:
+        """Feed one ``sample`` tick; returns the rows to write now."""
+        key = (rec.active_app, int(rec.idle_seconds or 0) >= self.idle_threshold, rec.meta)
+        if key != self._key:
+            out = self.flush()
+            self._key = key
+            out.append(rec)
+            return out
+        out = []
+        if self._last is not None and to_epoch_ms(rec.timestamp) // HOUR_MS != to_epoch_ms(self._last.timestamp) // HOUR_MS:
+            out = self.flush()
+        if self._first is None:
+            self._first = rec.timestamp
+        self._last = rec
+        self._count += rec.samples
+        self._idle_sum += int(rec.idle_seconds or 0) * rec.samples
+        if (rec.timestamp - self._first).total_seconds() >= self.heartbeat_seconds:
+            out += self.flush()
+        return out
+
+    def flush(self, end_run: bool = False) -> List[LogRecord]:
+        """The held run as one row (if any). ``end_run`` (pause, stop) also forgets
+        the state, so the next tick is written straight away."""
+        if end_run:
+            self._key = None
+        if self._last is None:
+            return []
+        # the mean reading keeps the run on the same side of the idle threshold
+        row = replace(self._last, idle_seconds=round(self._idle_sum / self._count), samples=self._count)
+        self._first, self._last, self._count, self._idle_sum = None, None, 0, 0
+        return [row]
+
+
+class AdaptiveInterval:
+    """Sampling cadence that backs off while the user is idle.
+
+    Each idle sample doubles the wait up to ``maximum``; an active sample
+    snaps back to ``base``. ``weight`` converts the time a sample stands for
+    into base ticks for ``LogRecord.samples``.
+    """
+
+    def __init__(self, base: float, maximum: float) -> None:
+        self.base = base
+        self.maximum = max(base, maximum)
+        self.current = base
+
+    def next(self, idle: bool) -> float:
+        self.current = min(self.current * 2, self.maximum) if idle else self.base
+        return self.current
+
+    def reset(self) -> None:
+        self.current = self.base
+
+    def weight(self, elapsed: Optional[float]) -> int:
+        """Base ticks covered by ``elapsed`` seconds since the previous sample (1 when unknown)."""
+        if elapsed is None:
+            return 1
+        return max(1, min(round(elapsed / self.base), round(self.maximum / self.base)))
+
+
+@dataclass
+class Tick:
+    elapsed: Optional[float]  # monotonic seconds since the previous tick; None for the first or after a gap
+    gap: bool = False  # suspend/resume (or a wall-clock jump) since the previous tick
+
+
+class SampleClock:
+    """Monotonic deadline scheduler for the sampling loop.
+
+    Deadlines sit on a fixed grid, so time spent taking a sample does not push
+    the cadence back. Missed deadlines are skipped, not replayed. ``tick``
+    measures the true time since the previous sample. It flags a gap when the
+    wall clock ran ahead of the monotonic one, which does not advance during
+    suspend on Linux, or when the monotonic clock jumped past ``max_elapsed``,
+    which is how platforms whose monotonic clock counts suspend show it.
+    """
+
+    def __init__(
+        self,
+        max_elapsed: float,
+        monotonic: Callable[[], float] = time.monotonic,
+        wall: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_elapsed = max_elapsed
+        self._mono = monotonic
+        self._wall = wall
+        self._last: Optional[Tuple[float, float]] = None
+        self._deadline: Optional[float] = None
+
+    def tick(self) -> Tick:
+        m, w = self._mono(), self._wall()
+        tick = Tick(None)
+        if self._last is not None:
+            elapsed = m - self._last[0]
+            if abs((w - self._last[1]) - elapsed) > SUSPEND_SLACK_SECONDS or elapsed > self.max_elapsed:
+                tick = Tick(None, gap=True)
+                self._deadline = None
+            else:
+                tick = Tick(elapsed)
+        self._last = (m, w)
+        return tick
+
+    def delay(self, interval: float) -> float:
+        """Seconds to wait for the deadline ``interval`` after the previous one."""
+        now = self._mono()
+        anchor = self._deadline if self._deadline is not None else (self._last[0] if self._last else now)
+        deadline = anchor + interval
+        if deadline < now:
+            deadline += math.ceil((now - deadline) / interval) * interval
+        self._deadline = deadline
+        return deadline - now
+
+    def rebase(self) -> None:
+        """Anchor the next deadline at the next tick (woken early, e.g. by input)."""
+        self._deadline = None
+
+    def reset(self) -> None:
+        self._last = None
+        self._deadline = None
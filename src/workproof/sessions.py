@@ -1,18 +1,30 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 import sqlite3
 
 from .config import Config
-from .database import db_session
+from .database import from_epoch_ms, read_session, routed_ranges, routed_session, to_epoch_ms
 
 LOGGER = logging.getLogger(__name__)
 
+SESSIONIZE_CHUNK_ROWS = 5000
+
+# rows after the sessionizer watermark; callers feed them in time order
+_PENDING_LOGS_SQL = """
+    SELECT l.id, l.ts_ms, a.title, l.idle_seconds, l.event_type, l.app_id, l.samples
+    FROM logs l
+    LEFT JOIN apps a ON a.id = l.app_id
+    WHERE l.id > ?
+"""
+
+_SESSION_COLUMNS = "id, start_time, end_time, main_app, samples, idle_seconds, files_edited, proofs_count"
+
 
 @dataclass
 class SessionRow:
@@ -26,91 +38,490 @@ class SessionRow:
     proofs_count: int
 
 
-def insert_session_row(db_path: Path, s: SessionRow) -> int:
-    with db_session(db_path) as conn:
-        cur = conn.execute(
-            """
-            INSERT INTO sessions(start_time, end_time, main_app, samples, idle_seconds, files_edited, proofs_count)
-            VALUES(?,?,?,?,?,?,?)
-            """,
-            (
-                s.start_time.isoformat(),
-                s.end_time.isoformat() if s.end_time else None,
-                s.main_app,
-                s.samples,
-                s.idle_seconds,
-                s.files_edited,
-                s.proofs_count,
-            ),
-        )
-        return int(cur.lastrowid)
+@dataclass
+class FocusSpan:
+    """A run of active samples on the same window (see ``FocusSpanner``)."""
 
+    id: Optional[int]
+    app_id: Optional[int]
+    start_ms: int
+    end_ms: int
+    samples: int
+    app: Optional[str] = None
 
-def update_session_row(db_path: Path, s: SessionRow) -> None:
+
+def session_payload(s: SessionRow) -> Dict[str, Any]:
+    """JSON shape used by the dashboard and sessions export."""
+    return {
+        "start": s.start_time.isoformat(),
+        "end": (s.end_time.isoformat() if s.end_time else None),
+        "main_app": s.main_app,
+        "samples": s.samples,
+        "files_edited": s.files_edited,
+        "proofs_count": s.proofs_count,
+    }
+
+
+def insert_session_row(conn: sqlite3.Connection, s: SessionRow) -> int:
+    cur = conn.execute(
+        """
+        INSERT INTO sessions(start_time, end_time, main_app, samples, idle_seconds, files_edited, proofs_count)
+        VALUES(?,?,?,?,?,?,?)
+        """,
+        (
+            s.start_time.isoformat(),
+            s.end_time.isoformat() if s.end_time else None,
+            s.main_app,
+            s.samples,
+            s.idle_seconds,
+            s.files_edited,
+            s.proofs_count,
+        ),
+    )
+    return int(cur.lastrowid)
+
+
+def update_session_row(conn: sqlite3.Connection, s: SessionRow) -> None:
     if s.id is None:
         raise ValueError("Session id required")
-    with db_session(db_path) as conn:
-        conn.execute(
-            """
-            UPDATE sessions
-            SET end_time=?, main_app=?, samples=?, idle_seconds=?, files_edited=?, proofs_count=?
-            WHERE id=?
-            """,
-            (
-                s.end_time.isoformat() if s.end_time else None,
-                s.main_app,
-                s.samples,
-                s.idle_seconds,
-                s.files_edited,
-                s.proofs_count,
-                s.id,
-            ),
-        )
+    conn.execute(
+        """
+        UPDATE sessions
+        SET end_time=?, main_app=?, samples=?, idle_seconds=?, files_edited=?, proofs_count=?
+        WHERE id=?
+        """,
+        (
+            s.end_time.isoformat() if s.end_time else None,
+            s.main_app,
+            s.samples,
+            s.idle_seconds,
+            s.files_edited,
+            s.proofs_count,
+            s.id,
+        ),
+    )
 
 
-def build_sessions_for_day(db_path: Path, day_start: datetime, day_end: datetime, sampling_interval: int, idle_threshold: int, session_gap_seconds: int) -> list[SessionRow]:
-    # Stateless sessionization built from logs; safe and robust
-    with db_session(db_path) as conn:
-        cur = conn.execute(
-            """
-            SELECT timestamp, active_app, idle_seconds, event_type
-            FROM logs
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-            """,
-            (day_start.isoformat(), day_end.isoformat()),
-        )
-        rows = cur.fetchall()
-    sessions: list[SessionRow] = []
-    current: Optional[SessionRow] = None
-    last_active_ts: Optional[datetime] = None
-    for ts_s, app, idle_s, et in rows:
-        ts = datetime.fromisoformat(ts_s)
-        if et == "sample":
-            is_active = int(idle_s or 0) < idle_threshold
-            if is_active:
+def _session_from_row(row: Tuple) -> SessionRow:
+    return SessionRow(
+        id=row[0],
+        start_time=datetime.fromisoformat(row[1]),
+        end_time=datetime.fromisoformat(row[2]) if row[2] else None,
+        main_app=row[3],
+        samples=row[4],
+        idle_seconds=row[5],
+        files_edited=row[6],
+        proofs_count=row[7],
+    )
+
+
+class Sessionizer:
+    """Groups an ordered stream of log events into activity sessions.
+
+    A session starts at the first active sample and closes at the last active
+    sample once an idle sample arrives more than ``session_gap_seconds`` later.
+    Pass ``log_id`` to ``feed`` to collect the file/proof events of each
+    session in ``links``. A sample row standing for several ticks (``samples``)
+    is stamped with its last tick.
+    """
+
+    def __init__(self, idle_threshold: int, session_gap_seconds: int, open_session: Optional[SessionRow] = None) -> None:
+        self.idle_threshold = idle_threshold
+        self.session_gap_seconds = session_gap_seconds
+        self.closed: list[SessionRow] = []
+        self.links: list[tuple[SessionRow, int, datetime, str]] = []
+        self.current: Optional[SessionRow] = None
+        self.last_active_ts: Optional[datetime] = None
+        if open_session is not None:
+            # a persisted open session stores its last active sample as end_time
+            self.current = replace(open_session, end_time=None)
+            self.last_active_ts = open_session.end_time or open_session.start_time
+
+    def feed(
+        self,
+        ts: datetime,
+        app: Optional[str],
+        idle_seconds: Optional[int],
+        event_type: str,
+        log_id: Optional[int] = None,
+        samples: int = 1,
+    ) -> None:
+        current = self.current
+        if event_type == "sample":
+            if int(idle_seconds or 0) < self.idle_threshold:
                 if current is None:
-                    current = SessionRow(
-                        id=None, start_time=ts, end_time=None, main_app=app or current.main_app if current else app,
+                    current = self.current = SessionRow(
+                        id=None, start_time=ts, end_time=None, main_app=app,
                         samples=0, idle_seconds=0, files_edited=0, proofs_count=0
                     )
-                current.samples += 1
+                current.samples += samples
                 current.main_app = app or current.main_app
-                last_active_ts = ts
-            else:
-                if current and last_active_ts and (ts - last_active_ts).total_seconds() > session_gap_seconds:
-                    current.end_time = last_active_ts
-                    sessions.append(current)
-                    current = None
-        elif et.startswith("file_"):
+                self.last_active_ts = ts
+            elif current and self.last_active_ts and (ts - self.last_active_ts).total_seconds() > self.session_gap_seconds:
+                current.end_time = self.last_active_ts
+                self.closed.append(current)
+                self.current = None
+        elif event_type.startswith("file_"):
             if current:
                 current.files_edited += 1
-        elif et == "proof_capture":
+                if log_id is not None:
+                    self.links.append((current, log_id, ts, event_type))
+        elif event_type == "proof_capture":
             if current:
                 current.proofs_count += 1
-    if current:
-        current.end_time = last_active_ts or current.start_time
-        sessions.append(current)
-    return sessions
+                if log_id is not None:
+                    self.links.append((current, log_id, ts, event_type))
+
+    def drain(self) -> list[SessionRow]:
+        """Return and forget the sessions closed so far (keeps streaming memory bounded)."""
+        closed, self.closed = self.closed, []
+        return closed
+
+    def finish(self) -> list[SessionRow]:
+        """Close the open session (if any) and return every session seen."""
+        if self.current:
+            self.current.end_time = self.last_active_ts or self.current.start_time
+            self.closed.append(self.current)
+            self.current = None
+        return self.closed
+
+
+class FocusSpanner:
+    """Turns consecutive active samples on one app into ``focus_spans``.
+
+    An idle sample, another app, or a pause longer than ``session_gap_seconds``
+    ends the span.
+    """
+
+    def __init__(self, idle_threshold: int, session_gap_seconds: int, open_span: Optional[FocusSpan] = None) -> None:
+        self.idle_threshold = idle_threshold
+        self.gap_ms = session_gap_seconds * 1000
+        self.current = open_span
+        self.closed: list[FocusSpan] = []
+
+    def feed(self, ts_ms: int, app_id: Optional[int], idle_seconds: Optional[int], event_type: str, samples: int = 1) -> None:
+        if event_type != "sample":
+            return
+        active = app_id is not None and int(idle_seconds or 0) < self.idle_threshold
+        span = self.current
+        if span is not None and active and span.app_id == app_id and ts_ms - span.end_ms <= self.gap_ms:
+            span.end_ms = max(span.end_ms, ts_ms)
+            span.samples += samples
+            return
+        if span is not None:
+            self.closed.append(span)
+        self.current = FocusSpan(None, app_id, ts_ms, ts_ms, samples) if active else None
+
+
+def _save_span(conn: sqlite3.Connection, span: FocusSpan) -> None:
+    if span.id is None:
+        cur = conn.execute(
+            "INSERT INTO focus_spans(app_id, start_ms, end_ms, samples) VALUES(?,?,?,?)",
+            (span.app_id, span.start_ms, span.end_ms, span.samples),
+        )
+        span.id = int(cur.lastrowid)
+    else:
+        conn.execute("UPDATE focus_spans SET end_ms=?, samples=? WHERE id=?", (span.end_ms, span.samples, span.id))
+
+
+def _load_open_span(conn: sqlite3.Connection) -> Optional[FocusSpan]:
+    row = conn.execute(
+        """
+        SELECT f.id, f.app_id, f.start_ms, f.end_ms, f.samples FROM meta m
+        JOIN focus_spans f ON f.id = CAST(m.value AS INTEGER)
+        WHERE m.key='focus_open_id'
+        """
+    ).fetchone()
+    return FocusSpan(*row) if row else None
+
+
+def _load_state(conn: sqlite3.Connection) -> Tuple[int, Optional[SessionRow], int]:
+    """Watermark log id, the open session and the frontier: rows stamped before it
+    cannot be appended to the sessions built so far."""
+    meta = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('sessions_watermark', 'sessions_open_id', 'sessions_frontier_ms')"
+    ).fetchall())
+    open_session = None
+    if meta.get("sessions_open_id"):
+        row = conn.execute(
+            f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE id=?", (int(meta["sessions_open_id"]),)
+        ).fetchone()
+        open_session = _session_from_row(row) if row else None  # may have been purged
+    if open_session is not None:
+        frontier = to_epoch_ms(open_session.start_time)
+    else:
+        frontier = int(meta.get("sessions_frontier_ms") or 0)
+    return int(meta.get("sessions_watermark", 0)), open_session, frontier
+
+
+def _save(conn: sqlite3.Connection, s: SessionRow) -> None:
+    if s.id is None:
+        s.id = insert_session_row(conn, s)
+    else:
+        update_session_row(conn, s)
+
+
+def _resessionize(
+    conn: sqlite3.Connection,
+    since_ms: int,
+    last_id: int,
+    idle_threshold: int,
+    session_gap_seconds: int,
+) -> Tuple[Sessionizer, FocusSpanner]:
+    """Rebuild sessions and focus spans from raw logs for rows that arrived late.
+
+    A row stamped before the frontier (wall clock stepped back, an import of
+    older history) cannot extend the open session. Every session and span that
+    ends within ``session_gap_seconds`` of ``since_ms`` or later is dropped and
+    replayed from the raw rows up to ``last_id``. Only the main DB's rows are
+    replayed, so nothing older than its oldest row is touched.
+    """
+    gap_ms = session_gap_seconds * 1000
+    floor = conn.execute("SELECT MIN(ts_ms) FROM logs").fetchone()[0] or since_ms
+    cut = since_ms - gap_ms
+    stale = [
+        (sid, to_epoch_ms(datetime.fromisoformat(start)))
+        for sid, start in conn.execute(
+            """
+            SELECT s.id, s.start_time FROM sessions_rtree r JOIN sessions s ON s.id = r.id
+            WHERE r.end_ms >= ?
+            """,
+            (cut,),
+        )
+    ]
+    stale = [(sid, start) for sid, start in stale if start >= floor]
+    spans = conn.execute(
+        """
+        SELECT f.id, f.start_ms FROM focus_rtree r JOIN focus_spans f ON f.id = r.id
+        WHERE r.end_ms >= ? AND f.end_ms >= ? AND f.start_ms >= ?
+        """,
+        (cut, cut, floor),
+    ).fetchall()
+    sessions_from = min([since_ms, *(start for _, start in stale)])
+    spans_from = min([since_ms, *(start for _, start in spans)])
+    conn.executemany("DELETE FROM sessions WHERE id=?", [(sid,) for sid, _ in stale])
+    conn.executemany("DELETE FROM focus_spans WHERE id=?", [(fid,) for fid, _ in spans])
+    LOGGER.info(
+        "Late log rows from %s; rebuilding %s sessions and %s focus spans",
+        from_epoch_ms(since_ms).isoformat(), len(stale), len(spans),
+    )
+    sessionizer = Sessionizer(idle_threshold, session_gap_seconds)
+    spanner = FocusSpanner(idle_threshold, session_gap_seconds)
+    cur = conn.execute(
+        """
+        SELECT l.id, l.ts_ms, a.title, l.idle_seconds, l.event_type, l.app_id, l.samples
+        FROM logs l
+        LEFT JOIN apps a ON a.id = l.app_id
+        WHERE l.ts_ms >= ? AND l.id <= ?
+        ORDER BY l.ts_ms, l.id
+        """,
+        (min(sessions_from, spans_from), last_id),
+    )
+    for log_id, ts_ms, app, idle_s, et, app_id, n in cur:
+        if ts_ms >= sessions_from:
+            sessionizer.feed(from_epoch_ms(ts_ms), app, idle_s, et, log_id, n)
+        if ts_ms >= spans_from:
+            spanner.feed(ts_ms, app_id, idle_s, et, n)
+    return sessionizer, spanner
+
+
+def refresh_sessions(
+    conn: sqlite3.Connection,
+    idle_threshold: int,
+    session_gap_seconds: int,
+    chunk_rows: int = SESSIONIZE_CHUNK_ROWS,
+) -> int:
+    """Sessionize log rows written since the last run into ``sessions`` / ``session_events``
+    and ``focus_spans``.
+
+    Only rows past the ``sessions_watermark`` log id are read; the open session
+    is extended or closed and persisted with its last active sample as
+    ``end_time``. A chunk holding rows older than the open session (or the last
+    closed one) rebuilds the affected range from raw logs instead (see
+    ``_resessionize``). Returns the number of log rows processed.
+    """
+    done = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            watermark, open_session, frontier = _load_state(conn)
+            rows = conn.execute(_PENDING_LOGS_SQL + " ORDER BY l.id LIMIT ?", (watermark, chunk_rows)).fetchall()
+            if not rows:
+                conn.execute("COMMIT")
+                break
+            last_id = rows[-1][0]
+            # producers flush independently, so a chunk in id order is not quite in time order
+            rows.sort(key=lambda r: (r[1], r[0]))
+            if rows[0][1] < frontier:
+                sessionizer, spanner = _resessionize(conn, rows[0][1], last_id, idle_threshold, session_gap_seconds)
+            else:
+                sessionizer = Sessionizer(idle_threshold, session_gap_seconds, open_session)
+                spanner = FocusSpanner(idle_threshold, session_gap_seconds, _load_open_span(conn))
+                for log_id, ts_ms, app, idle_s, et, app_id, n in rows:
+                    sessionizer.feed(from_epoch_ms(ts_ms), app, idle_s, et, log_id, n)
+                    spanner.feed(ts_ms, app_id, idle_s, et, n)
+            for span in spanner.closed:
+                _save_span(conn, span)
+            if spanner.current is not None:
+                _save_span(conn, spanner.current)
+            for s in sessionizer.closed:
+                _save(conn, s)
+                frontier = max(frontier, to_epoch_ms(s.end_time or s.start_time))
+            current = sessionizer.current
+            if current is not None:
+                current.end_time = sessionizer.last_active_ts
+                _save(conn, current)
+            conn.executemany(
+                "INSERT INTO session_events(session_id, timestamp, event_type, ref_log_id) VALUES(?,?,?,?)",
+                [(s.id, ts.isoformat(), et, log_id) for s, log_id, ts, et in sessionizer.links],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta(key,value) VALUES(?,?)",
+                [
+                    ("sessions_watermark", str(last_id)),
+                    ("sessions_open_id", str(current.id) if current is not None else ""),
+                    ("focus_open_id", str(spanner.current.id) if spanner.current is not None else ""),
+                    ("sessions_frontier_ms", str(frontier)),
+                ],
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        done += len(rows)
+        if len(rows) < chunk_rows:
+            break
+    return done
+
+
+def sessionizer_hook(cfg: Config) -> Callable[[sqlite3.Connection], int]:
+    """``LogWriter(after_flush=...)`` callback keeping ``sessions`` current with the configured thresholds."""
+    return lambda conn: refresh_sessions(conn, cfg.idle_threshold_seconds, cfg.session_gap_seconds)
+
+
+_OVERLAP_SESSIONS_SQL = f"""
+    SELECT {", ".join("s." + c.strip() for c in _SESSION_COLUMNS.split(","))}
+    FROM sessions_rtree r
+    JOIN sessions s ON s.id = r.id
+    WHERE r.start_ms <= :hi_ms AND r.end_ms >= :lo_ms
+      AND s.start_time <= :hi AND COALESCE(s.end_time, s.start_time) >= :lo
+    ORDER BY s.start_time ASC
+"""
+
+_OVERLAP_FOCUS_SQL = """
+    SELECT f.id, f.app_id, f.start_ms, f.end_ms, f.samples, a.title
+    FROM focus_rtree r
+    JOIN focus_spans f ON f.id = r.id
+    LEFT JOIN apps a ON a.id = f.app_id
+    WHERE r.start_ms <= :hi_ms AND r.end_ms >= :lo_ms
+      AND f.start_ms <= :hi_ms AND f.end_ms >= :lo_ms
+    ORDER BY f.start_ms ASC
+"""
+
+
+def _bounds(start: datetime, end: datetime) -> Dict[str, Any]:
+    # R*Tree coordinates are approximate; the base-table columns filter exactly
+    return {
+        "lo": start.astimezone(timezone.utc).isoformat(),
+        "hi": end.astimezone(timezone.utc).isoformat(),
+        "lo_ms": to_epoch_ms(start),
+        "hi_ms": to_epoch_ms(end),
+    }
+
+
+def sessions_overlapping(db_path: Path, start: datetime, end: datetime) -> list[SessionRow]:
+    """Persisted sessions overlapping ``[start, end]`` via the ``sessions_rtree`` interval index."""
+    with read_session(db_path) as conn:
+        return [_session_from_row(r) for r in conn.execute(_OVERLAP_SESSIONS_SQL, _bounds(start, end))]
+
+
+def session_at(db_path: Path, t: datetime) -> Optional[SessionRow]:
+    """The persisted session covering instant ``t``, if any."""
+    found = sessions_overlapping(db_path, t, t)
+    return found[0] if found else None
+
+
+def focus_overlapping(db_path: Path, start: datetime, end: datetime) -> list[FocusSpan]:
+    """App-focus spans overlapping ``[start, end]`` via the ``focus_rtree`` interval index."""
+    with read_session(db_path) as conn:
+        return [FocusSpan(*r) for r in conn.execute(_OVERLAP_FOCUS_SQL, _bounds(start, end))]
+
+
+def focus_at(db_path: Path, t: datetime) -> Optional[FocusSpan]:
+    """Which app had focus at instant ``t`` (between two samples of the same span counts)."""
+    found = focus_overlapping(db_path, t, t)
+    return found[0] if found else None
+
+
+def build_sessions_for_day(db_path: Path, day_start: datetime, day_end: datetime, idle_threshold: int, session_gap_seconds: int) -> list[SessionRow]:
+    """Sessions overlapping ``[day_start, day_end]``.
+
+    Persisted sessions come from the ``sessions_rtree`` interval index; the day's rows
+    the writer has not sessionized yet are replayed on top of the open session (rows
+    older than it, which the writer will rebuild from, get sessions of their own).
+    """
+    with read_session(db_path) as conn:
+        conn.execute("BEGIN")  # one snapshot for the watermark, the sessions and the pending rows
+        try:
+            watermark, open_session, frontier = _load_state(conn)
+            open_id = open_session.id if open_session else None
+            stored = [
+                _session_from_row(r)
+                for r in conn.execute(_OVERLAP_SESSIONS_SQL, _bounds(day_start, day_end))
+                if r[0] != open_id
+            ]
+            sessionizer = Sessionizer(idle_threshold, session_gap_seconds, open_session)
+            late = Sessionizer(idle_threshold, session_gap_seconds)
+            # only the day's rows the writer has not sessionized yet, so this stays small
+            pending = conn.execute(
+                _PENDING_LOGS_SQL + " AND l.ts_ms BETWEEN ? AND ? ORDER BY l.id",
+                (watermark, to_epoch_ms(day_start), to_epoch_ms(day_end)),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+    pending.sort(key=lambda r: (r[1], r[0]))
+    for _, ts_ms, app, idle_s, et, _, n in pending:
+        (late if ts_ms < frontier else sessionizer).feed(from_epoch_ms(ts_ms), app, idle_s, et, samples=n)
+    live = [
+        s
+        for s in late.finish() + sessionizer.finish()
+        if s.start_time <= day_end and (s.end_time or s.start_time) >= day_start
+    ]
+    return sorted(stored + live, key=lambda s: s.start_time)
+
 
+def iter_sessions(
+    db_path: Path,
+    start: datetime,
+    end: datetime,
+    idle_threshold: int,
+    session_gap_seconds: int,
+    chunk_size: int = 1000,
+) -> Iterator[SessionRow]:
+    """Stream sessions from raw logs in ``[start, end]`` in constant memory.
 
+    Rows are read with ``fetchmany`` across monthly partitions and the open
+    session carries over day and partition boundaries, so sessions spanning
+    midnight come out whole. A session still open at ``end`` is closed there.
+    """
+    sessionizer = Sessionizer(idle_threshold, session_gap_seconds)
+    for lo, hi in routed_ranges(db_path, start, end):
+        with routed_session(db_path, lo, hi) as conn:
+            cur = conn.execute(
+                """
+                SELECT l.ts_ms, a.title, l.idle_seconds, l.event_type, l.samples
+                FROM logs l
+                LEFT JOIN apps a ON a.id = l.app_id
+                WHERE l.ts_ms BETWEEN ? AND ?
+                ORDER BY l.ts_ms ASC
+                """,
+                (to_epoch_ms(lo), to_epoch_ms(hi)),
+            )
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for ts_ms, app, idle_s, et, n in rows:
+                    sessionizer.feed(from_epoch_ms(ts_ms), app, idle_s, et, samples=n)
+                yield from sessionizer.drain()
+    yield from sessionizer.finish()
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from datetime import date, datetime, time, timezone, timedelta
 from typing import Dict, Iterable, List, Tuple
 
-from .database import fetch_logs_between
+from .database import read_session, to_epoch_ms
 
 
 @dataclass
@@ -21,21 +21,35 @@ class DailySummary:
 def summarize_day(db_path, day: date, sampling_interval_seconds: int) -> DailySummary:
     start = datetime.combine(day, time.min).replace(tzinfo=timezone.utc)
     end = datetime.combine(day, time.max).replace(tzinfo=timezone.utc)
-    logs = list(fetch_logs_between(db_path, start, end))
     total_samples = 0
     total_idle = 0
     app_counts: Dict[str, int] = collections.Counter()
     proj_events: Dict[str, int] = collections.Counter()
-    for row in logs:
-        et = row["event_type"]
-        if et == "sample":
-            total_samples += 1
-            total_idle += int(row.get("idle_seconds") or 0)
-            app = row.get("active_app") or "Unknown"
-            app_counts[app] += 1
-        elif et.startswith("file_"):
-            proj = row.get("project_path") or "Unknown"
-            proj_events[proj] += 1
+    bounds = (to_epoch_ms(start), to_epoch_ms(end))
+    # a day is 24 rollup rows per app instead of every sample
+    with read_session(db_path) as conn:
+        for app, samples, idle in conn.execute(
+            """
+            SELECT a.title, SUM(r.active_samples + r.idle_samples), SUM(r.idle_seconds)
+            FROM rollup_hourly r
+            LEFT JOIN apps a ON a.id = r.app_id
+            WHERE r.hour BETWEEN ? AND ?
+            GROUP BY r.app_id
+            """,
+            bounds,
+        ):
+            total_samples += int(samples)
+            total_idle += int(idle)
+            if samples:
+                app_counts[app or "Unknown"] += int(samples)
+        for proj, events in conn.execute(
+            """
+            SELECT project_path, SUM(file_events) FROM rollup_project_hourly
+            WHERE hour BETWEEN ? AND ? GROUP BY project_path
+            """,
+            bounds,
+        ):
+            proj_events[proj or "Unknown"] += int(events)
     app_time = {k: v * sampling_interval_seconds for k, v in app_counts.items()}
     top_apps = sorted(app_time.items(), key=lambda x: x[1], reverse=True)[:10]
     return DailySummary(
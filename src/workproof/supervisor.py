@@ -8,10 +8,14 @@ from typing import Optional
 import schedule  # type: ignore
 
 from .config import Config
-from .database import purge_older_than
 from .file_watcher import FileWatcher
+from .live import LiveStats
+from .metrics import persist_metrics
 from .proofs import ProofOptions, capture_proof
+from .retention import run_retention
+from .sessions import sessionizer_hook
 from .tracker import Tracker
+from .writer import LogWriter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -19,8 +23,19 @@ LOGGER = logging.getLogger(__name__)
 class Supervisor:
     def __init__(self, cfg: Config) -> None:
         self.cfg = cfg
-        self.tracker = Tracker(cfg, cfg.db_path)
-        self.watcher = FileWatcher(cfg.projects_dir, cfg.db_path, ignored_globs=cfg.ignored_globs)
+        self.writer = LogWriter(cfg.db_path, flush_interval_seconds=cfg.flush_interval_seconds, after_flush=sessionizer_hook(cfg))
+        self.live = LiveStats(cfg)
+        self.tracker = Tracker(cfg, cfg.db_path, writer=self.writer, live=self.live)
+        self.watcher = FileWatcher(
+            cfg.projects_dir,
+            cfg.db_path,
+            ignored_globs=cfg.ignored_globs,
+            writer=self.writer,
+            live=self.live,
+            debounce_seconds=cfg.file_debounce_seconds,
+            bulk_threshold=cfg.file_bulk_threshold,
+            honor_gitignore=cfg.honor_gitignore,
+        )
         self.stop_event = threading.Event()
         self._sched_thread: Optional[threading.Thread] = None
         self._paused = False
@@ -29,14 +44,20 @@ class Supervisor:
     def start(self) -> None:
         if self.is_running():
             return
+        try:
+            self.live.seed(self.cfg.db_path)
+        except Exception as e:
+            LOGGER.warning("Could not seed live counters: %s", e)
+        self.writer.start()
         self.watcher.start()
         self.tracker.start()
         self._running = True
         # schedule jobs
         schedule.clear()
-        schedule.every().day.at("03:10").do(lambda: purge_older_than(self.cfg.db_path, self.cfg.retention_days))
+        schedule.every().day.at("03:10").do(lambda: run_retention(self.cfg))
+        schedule.every(self.cfg.metrics_interval_minutes).minutes.do(lambda: persist_metrics(self.cfg.db_path))
         schedule.every(self.cfg.proof_interval_minutes).minutes.do(
-            lambda: capture_proof(self.cfg, ProofOptions(self.cfg.proof_blur_radius, self.cfg.proof_watermark))
+            lambda: capture_proof(self.cfg, ProofOptions(self.cfg.proof_blur_radius, self.cfg.proof_watermark), writer=self.writer, live=self.live)
         )
         self._sched_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self._sched_thread.start()
@@ -62,6 +83,9 @@ class Supervisor:
         if self._sched_thread and self._sched_thread.is_alive():
             # give scheduler loop a moment to exit
             time.sleep(0.6)
+        # producers are stopped; drain whatever is still buffered
+        self.writer.stop()
+        persist_metrics(self.cfg.db_path)
         self._running = False
 
     def is_running(self) -> bool:
@@ -4,27 +4,32 @@ import json
 import logging
 import threading
 import time
-from datetime import datetime, timezone
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
 from pynput import keyboard, mouse  # type: ignore
 
+from .activity import InputCounters
 from .config import Config
 from .database import LogRecord, insert_log
-from .utils.platform_adapters import get_active_window_title, processes_json
+from .live import LiveStats
+from .metrics import METRICS
+from .sampling import AdaptiveInterval, SampleClock, SampleCoalescer
+from .utils.platform_adapters import ProcessSnapshotter, backend_stats, get_active_window_title
+from .writer import LogWriter
 
 LOGGER = logging.getLogger(__name__)
 
 
 class IdleDetector:
     def __init__(self) -> None:
-        self._last_input_time = time.time()
-        self._kb_listener = keyboard.Listener(on_press=self._on_input, on_release=self._on_input)
-        self._mouse_listener = mouse.Listener(on_move=self._on_input, on_click=self._on_input, on_scroll=self._on_input)
-
-    def _on_input(self, *args, **kwargs) -> None:
-        self._last_input_time = time.time()
+        self.counters = InputCounters()
+        self.input_event = self.counters.wake
+        c = self.counters
+        self._kb_listener = keyboard.Listener(on_press=c.on_press, on_release=c.on_release)
+        self._mouse_listener = mouse.Listener(on_move=c.on_move, on_click=c.on_click, on_scroll=c.on_scroll)
 
     def start(self) -> None:
         self._kb_listener.start()
@@ -41,58 +46,165 @@ class IdleDetector:
             pass
 
     def idle_seconds(self) -> int:
-        return int(time.time() - self._last_input_time)
+        return int(time.time() - self.counters.last_input)
 
 
 class Tracker(threading.Thread):
-    def __init__(self, cfg: Config, db_path: Path) -> None:
+    def __init__(self, cfg: Config, db_path: Path, writer: Optional[LogWriter] = None, live: Optional[LiveStats] = None) -> None:
         super().__init__(daemon=True)
         self.cfg = cfg
         self.db_path = db_path
+        self.writer = writer
+        self.live = live
         self._stop_event = threading.Event()
         self._paused = threading.Event()
         self._paused.clear()
         self._idle = IdleDetector()
+        self._procs = ProcessSnapshotter()
+        self._coalescer: Optional[SampleCoalescer] = None
+        if cfg.sampling_mode == "changes":
+            # a held run must never hide a gap long enough to end a session
+            heartbeat = min(cfg.sample_heartbeat_seconds, cfg.session_gap_seconds)
+            self._coalescer = SampleCoalescer(cfg.idle_threshold_seconds, heartbeat)
+        self._next_keyframe = 0.0
+        self._cadence = AdaptiveInterval(
+            cfg.sampling_interval_seconds, min(cfg.idle_max_interval_seconds, cfg.session_gap_seconds)
+        )
+        self._prev_idle: Optional[LogRecord] = None
+        self._input_minute: Optional[int] = None
+        self._input_since = time.monotonic()
 
     def pause(self) -> None:
         self._paused.set()
+        self._idle.input_event.set()
 
     def resume(self) -> None:
         self._paused.clear()
 
     def stop(self) -> None:
         self._stop_event.set()
+        self._idle.input_event.set()
 
     def run(self) -> None:
         self._idle.start()
         LOGGER.info("Tracker started with interval %ss", self.cfg.sampling_interval_seconds)
+        clock = SampleClock(max_elapsed=2 * self._cadence.maximum)
         try:
             while not self._stop_event.is_set():
                 if self._paused.is_set():
+                    self._break_run()
+                    clock.reset()
                     time.sleep(0.5)
                     continue
-                self.sample_once()
-                time.sleep(self.cfg.sampling_interval_seconds)
+                self._idle.input_event.clear()
+                tick = clock.tick()
+                if tick.gap:
+                    LOGGER.info("Sampling clock gap (suspend/resume?); not counting it")
+                    METRICS.incr("tracker.clock_gaps")
+                    self._break_run()
+                idle = self.sample_once(tick.elapsed)
+                delay = clock.delay(self._cadence.next(idle))
+                if idle:
+                    # backed off: the next input snaps back to full rate
+                    if self._idle.input_event.wait(delay):
+                        clock.rebase()
+                else:
+                    self._stop_event.wait(delay)
         finally:
+            if self._coalescer is not None:
+                self._write(self._coalescer.flush(end_run=True))
             self._idle.stop()
+            for name, st in backend_stats().items():
+                LOGGER.info("Window backend %s: %d calls, %d errors, mean %.1fus, max %.1fms", name, st.calls, st.errors, st.mean_us, st.max_seconds * 1e3)
             LOGGER.info("Tracker stopped")
 
-    def sample_once(self) -> None:
+    def _break_run(self) -> None:
+        """Forget the previous sample (pause, suspend): the time since then is not tracked."""
+        self._write(self._coalescer.flush(end_run=True) if self._coalescer else [])
+        self._prev_idle = None
+        self._cadence.reset()
+
+    def sample_once(self, elapsed: Optional[float] = None) -> bool:
+        """Take one sample ``elapsed`` (measured) seconds after the previous one; returns whether the user is idle.
+
+        The row stands for the measured time in base ticks (``LogRecord.samples``), so
+        an overrunning sample or a backed-off idle wait is weighted by the time it covers.
+        """
+        t0 = time.perf_counter()
         ts = datetime.now(timezone.utc)
-        active = get_active_window_title()
-        running = processes_json(limit=50)
+        with METRICS.timer("tracker.window"):
+            active = get_active_window_title()
         idle_s = self._idle.idle_seconds()
+        idle = idle_s >= self.cfg.idle_threshold_seconds
+        ticks = self._cadence.weight(elapsed)
         meta = {"idle_threshold": self.cfg.idle_threshold_seconds}
         rec = LogRecord(
             timestamp=ts,
             active_app=active,
-            running_apps=running,
+            running_apps="[]",  # see process_records / database.process_set_at
             idle_seconds=idle_s,
             project_path=None,
             event_type="sample",
             meta=json.dumps(meta, ensure_ascii=False),
+            samples=ticks,
         )
-        insert_log(self.db_path, rec)
-
-
-
+        ticks_rec = [rec]
+        if not idle and ticks > 1 and self._prev_idle is not None and elapsed is not None:
+            # woken by input: the wait before it was still idle time
+            interval = self.cfg.sampling_interval_seconds
+            filler = replace(
+                self._prev_idle,
+                timestamp=ts - timedelta(seconds=interval),
+                idle_seconds=self._prev_idle.idle_seconds + int(elapsed - interval),
+                samples=ticks - 1,
+            )
+            ticks_rec = [filler, replace(rec, samples=1)]
+        self._prev_idle = rec if idle else None
+        with METRICS.timer("tracker.coalesce"):
+            rows = [r for t in ticks_rec for r in self._coalescer.push(t)] if self._coalescer is not None else ticks_rec
+        # process polling waits until the user is back; the delta then covers the whole break
+        if not idle:
+            with METRICS.timer("tracker.processes"):
+                rows += self.process_records(ts)
+        rows += self.input_records(ts)
+        with METRICS.timer("tracker.submit"):
+            self._write(rows)
+        if self.live is not None:
+            for t in ticks_rec:
+                self.live.record(t)  # every tick, whatever the sampling mode
+        METRICS.observe("tracker.total", time.perf_counter() - t0)
+        return idle
+
+    def _write(self, records: list) -> None:
+        for r in records:
+            if self.writer is not None:
+                self.writer.submit(r)
+            else:
+                insert_log(self.db_path, r)
+
+    def input_records(self, ts: datetime) -> list:
+        """Once per minute, an ``input_activity`` row with the input counts since the previous one."""
+        minute = int(ts.timestamp()) // 60
+        if minute == self._input_minute:
+            return []
+        self._input_minute = minute
+        counts = self._idle.counters.drain()
+        now = time.monotonic()
+        seconds, self._input_since = round(now - self._input_since), now
+        if not any(counts.values()):
+            return []
+        meta = json.dumps({**counts, "seconds": seconds}, ensure_ascii=False)
+        return [LogRecord(ts, None, "[]", 0, None, "input_activity", meta)]
+
+    def process_records(self, ts: datetime) -> list:
+        """A ``proc_keyframe`` on schedule, else a ``proc_delta`` when the process set changed."""
+        spawned, exited = self._procs.poll()
+        now = time.monotonic()
+        if now >= self._next_keyframe:
+            self._next_keyframe = now + self.cfg.process_keyframe_minutes * 60
+            names = json.dumps(self._procs.names(), ensure_ascii=False)
+            return [LogRecord(ts, None, names, 0, None, "proc_keyframe", None)]
+        if not spawned and not exited:
+            return []
+        delta = json.dumps({"spawned": spawned, "exited": exited}, ensure_ascii=False)
+        return [LogRecord(ts, None, "[]", 0, None, "proc_delta", delta)]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from .database import Interner, LogRecord, db_session, fetch_logs_between, filter_archived_duplicates, insert_logs
+from .sessions import iter_sessions, session_payload
+
+LOGGER = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ("timestamp", "active_app", "running_apps", "idle_seconds", "project_path", "event_type", "meta", "samples")
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds > 0 else 0.0
+
+
+def iter_jsonl(path: Path, stats: Optional[ImportStats] = None) -> Iterator[Dict[str, Any]]:
+    """Parsed objects from a JSONL file; malformed lines are skipped and counted as read and invalid."""
+    with path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                if stats is not None:
+                    stats.read += 1
+                    stats.invalid += 1
+                LOGGER.warning("Skipping malformed line %s in %s: %s", lineno, path, e)
+
+
+def record_from_obj(obj: Dict[str, Any]) -> LogRecord:
+    ts = datetime.fromisoformat(obj["timestamp"])
+    # normalise mixed offsets so stored timestamps compare correctly
+    ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+    running = obj.get("running_apps") or []
+    meta = obj.get("meta")
+    return LogRecord(
+        timestamp=ts,
+        active_app=obj.get("active_app"),
+        running_apps=running if isinstance(running, str) else json.dumps(running, ensure_ascii=False),
+        idle_seconds=int(obj.get("idle_seconds") or 0),
+        project_path=obj.get("project_path"),
+        event_type=obj["event_type"],
+        meta=(meta if isinstance(meta, str) else json.dumps(meta, ensure_ascii=False)) if meta is not None else None,
+        samples=int(obj.get("samples") or 1),
+    )
+
+
+def _batches(objs: Iterable[Dict[str, Any]], size: int, stats: ImportStats) -> Iterator[List[LogRecord]]:
+    batch: List[LogRecord] = []
+    for obj in objs:
+        stats.read += 1
+        try:
+            batch.append(record_from_obj(obj))
+        except (KeyError, TypeError, ValueError) as e:
+            stats.invalid += 1
+            LOGGER.warning("Skipping invalid record %s: %s", stats.read, e)
+            continue
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_jsonl(
+    db_path: Path,
+    src: Path,
+    batch_size: int = 5000,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """Stream a JSONL file into ``logs`` in chunked transactions, skipping rows already present."""
+    stats = ImportStats()
+    interner = Interner()
+    t0 = time.perf_counter()
+    with db_session(db_path) as conn:
+        for batch in _batches(iter_jsonl(src, stats), batch_size, stats):
+            fresh = filter_archived_duplicates(conn, db_path, batch)
+            n = insert_logs(conn, fresh, skip_duplicates=True, interner=interner)
+            stats.inserted += n
+            stats.skipped += len(batch) - n
+            stats.seconds = time.perf_counter() - t0
+            if progress:
+                progress(stats)
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def export_logs(db_path: Path, out: IO[str], start: datetime, end: datetime, fmt: str = "jsonl") -> int:
+    """Stream logs in ``[start, end]`` to ``out`` as JSONL or CSV; returns rows written."""
+    rows = fetch_logs_between(db_path, start, end)
+    n = 0
+    if fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps({k: row[k] for k in EXPORT_COLUMNS}, ensure_ascii=False) + "\n")
+            n += 1
+    elif fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            row["running_apps"] = json.dumps(row["running_apps"], ensure_ascii=False)
+            row["meta"] = json.dumps(row["meta"], ensure_ascii=False) if row["meta"] is not None else ""
+            writer.writerow(row)
+            n += 1
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return n
+
+
+def export_sessions(
+    db_path: Path,
+    out: IO[str],
+    start: datetime,
+    end: datetime,
+    idle_threshold: int,
+    session_gap_seconds: int,
+) -> int:
+    """Stream sessions in ``[start, end]`` to ``out`` as JSONL; returns sessions written."""
+    n = 0
+    for s in iter_sessions(db_path, start, end, idle_threshold, session_gap_seconds):
+        out.write(json.dumps(session_payload(s), ensure_ascii=False) + "\n")
+        n += 1
+    return n
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
 import platform
 import subprocess
-from typing import Dict, List, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:
     import pygetwindow as gw  # type: ignore
@@ -19,46 +24,265 @@ except Exception:
     win32process = None  # type: ignore
     import psutil  # type: ignore
 
+try:
+    from Xlib import X  # type: ignore
+    from Xlib import display as xdisplay  # type: ignore
+    from Xlib import error as xerror  # type: ignore
+except Exception:
+    X = None  # type: ignore
+    xdisplay = None  # type: ignore
+    xerror = None  # type: ignore
 
-def get_active_window_title() -> Optional[str]:
-    system = platform.system()
-    if system == "Windows":
+# the X connection is gone (logout, X server restart); python-xlib re-raises it on every call
+_X_CONNECTION_LOST: Tuple[type, ...] = (OSError,) + ((xerror.ConnectionClosedError,) if xerror is not None else ())
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class BackendStats:
+    """Latency counters for one window backend (seconds are wall-clock per query)."""
+
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_seconds / self.calls * 1e6 if self.calls else 0.0
+
+
+class WindowBackend:
+    """Source of the focused window title; subclasses implement ``_query``."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.stats = BackendStats()
+
+    def _query(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def usable(self) -> bool:
+        """False once the backend can no longer answer (``get_backend`` then re-detects)."""
+        return True
+
+    def active_window_title(self) -> Optional[str]:
+        t0 = time.perf_counter()
+        try:
+            return self._query()
+        except Exception as e:
+            self.stats.errors += 1
+            LOGGER.debug("%s window query failed: %s", self.name, e)
+            return None
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.stats.calls += 1
+            self.stats.total_seconds += elapsed
+            self.stats.max_seconds = max(self.stats.max_seconds, elapsed)
+
+    def close(self) -> None:
+        pass
+
+
+class FakeWindowBackend(WindowBackend):
+    """Returns whatever ``title`` is set to; for headless tests."""
+
+    name = "fake"
+
+    def __init__(self, title: Optional[str] = None) -> None:
+        super().__init__()
+        self.title = title
+
+    def _query(self) -> Optional[str]:
+        return self.title
+
+
+class Win32Backend(WindowBackend):
+    name = "win32"
+
+    def _query(self) -> Optional[str]:
         # Prefer pywin32 for accuracy; fallback to pygetwindow
         if win32gui:
-            try:
-                hwnd = win32gui.GetForegroundWindow()
-                title = win32gui.GetWindowText(hwnd)
-                return title or None
-            except Exception:
-                pass
+            return win32gui.GetWindowText(win32gui.GetForegroundWindow()) or None
         if gw:
+            w = gw.getActiveWindow()
+            return (w.title or None) if w else None
+        return None
+
+
+class XlibBackend(WindowBackend):
+    """Keeps one X11 connection open and tracks the focused window from PropertyNotify events.
+
+    A daemon thread owns the connection and updates a cached title whenever
+    ``_NET_ACTIVE_WINDOW`` or the focused window's name changes, so a query is
+    an attribute read. If the X connection is lost the thread exits, queries
+    raise instead of returning the stale title, and ``get_backend`` replaces it.
+    """
+
+    name = "xlib"
+
+    def __init__(self) -> None:
+        if xdisplay is None:
+            raise RuntimeError("python-xlib is not installed")
+        super().__init__()
+        self._display = xdisplay.Display()
+        self._root = self._display.screen().root
+        self._net_active = self._display.intern_atom("_NET_ACTIVE_WINDOW")
+        self._net_name = self._display.intern_atom("_NET_WM_NAME")
+        self._wm_name = self._display.intern_atom("WM_NAME")
+        self._utf8 = self._display.intern_atom("UTF8_STRING")
+        self._active = None
+        self._title: Optional[str] = None
+        self._closed = False
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._refresh()
+        self._thread = threading.Thread(target=self._run, name="xlib-window", daemon=True)
+        self._thread.start()
+
+    def _refresh(self) -> None:
+        prop = self._root.get_full_property(self._net_active, X.AnyPropertyType)
+        wid = prop.value[0] if prop is not None and len(prop.value) else 0
+        if not wid:
+            self._active, self._title = None, None
+            return
+        if self._active is None or self._active.id != wid:
+            self._active = self._display.create_resource_object("window", wid)
             try:
-                w = gw.getActiveWindow()
-                if w:
-                    return w.title or None
+                self._active.change_attributes(event_mask=X.PropertyChangeMask)
             except Exception:
-                pass
+                pass  # window vanished between the event and now
+        self._title = self._read_name(self._active)
+
+    def _read_name(self, win) -> Optional[str]:
+        for atom, kind in ((self._net_name, self._utf8), (self._wm_name, X.AnyPropertyType)):
+            prop = win.get_full_property(atom, kind)
+            if prop is not None and prop.value:
+                value = prop.value
+                return (value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)) or None
         return None
-    else:
-        # Linux: try wmctrl, xprop (X11) best-effort; Wayland often restricted
-        for cmd in (["wmctrl", "-lx"], ["xprop", "-root", "_NET_ACTIVE_WINDOW"],):
+
+    def _run(self) -> None:
+        while not self._closed:
             try:
-                out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, text=True, timeout=1.5)
-                if "wmctrl" in cmd[0]:
-                    # crude parse last active entry
-                    line = out.strip().splitlines()[-1:]
-                    if line:
-                        parts = line[0].split(None, 4)
-                        if len(parts) >= 5:
-                            return parts[4]
-                else:
-                    # xprop flow requires follow-up; skip for simplicity
-                    continue
-            except Exception:
-                continue
+                ev = self._display.next_event()
+                if ev.type == X.PropertyNotify and ev.atom in (self._net_active, self._net_name, self._wm_name):
+                    self._refresh()
+            except _X_CONNECTION_LOST as e:
+                if not self._closed:
+                    LOGGER.warning("X11 connection lost: %s", e)
+                    self.stats.errors += 1
+                return
+            except Exception as e:
+                if self._closed:
+                    return
+                # keep the cached title; the next event retries
+                LOGGER.debug("X11 event handling failed: %s", e)
+                self.stats.errors += 1
+
+    def _query(self) -> Optional[str]:
+        if not self.usable():
+            raise RuntimeError("X11 event thread is not running")
+        return self._title
+
+    def usable(self) -> bool:
+        return not self._closed and self._thread.is_alive()
+
+    def close(self) -> None:
+        self._closed = True
+        try:
+            self._display.close()
+        except Exception:
+            pass
+
+
+class XpropBackend(WindowBackend):
+    """Fallback that forks ``xprop`` twice per query (no python-xlib available)."""
+
+    name = "xprop"
+
+    def _query(self) -> Optional[str]:
+        out = subprocess.check_output(["xprop", "-root", "_NET_ACTIVE_WINDOW"], stderr=subprocess.DEVNULL, text=True, timeout=1.5)
+        wid = out.strip().rsplit(None, 1)[-1]
+        if not wid.startswith("0x") or int(wid, 16) == 0:
+            return None
+        out = subprocess.check_output(["xprop", "-id", wid, "_NET_WM_NAME", "WM_NAME"], stderr=subprocess.DEVNULL, text=True, timeout=1.5)
+        for line in out.splitlines():
+            _, sep, value = line.partition(" = ")
+            if sep and value.startswith('"'):
+                return value.strip().strip('"') or None
         return None
 
 
+BACKENDS: Dict[str, Callable[[], WindowBackend]] = {
+    "fake": FakeWindowBackend,
+    "win32": Win32Backend,
+    "xlib": XlibBackend,
+    "xprop": XpropBackend,
+}
+
+_backend: Optional[WindowBackend] = None
+_backend_lock = threading.Lock()
+_retired: List[WindowBackend] = []  # kept for their stats after a switch
+
+
+def _default_backends() -> List[str]:
+    forced = os.environ.get("WORKPROOF_WINDOW_BACKEND")
+    if forced:
+        return [forced]
+    if platform.system() == "Windows":
+        return ["win32"]
+    # Wayland often restricts both; they return None there
+    return ["xlib", "xprop"]
+
+
+def get_backend() -> WindowBackend:
+    """The process-wide window backend, created on first use and re-detected once it stops being usable."""
+    global _backend
+    backend = _backend
+    if backend is not None and backend.usable():
+        return backend
+    with _backend_lock:
+        if _backend is not None and not _backend.usable():
+            LOGGER.warning("Window backend %s stopped working; re-detecting", _backend.name)
+            _backend.close()
+            _retired.append(_backend)
+            _backend = None
+        if _backend is None:
+            for name in _default_backends():
+                try:
+                    _backend = BACKENDS[name]()
+                    break
+                except Exception as e:
+                    LOGGER.info("Window backend %s unavailable: %s", name, e)
+            else:
+                _backend = FakeWindowBackend()
+            LOGGER.info("Using window backend %s", _backend.name)
+    return _backend
+
+
+def set_backend(backend: Optional[WindowBackend]) -> None:
+    """Replace the process-wide backend (``None`` re-detects on next use)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+            _retired.append(_backend)
+        _backend = backend
+
+
+def backend_stats() -> Dict[str, BackendStats]:
+    """Latency counters of every backend used in this process, by name."""
+    with _backend_lock:
+        backends = _retired + ([_backend] if _backend is not None else [])
+    return {b.name: b.stats for b in backends}
+
+
+def get_active_window_title() -> Optional[str]:
+    return get_backend().active_window_title()
+
+
 def list_running_processes(limit: int = 40) -> List[str]:
     names: List[str] = []
     try:
@@ -77,4 +301,32 @@ def processes_json(limit: int = 40) -> str:
     return json.dumps(list_running_processes(limit=limit), ensure_ascii=False)
 
 
+class ProcessSnapshotter:
+    """Tracks the running process-name set between polls.
+
+    Only PIDs that appeared since the previous poll are resolved to names, so a
+    steady-state poll is one ``psutil.pids()`` call.
+    """
+
+    def __init__(self) -> None:
+        self._names: Dict[int, str] = {}
 
+    def names(self) -> List[str]:
+        return sorted(set(self._names.values()))
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Refresh the snapshot; returns the ``(spawned, exited)`` process names."""
+        before = set(self._names.values())
+        pids = set(psutil.pids())
+        for pid in list(self._names):
+            if pid not in pids:
+                del self._names[pid]
+        for pid in pids - self._names.keys():
+            try:
+                name = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            if name:
+                self._names[pid] = name
+        after = set(self._names.values())
+        return sorted(after - before), sorted(before - after)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .database import Interner, LogRecord, db_session, insert_logs
+from .metrics import METRICS
+
+LOGGER = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LogWriter(threading.Thread):
+    """Single owner of the write connection.
+
+    Producers (tracker, file watcher, proof capture) call ``submit`` which only
+    enqueues; this thread groups records into ``executemany`` transactions and
+    flushes when ``batch_size`` records are pending or ``flush_interval_seconds``
+    have elapsed since the first pending record. ``after_flush`` runs on the
+    write connection after every successful batch (e.g. the sessionizer).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval_seconds: float = 30,
+        batch_size: int = 500,
+        max_queue: int = 10000,
+        after_flush: Optional[Callable[[sqlite3.Connection], object]] = None,
+        retry_backoff_seconds: float = 0.25,
+    ) -> None:
+        super().__init__(daemon=True, name="workproof-log-writer")
+        self.db_path = db_path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.after_flush = after_flush
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._interner = Interner()
+        self.written = 0
+        self.dropped = 0
+        METRICS.gauge("writer.queue_depth", self.pending)
+
+    def submit(self, record: LogRecord, timeout: float = 1.0) -> bool:
+        if self._stop_event.is_set():
+            LOGGER.warning("Log writer stopped; dropping %s record", record.event_type)
+            self.dropped += 1
+            METRICS.incr("writer.dropped")
+            return False
+        try:
+            self._queue.put(record, timeout=timeout)
+            return True
+        except queue.Full:
+            LOGGER.warning("Log writer queue full; dropping %s record", record.event_type)
+            self.dropped += 1
+            METRICS.incr("writer.dropped")
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: Optional[float] = 5) -> None:
+        """Stop accepting records, drain the queue and wait for the final flush."""
+        self._stop_event.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass  # the loop also checks the stop event
+        if self.is_alive():
+            self.join(timeout=timeout)
+
+    def run(self) -> None:
+        LOGGER.info("Log writer started (flush every %ss or %s records)", self.flush_interval_seconds, self.batch_size)
+        with db_session(self.db_path) as conn:
+            batch: List[LogRecord] = []
+            deadline: Optional[float] = None
+            while True:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if self._stop_event.is_set():
+                    wait = 0.0
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None
+                if isinstance(item, LogRecord):
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval_seconds
+                    batch.append(item)
+                    if len(batch) < self.batch_size:
+                        continue
+                elif item is None and self._stop_event.is_set():
+                    # queue drained after stop
+                    self._flush(conn, batch)
+                    break
+                elif item is _STOP:
+                    continue  # keep draining whatever is still queued
+                self._flush(conn, batch)
+                batch = []
+                deadline = None
+        LOGGER.info("Log writer stopped (%s written, %s dropped)", self.written, self.dropped)
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[LogRecord]) -> None:
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        for attempt in range(3):
+            try:
+                self.written += insert_logs(conn, batch, interner=self._interner)
+                break
+            except sqlite3.OperationalError as e:
+                LOGGER.warning("DB batch insert retry %s due to %s", attempt + 1, e)
+                METRICS.incr("writer.retries")
+                time.sleep(self.retry_backoff_seconds * 2**attempt)
+            except Exception:
+                # not transient (a malformed record, a constraint): a retry would fail the same way,
+                # and an exception escaping here would kill the only writer
+                LOGGER.exception("Dropping %s log records after a write failure", len(batch))
+                self.dropped += len(batch)
+                METRICS.incr("writer.dropped", len(batch))
+                return
+        else:
+            LOGGER.error("Dropping %s log records after repeated write failures", len(batch))
+            self.dropped += len(batch)
+            METRICS.incr("writer.dropped", len(batch))
+            return
+        METRICS.observe("writer.flush", time.perf_counter() - t0)
+        if self.after_flush is not None:
+            try:
+                self.after_flush(conn)
+            except Exception as e:
+                # the rows are safe; the hook catches up on the next flush
+                LOGGER.warning("Post-flush hook failed: %s", e)
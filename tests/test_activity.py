@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+import time
+
+from src.workproof.activity import MOVE_THROTTLE_SECONDS, InputCounters
+from src.workproof.aggregator import iter_day_metrics
+from src.workproof.database import POOL, db_session, initialize, insert_logs, LogRecord
+
+
+def test_input_counters_coalesce_moves_and_drain():
+    c = InputCounters()
+    for _ in range(3):
+        c.on_press("a")
+        c.on_release("a")
+    c.on_click(0, 0, None, True)
+    c.on_click(0, 0, None, False)
+    c.on_scroll(0, 0, 0, -1)
+    c.on_move(0, 0)
+    c.wake.clear()
+    c.last_input = 0.0
+    for i in range(1000):  # a burst inside the throttle window is not measured
+        c.on_move(i, i)
+    assert c.wake.is_set() and c.last_input > 0  # but still counts as input
+    time.sleep(MOVE_THROTTLE_SECONDS * 1.5)
+    c.on_move(30, 40)
+    assert c.wake.is_set()
+    assert c.drain() == {"keys": 3, "clicks": 1, "scrolls": 1, "moves": 2, "distance_px": 50}
+    assert not any(c.drain().values())
+
+
+def test_day_metrics_include_input_activity():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime(2024, 4, 2, 10, 0, tzinfo=timezone.utc)
+        rows = [
+            LogRecord(base + timedelta(minutes=i), None, "[]", 0, None, "input_activity",
+                      json.dumps({"keys": 10, "clicks": 1, "scrolls": 0, "moves": 5, "distance_px": 300, "seconds": 60}))
+            for i in range(3)
+        ]
+        rows.append(LogRecord(base, "Editor", "[]", 1, None, "sample", None))
+        with db_session(db) as conn:
+            insert_logs(conn, rows)
+        first, second = iter_day_metrics(db, date(2024, 4, 2), date(2024, 4, 3), 10, 60, 300)
+        assert first.to_payload()["input_activity"] == {
+            "keys": 30, "clicks": 3, "scrolls": 0, "moves": 15, "distance_px": 900, "minutes": 3,
+        }
+        assert first.active_seconds == 10
+        assert second.input_activity == {}
+        POOL.close_all()
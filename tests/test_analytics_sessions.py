@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd  # type: ignore
+import tempfile
+
+from src.workproof.analytics import load_events_df, sessionize_df
+from src.workproof.database import POOL, db_session, from_epoch_ms, initialize, insert_logs, LogRecord, to_epoch_ms
+from src.workproof.sessions import Sessionizer, iter_sessions
+
+EVENT_TYPES = ["sample"] * 8 + ["file_modified", "file_created", "proof_capture"]
+
+
+def _random_events(seed: int, n: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    t = to_epoch_ms(datetime(2026, 3, 1, tzinfo=timezone.utc))
+    rows = []
+    for _ in range(n):
+        # mostly regular sampling with occasional long breaks
+        t += rng.choice([10_000] * 20 + [400_000, 2_000_000])
+        et = rng.choice(EVENT_TYPES)
+        idle = rng.choice([0, 0, 0, 5, 120, 900]) if et == "sample" else 0
+        app = rng.choice(["Editor", "Browser", "Terminal", None, ""])
+        rows.append((t, app, idle, et))
+    df = pd.DataFrame(rows, columns=["ts_ms", "active_app", "idle_seconds", "event_type"])
+    return df.astype({"active_app": object}).where(df.notna(), None)
+
+
+def _scalar(df: pd.DataFrame, idle_threshold: int, gap: int):
+    sessionizer = Sessionizer(idle_threshold, gap)
+    for ts_ms, app, idle, et in df.itertuples(index=False):
+        sessionizer.feed(from_epoch_ms(int(ts_ms)), app, idle, et)
+    return sessionizer.finish()
+
+
+def test_vectorized_sessionization_matches_scalar():
+    for seed in range(20):
+        df = _random_events(seed, 3000)
+        for idle_threshold, gap in ((60, 300), (10, 30), (600, 3600)):
+            assert sessionize_df(df, idle_threshold, gap) == _scalar(df, idle_threshold, gap), (seed, idle_threshold, gap)
+    assert sessionize_df(_random_events(0, 0), 60, 300) == []
+
+
+def test_vectorized_sessions_from_db_match_streaming_sessions():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        df = _random_events(7, 2000)
+        with db_session(db) as conn:
+            insert_logs(conn, [
+                LogRecord(from_epoch_ms(int(r.ts_ms)), r.active_app, "[]", int(r.idle_seconds), None, r.event_type, None)
+                for r in df.itertuples(index=False)
+            ])
+        start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        end = start + timedelta(days=60)
+        vectorized = sessionize_df(load_events_df(db, start, end), 60, 300)
+        assert vectorized == list(iter_sessions(db, start, end, 60, 300))
+        assert len(vectorized) > 10
+        POOL.close_all()
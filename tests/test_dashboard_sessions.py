@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+import sqlite3
 import tempfile
+import threading
 
-from src.workproof.database import initialize, insert_log, LogRecord
-from src.workproof.sessions import build_sessions_for_day
-from src.workproof.dashboard import q_active_seconds, q_top_apps, day_bounds_utc
+from src.workproof.database import POOL, db_session, initialize, insert_log, insert_logs, LogRecord, pool_stats, read_session
+from src.workproof.sessions import build_sessions_for_day, focus_at, focus_overlapping, iter_sessions, refresh_sessions, session_at, sessions_overlapping
+from src.workproof.aggregator import iter_day_metrics
+from src.workproof.dashboard import q_active_seconds, q_idle_sum, q_proofs_count, q_top_apps, q_top_projects, day_bounds_utc
 
 
 def test_sessions_and_active_seconds_basic():
@@ -24,9 +28,189 @@ def test_sessions_and_active_seconds_basic():
         insert_log(db, LogRecord(start + timedelta(seconds=35), "VSCode", "[]", 0, None, "proof_capture", None))
         day = start.date()
         s, e = day_bounds_utc(day)
-        sessions = build_sessions_for_day(db, s, e, 10, 60, 300)
+        sessions = build_sessions_for_day(db, s, e, 60, 300)
         assert len(sessions) >= 1
         act = q_active_seconds(db, s, e, 10, 60)
         assert act >= 60
 
 
+def test_report_queries_reuse_pooled_connection():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        insert_log(db, LogRecord(start, "VSCode", "[]", 0, None, "sample", None))
+        s, e = day_bounds_utc(start.date())
+        before = pool_stats()
+        q_active_seconds(db, s, e, 10, 60)
+        q_top_apps(db, s, e, 10)
+        build_sessions_for_day(db, s, e, 60, 300)
+        after = pool_stats()
+        assert after["opened"] - before["opened"] == 1
+        assert after["reused"] - before["reused"] == 2
+        # pooled readers are read-only
+        with read_session(db) as conn:
+            try:
+                conn.execute("DELETE FROM logs")
+                assert False, "reader connection accepted a write"
+            except sqlite3.OperationalError:
+                pass
+        POOL.close_all()
+
+
+def test_pool_closes_connections_of_exited_threads():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        POOL.close_all()
+        workers = [threading.Thread(target=lambda: q_proofs_count(db, *day_bounds_utc(date.today()))) for _ in range(3)]
+        for t in workers:
+            t.start()
+            t.join()
+        assert pool_stats()["open"] == 0  # each worker's connection went with it
+        q_proofs_count(db, *day_bounds_utc(date.today()))
+        assert pool_stats()["open"] == 1
+        POOL.close_all()
+
+
+def test_day_aggregator_matches_per_metric_queries():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        day0 = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=3)
+        for offset in (0, 2):  # day0 + 1 has no rows
+            base = day0 + timedelta(days=offset)
+            for i in range(12):
+                insert_log(db, LogRecord(base + timedelta(seconds=i * 10), "VSCode" if i % 4 else "Chrome", "[]", 600 if i == 6 else 0, None, "sample", None))
+            insert_log(db, LogRecord(base + timedelta(hours=2), "VSCode", "[]", 0, None, "sample", None))
+            # an idle sample past the gap closes the day's last session
+            insert_log(db, LogRecord(base + timedelta(hours=3), "VSCode", "[]", 600, None, "sample", None))
+            insert_log(db, LogRecord(base + timedelta(seconds=15), None, "[]", 0, "ProjA", "file_modified", None))
+            insert_log(db, LogRecord(base + timedelta(seconds=25), "VSCode", "[]", 0, None, "proof_capture", None))
+        days = list(iter_day_metrics(db, day0.date(), (day0 + timedelta(days=2)).date(), 10, 60, 300))
+        assert [m.date for m in days] == [(day0 + timedelta(days=k)).date() for k in range(3)]
+        assert days[1].active_seconds == 0 and days[1].sessions == []
+        for m in days:
+            s, e = day_bounds_utc(m.date)
+            assert m.active_seconds == q_active_seconds(db, s, e, 10, 60)
+            assert m.idle_seconds == q_idle_sum(db, s, e)
+            assert m.top_apps == q_top_apps(db, s, e, 10)
+            assert m.top_projects == q_top_projects(db, s, e)
+            assert m.proofs_count == q_proofs_count(db, s, e)
+            assert m.sessions == build_sessions_for_day(db, s, e, 60, 300)
+        POOL.close_all()
+
+
+def test_day_aggregator_keeps_session_across_midnight_whole():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=2)
+        for i in range(-6, 6):  # 23:59:00 .. 00:00:50 active
+            insert_log(db, LogRecord(midnight + timedelta(seconds=i * 10), "VSCode", "[]", 0, None, "sample", None))
+        insert_log(db, LogRecord(midnight + timedelta(minutes=30), "VSCode", "[]", 600, None, "sample", None))
+        before, after = (midnight - timedelta(days=1)).date(), midnight.date()
+        days = list(iter_day_metrics(db, before, after, 10, 60, 300))
+        assert [len(m.sessions) for m in days] == [1, 1]
+        assert days[0].sessions[0].start_time == midnight - timedelta(seconds=60)
+        assert days[0].sessions[0].end_time == midnight + timedelta(seconds=50)
+        assert days[0].sessions == days[1].sessions
+        assert days[0].sessions == list(iter_sessions(db, midnight - timedelta(days=1), midnight + timedelta(days=1), 60, 300))
+        with db_session(db) as conn:
+            refresh_sessions(conn, 60, 300)
+        for m in days:
+            s, e = day_bounds_utc(m.date)
+            assert m.sessions == [replace(x, id=None) for x in build_sessions_for_day(db, s, e, 60, 300)]
+        assert [m.active_seconds for m in days] == [60, 60]
+        POOL.close_all()
+
+
+def test_incremental_sessionizer_persists_and_extends_open_session():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        s, e = day_bounds_utc(base.date())
+        for i in range(5):
+            insert_log(db, LogRecord(base + timedelta(seconds=i * 10), "VSCode", "[]", 0, None, "sample", None))
+        insert_log(db, LogRecord(base + timedelta(seconds=12), None, "[]", 0, "ProjA", "file_modified", None))
+        with db_session(db) as conn:
+            assert refresh_sessions(conn, 60, 300) == 6
+            assert refresh_sessions(conn, 60, 300) == 0  # nothing new past the watermark
+        first = build_sessions_for_day(db, s, e, 60, 300)
+        assert len(first) == 1 and first[0].id is not None and first[0].samples == 5
+
+        # later rows extend the open session, then an idle sample past the gap closes it
+        for i in range(5, 8):
+            insert_log(db, LogRecord(base + timedelta(seconds=i * 10), "VSCode", "[]", 0, None, "sample", None))
+        insert_log(db, LogRecord(base + timedelta(seconds=75), "VSCode", "[]", 0, None, "proof_capture", None))
+        insert_log(db, LogRecord(base + timedelta(minutes=20), "VSCode", "[]", 900, None, "sample", None))
+        unsessionized = build_sessions_for_day(db, s, e, 60, 300)
+        with db_session(db) as conn:
+            assert refresh_sessions(conn, 60, 300, chunk_rows=2) == 5
+            rows = conn.execute("SELECT id, samples, files_edited, proofs_count, end_time FROM sessions").fetchall()
+            links = conn.execute("SELECT session_id, event_type FROM session_events ORDER BY id").fetchall()
+            open_id = conn.execute("SELECT value FROM meta WHERE key='sessions_open_id'").fetchone()[0]
+        assert rows == [(first[0].id, 8, 1, 1, (base + timedelta(seconds=70)).isoformat())]
+        assert links == [(first[0].id, "file_modified"), (first[0].id, "proof_capture")]
+        assert open_id == ""
+        assert build_sessions_for_day(db, s, e, 60, 300) == unsessionized
+        POOL.close_all()
+
+
+def test_interval_lookups_for_sessions_and_focus_spans():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime(2026, 9, 3, 14, 0, tzinfo=timezone.utc)
+        records = []
+        for k in range(3):  # three sessions, an hour apart
+            t0 = base + timedelta(hours=k)
+            records += [LogRecord(t0 + timedelta(seconds=i * 10), "Editor", "[]", 0, None, "sample", None) for i in range(30)]
+            records += [LogRecord(t0 + timedelta(seconds=300 + i * 10), "Browser", "[]", 0, None, "sample", None) for i in range(30)]
+            records.append(LogRecord(t0 + timedelta(minutes=30), "Browser", "[]", 900, None, "sample", None))
+        with db_session(db) as conn:
+            insert_logs(conn, records)
+            refresh_sessions(conn, 60, 300)
+
+        t = datetime(2026, 9, 3, 15, 2, 30, tzinfo=timezone.utc)
+        hit = session_at(db, t)
+        assert hit is not None and hit.start_time == base + timedelta(hours=1)
+        assert session_at(db, base + timedelta(minutes=45)) is None
+        assert focus_at(db, t).app == "Editor"
+        assert focus_at(db, t + timedelta(minutes=5)).app == "Browser"
+        window = sessions_overlapping(db, base + timedelta(minutes=5), base + timedelta(hours=1, minutes=1))
+        assert [s.start_time for s in window] == [base, base + timedelta(hours=1)]
+        assert [f.app for f in focus_overlapping(db, base, base + timedelta(minutes=20))] == ["Editor", "Browser"]
+        POOL.close_all()
+
+
+def test_late_rows_rebuild_sessions_from_raw_logs():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime(2026, 9, 3, 14, 0, tzinfo=timezone.utc)
+        with db_session(db) as conn:
+            insert_logs(conn, [LogRecord(base + timedelta(seconds=i * 10), "Editor", "[]", 0, None, "sample", None) for i in range(60)])
+            refresh_sessions(conn, 60, 300)
+            # wall clock stepped back an hour (or older history imported)
+            earlier = base - timedelta(hours=1)
+            late = [LogRecord(earlier + timedelta(seconds=i * 10), "Shell", "[]", 0, None, "sample", None) for i in range(3)]
+            late.append(LogRecord(earlier + timedelta(minutes=20), "Shell", "[]", 900, None, "sample", None))
+            insert_logs(conn, late)
+            assert refresh_sessions(conn, 60, 300) == 4
+            insert_logs(conn, [LogRecord(base + timedelta(seconds=600), "Editor", "[]", 0, None, "sample", None)])
+            assert refresh_sessions(conn, 60, 300) == 1  # not stuck
+        found = sessions_overlapping(db, base - timedelta(hours=2), base + timedelta(hours=1))
+        assert [(x.start_time, x.end_time, x.samples) for x in found] == [
+            (earlier, earlier + timedelta(seconds=20), 3),
+            (base, base + timedelta(seconds=600), 61),
+        ]
+        assert [(x.start_time, x.samples) for x in found] == [
+            (x.start_time, x.samples) for x in iter_sessions(db, earlier, base + timedelta(hours=1), 60, 300)
+        ]
+        assert [(f.start_ms, f.samples) for f in focus_overlapping(db, earlier, base + timedelta(hours=1))] == [
+            (int(earlier.timestamp() * 1000), 3),
+            (int(base.timestamp() * 1000), 61),
+        ]
+        POOL.close_all()
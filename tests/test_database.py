@@ -3,9 +3,10 @@ from __future__ import annotations
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+import sqlite3
 import tempfile
 
-from src.workproof.database import initialize, insert_log, LogRecord, fetch_logs_between, purge_older_than
+from src.workproof.database import CURRENT_SCHEMA_VERSION, db_session, initialize, insert_log, insert_logs, Interner, LogRecord, fetch_logs_between, purge_older_than, to_epoch_ms
 
 
 def test_insert_and_fetch():
@@ -20,6 +21,18 @@ def test_insert_and_fetch():
         assert rows[0]["active_app"] == "App"
 
 
+def test_insert_converts_offset_timestamps_to_utc():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        local = datetime(2025, 6, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+        insert_log(db, LogRecord(local, "App", "[]", 0, None, "sample", None))
+        rows = list(fetch_logs_between(db, local - timedelta(seconds=1), local + timedelta(seconds=1)))
+        assert len(rows) == 1
+        assert rows[0]["ts_ms"] == to_epoch_ms(datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc))
+        assert rows[0]["timestamp"] == "2025-06-01T12:00:00+00:00"
+
+
 def test_purge():
     with tempfile.TemporaryDirectory() as d:
         db = Path(d) / "test.db"
@@ -31,4 +44,99 @@ def test_purge():
         assert purged >= 1
 
 
+def test_v3_migration_backfills_epoch_ms():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        # a v2 database: TEXT timestamps only, mixed offsets
+        conn = sqlite3.connect(str(db))
+        conn.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            INSERT INTO meta VALUES('schema_version', '2');
+            CREATE TABLE logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, active_app TEXT,
+                running_apps TEXT NOT NULL, idle_seconds INTEGER NOT NULL, project_path TEXT,
+                event_type TEXT NOT NULL, meta TEXT
+            );
+            INSERT INTO logs(timestamp, active_app, running_apps, idle_seconds, event_type)
+            VALUES ('2025-01-01T10:00:00+00:00', 'A', '[]', 0, 'sample'),
+                   ('2025-01-01T11:30:00+02:00', 'B', '[]', 0, 'sample');
+            """
+        )
+        conn.close()
+        initialize(db)
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("SELECT value FROM meta WHERE key='schema_version'").fetchone()[0] == str(CURRENT_SCHEMA_VERSION)
+        conn.close()
+        start = datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc)
+        rows = list(fetch_logs_between(db, start, start + timedelta(hours=2)))
+        # 11:30+02:00 is 09:30 UTC and must sort before 10:00 UTC
+        assert [r["active_app"] for r in rows] == ["B", "A"]
+        assert rows[0]["ts_ms"] == to_epoch_ms(datetime(2025, 1, 1, 9, 30, tzinfo=timezone.utc))
+
 
+def test_apps_and_process_sets_are_interned():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        ts = datetime.now(timezone.utc)
+        for i in range(3):
+            insert_log(db, LogRecord(ts + timedelta(milliseconds=i), "Editor", '["b", "a"]', 0, None, "sample", None))
+        insert_log(db, LogRecord(ts + timedelta(milliseconds=5), "Browser", '["a", "b"]', 0, None, "sample", None))
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("SELECT COUNT(*) FROM apps").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM process_sets").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM logs WHERE active_app IS NOT NULL OR running_apps != ''").fetchone()[0] == 0
+        conn.close()
+        rows = list(fetch_logs_between(db, ts - timedelta(seconds=1), ts + timedelta(seconds=1)))
+        assert [r["active_app"] for r in rows] == ["Editor"] * 3 + ["Browser"]
+        assert rows[-1]["running_apps"] == ["a", "b"]
+
+
+def test_insert_batch_holds_write_lock_across_interning():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        other_committed = []
+
+        class RacingInterner(Interner):
+            # another writer (retention, an import) tries to commit between the lookups and the insert
+            def app_id(self, conn, title):
+                app_id = super().app_id(conn, title)
+                other = sqlite3.connect(str(db), timeout=0.05, isolation_level=None)
+                try:
+                    other.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('racer', '1')")
+                    other_committed.append(True)
+                except sqlite3.OperationalError:
+                    pass  # locked out until the batch commits
+                finally:
+                    other.close()
+                return app_id
+
+        ts = datetime.now(timezone.utc)
+        rec = LogRecord(ts, "App", "[]", 0, None, "sample", None)
+        with db_session(db) as conn:
+            insert_logs(conn, [rec])  # the app is known, so the next batch only reads before inserting
+            assert insert_logs(conn, [rec], interner=RacingInterner()) == 1
+        assert not other_committed
+
+
+def test_purge_is_chunked_and_cleans_sessions():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        now = datetime.now(timezone.utc)
+        old = now - timedelta(days=90)
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # incremental
+        conn.close()
+        with db_session(db) as conn:
+            insert_logs(conn, [LogRecord(old + timedelta(seconds=i), "Old", "[]", 0, None, "sample", None) for i in range(3000)])
+            insert_logs(conn, [LogRecord(now, "New", "[]", 0, None, "sample", None)])
+            conn.execute("INSERT INTO sessions(start_time, end_time) VALUES(?, ?)", (old.isoformat(), old.isoformat()))
+            conn.execute("INSERT INTO session_events(session_id, timestamp, event_type) VALUES(1, ?, 'sample')", (old.isoformat(),))
+        assert purge_older_than(db, 60, chunk_rows=250) == 3000
+        with db_session(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 1
+            assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM session_events").fetchone()[0] == 0
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.workproof.file_events import FileEventCoalescer
+
+
+def test_editor_save_burst_becomes_one_row():
+    c = FileEventCoalescer(debounce_seconds=2.0, bulk_threshold=10)
+    base = datetime(2024, 3, 1, 9, 0, tzinfo=timezone.utc)
+    for i, kind in enumerate(["created", "modified", "modified", "modified"]):
+        c.push("ProjA", "ProjA/a.py", kind, base + timedelta(seconds=i * 0.1), mono=i * 0.1)
+    c.push("ProjA", "ProjA/b.py", "modified", base, mono=0.0)
+    c.push("ProjA", "ProjA/.a.py.swp", "created", base, mono=0.0)
+    c.push("ProjA", "ProjA/.a.py.swp", "deleted", base, mono=0.2)
+    assert c.flush(now=1.0) == []  # still inside the debounce window
+    rows = c.flush(now=2.5)
+    assert [(r.event_type, json.loads(r.meta)["src_path"]) for r in rows] == [
+        ("file_modified", "ProjA/b.py"),
+        ("file_created", "ProjA/a.py"),
+    ]
+    assert json.loads(rows[1].meta)["events"] == 4
+    assert rows[1].timestamp == base + timedelta(seconds=0.3)
+    assert c.pending() == 0
+
+
+def test_bulk_operation_is_one_summary_row():
+    c = FileEventCoalescer(debounce_seconds=2.0, bulk_threshold=10)
+    base = datetime(2024, 3, 1, 9, 0, tzinfo=timezone.utc)
+    for i in range(500):
+        c.push("ProjB", f"ProjB/node_modules/p{i}/index.js", "created", base, mono=i * 0.01)
+        c.push("ProjB", f"ProjB/node_modules/p{i}/index.js", "modified", base, mono=i * 0.01)
+    c.push("ProjA", "ProjA/a.py", "modified", base, mono=4.0)
+    assert c.flush(now=5.5) == []  # the bulk burst is still being written to
+    rows = c.flush(now=7.0)
+    assert [r.event_type for r in rows] == ["file_bulk", "file_modified"]
+    meta = json.loads(rows[0].meta)
+    assert meta["files"] == 500 and meta["events"] == 1000 and meta["created"] == 500
+    # a burst that never settles is still written after max_hold_seconds
+    c.push("ProjA", "ProjA/log.txt", "modified", base, mono=10.0)
+    for t in range(11, 80):
+        c.push("ProjA", "ProjA/log.txt", "modified", base, mono=float(t))
+        if t == 70:
+            assert len(c.flush(now=float(t))) == 1
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import tempfile
+
+from src.workproof.file_watcher import plan_watches
+from src.workproof.ignore import IgnoreMatcher
+
+
+def test_gitignore_style_patterns():
+    root = Path("/projects")
+    m = IgnoreMatcher(root, ["node_modules", "*.pyc", "/ProjA/out/", "**/target/**", "!keep.pyc"])
+    ignored = lambda rel, is_dir=False: m.is_ignored(str(root / rel), is_dir=is_dir)
+    assert ignored("ProjA/node_modules/x/index.js")
+    assert ignored("ProjA/node_modules", is_dir=True)
+    assert ignored("ProjA/pkg/__init__.pyc")
+    assert not ignored("ProjA/pkg/keep.pyc")  # later negation wins
+    assert ignored("ProjA/out/bundle.js")
+    assert not ignored("ProjB/out/bundle.js")  # anchored to the root
+    assert ignored("ProjC/crates/a/target/debug/a")
+    assert not ignored("ProjA/src/main.py")
+    assert not ignored("/elsewhere/node_modules/x")
+
+
+def test_plan_prunes_ignored_subtrees_and_honors_gitignore():
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        for rel in ["ProjA/src/pkg", "ProjA/node_modules/lib", "ProjA/dist", "ProjB/src", "ProjB/logs"]:
+            (root / rel).mkdir(parents=True)
+        (root / "ProjA" / ".gitignore").write_text("# build output\ndist/\n", encoding="utf-8")
+        m = IgnoreMatcher(root, ["node_modules"], honor_gitignore=True)
+        plan = {os.path.relpath(p, d): rec for p, rec in plan_watches(str(root), m)}
+        assert plan == {".": False, "ProjA": False, "ProjA/src": True, "ProjB": True}
+        assert m.is_ignored(str(root / "ProjA" / "dist" / "app.js"))
+        assert not m.is_ignored(str(root / "ProjB" / "dist" / "app.js"))
+        # editing the .gitignore takes effect on reload
+        (root / "ProjA" / ".gitignore").unlink()
+        m.load_gitignore(str(root / "ProjA"))
+        assert not m.is_ignored(str(root / "ProjA" / "dist" / "app.js"))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from src.workproof.config import Config
+from src.workproof.database import POOL, db_session, initialize, insert_logs, LogRecord
+from src.workproof.live import LiveStats
+from src.workproof.report_generator import format_live_status
+
+
+def _cfg(d: Path) -> Config:
+    return Config(db_path=d / "test.db", projects_dir=d, logs_dir=d, reports_dir=d)
+
+
+def test_live_counters_and_day_rollover():
+    with tempfile.TemporaryDirectory() as d:
+        live = LiveStats(_cfg(Path(d)))
+        base = datetime(2024, 3, 1, 23, 50, tzinfo=timezone.utc)
+        for i in range(6):
+            live.record(LogRecord(base + timedelta(seconds=10 * i), "Editor", "[]", 120 if i == 2 else 1, None, "sample", None))
+        live.record(LogRecord(base + timedelta(seconds=15), None, "[]", 0, "ProjA", "file_modified", None))
+        live.record(LogRecord(base + timedelta(seconds=16), "Editor", "[]", 0, None, "proof_capture", None))
+        snap = live.snapshot()
+        assert snap.samples == 6
+        assert snap.active_seconds == 50
+        assert snap.idle_seconds == 125
+        assert dict(snap.app_seconds) == {"Editor": 60}
+        assert dict(snap.project_events) == {"ProjA": 1}
+        assert snap.proofs_count == 1
+        assert snap.current_session is not None and snap.current_session.files_edited == 1
+        # past midnight the counters restart but the open session carries over
+        live.record(LogRecord(base + timedelta(minutes=11), "Browser", "[]", 0, None, "sample", None))
+        after = live.snapshot()
+        assert after.day == base.date() + timedelta(days=1)
+        assert after.samples == 1 and dict(after.app_seconds) == {"Browser": 10}
+        assert after.current_session.start_time == base
+        assert snap.samples == 6  # earlier snapshots are immutable
+        # an idle sample past the gap closes the session
+        live.record(LogRecord(base + timedelta(minutes=30), "Browser", "[]", 900, None, "sample", None))
+        assert live.snapshot().current_session is None
+        assert live.snapshot().sessions_closed == 1
+
+
+def test_live_seed_matches_database():
+    with tempfile.TemporaryDirectory() as d:
+        cfg = _cfg(Path(d))
+        initialize(cfg.db_path)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        base = now - timedelta(minutes=5)
+        if base.date() != now.date():
+            base = now.replace(hour=0, minute=0, second=0)
+        rows = [LogRecord(base + timedelta(seconds=10 * i), "Editor", "[]", 1, None, "sample", None) for i in range(5)]
+        rows.append(LogRecord(base + timedelta(seconds=12), None, "[]", 0, "ProjA", "file_created", None))
+        with db_session(cfg.db_path) as conn:
+            insert_logs(conn, rows)
+        live = LiveStats(cfg)
+        live.seed(cfg.db_path, now=now)
+        snap = live.snapshot()
+        assert snap.samples == 5 and snap.active_seconds == 50 and snap.idle_seconds == 5
+        assert dict(snap.project_events) == {"ProjA": 1}
+        assert snap.current_session is not None and snap.current_session.start_time == base
+        live.record(LogRecord(now, "Editor", "[]", 0, None, "sample", None))
+        assert live.snapshot().current_session.samples == 6
+        POOL.close_all()
+
+
+def test_live_seed_from_raw_rows_when_threshold_changed():
+    with tempfile.TemporaryDirectory() as d:
+        cfg = _cfg(Path(d))
+        initialize(cfg.db_path, idle_threshold=30)  # rollups split at 30s, config now says 60s
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        base = now - timedelta(minutes=5)
+        if base.date() != now.date():
+            base = now.replace(hour=0, minute=0, second=0)
+        rows = [LogRecord(base + timedelta(seconds=10 * i), "Editor", "[]", 45 if i == 2 else 1, None, "sample", None) for i in range(5)]
+        rows.append(LogRecord(base + timedelta(seconds=12), "Editor", "[]", 0, None, "proof_capture", None))
+        with db_session(cfg.db_path) as conn:
+            insert_logs(conn, rows)
+        live = LiveStats(cfg)
+        live.seed(cfg.db_path, now=now)
+        snap = live.snapshot()
+        assert snap.samples == 5 and snap.active_seconds == 50 and snap.idle_seconds == 49
+        assert snap.proofs_count == 1 and dict(snap.app_seconds) == {"Editor": 50}
+        assert snap.current_session is not None
+        assert format_live_status(snap).startswith("Active today: 50s · session 40s")
+        POOL.close_all()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from click.testing import CliRunner
+
+from src.workproof.cli import cli
+from src.workproof.database import POOL, initialize
+from src.workproof.metrics import METRICS, Histogram, load_stats, persist_metrics
+
+
+def test_histogram_percentiles_and_merge():
+    h = Histogram()
+    for _ in range(90):
+        h.observe(0.0008)  # <= 1ms bucket
+    for _ in range(10):
+        h.observe(0.2)  # <= 250ms bucket
+    assert h.percentile(0.5) == 0.001
+    assert h.percentile(0.95) == 0.2  # capped at the observed max
+    other = Histogram()
+    other.observe(30.0)  # overflow bucket
+    h.merge(other)
+    assert h.count == 101 and h.percentile(1.0) == 30.0
+
+
+def test_persist_and_stats_command():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        METRICS.drain()
+        now = datetime.now(timezone.utc)
+        for i in range(2):
+            with METRICS.timer("tracker.total"):
+                pass
+            METRICS.incr("writer.retries", 2)
+            METRICS.gauge("writer.queue_depth", lambda i=i: 5 * (i + 1))
+            assert persist_metrics(db, now=now - timedelta(minutes=i)) == 3
+        assert persist_metrics(db) == 1  # only the gauge when nothing else happened
+        stats = load_stats(db, now - timedelta(minutes=10))
+        assert stats["tracker.total"]["count"] == 2
+        assert stats["writer.retries"]["total"] == 4
+        assert stats["writer.queue_depth"]["max"] == 10
+        result = CliRunner().invoke(cli, ["stats", "--db", str(db), "--json"])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["writer.retries"]["total"] == 4
+        METRICS.gauge("writer.queue_depth", lambda: 0)
+        POOL.close_all()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import stat
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import tempfile
+
+from src.workproof import database
+from src.workproof.dashboard import q_active_seconds, q_top_apps
+from src.workproof.sessions import iter_sessions
+from src.workproof.transfer import import_jsonl
+from src.workproof.database import (
+    archive_closed_months,
+    db_session,
+    drop_partitions_older_than,
+    fetch_logs_between,
+    initialize,
+    insert_logs,
+    list_partitions,
+    LogRecord,
+    partition_path,
+    routed_ranges,
+)
+
+
+def _sample(ts: datetime, app: str) -> LogRecord:
+    return LogRecord(ts, app, "[]", 0, None, "sample", None)
+
+
+def test_archive_route_and_drop_monthly_partitions():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "workproof.db"
+        initialize(db)
+        now = datetime(2026, 10, 15, 12, 0, tzinfo=timezone.utc)
+        aug = datetime(2026, 8, 31, 23, 59, 50, tzinfo=timezone.utc)
+        sep = datetime(2026, 9, 1, 0, 0, 10, tzinfo=timezone.utc)
+        with db_session(db) as conn:
+            insert_logs(conn, [_sample(aug, "Night"), _sample(sep, "Night"), _sample(now, "Day")])
+
+        archived = archive_closed_months(db, now=now)
+        assert archived == [partition_path(db, 2026, 8), partition_path(db, 2026, 9)]
+        assert set(list_partitions(db)) == {(2026, 8), (2026, 9)}
+        assert not os.stat(archived[0]).st_mode & stat.S_IWUSR  # closed months are read-only
+        with db_session(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 1
+
+        # queries spanning partitions and the main DB see every row, in order
+        rows = list(fetch_logs_between(db, aug - timedelta(days=1), now))
+        assert [r["active_app"] for r in rows] == ["Night", "Night", "Day"]
+        assert q_active_seconds(db, aug - timedelta(hours=1), sep + timedelta(hours=1), 10, 60) == 20
+        assert q_top_apps(db, aug - timedelta(days=1), now, 10)[0] == {"app": "Night", "seconds": 20}
+
+        # retention of a closed month is a file unlink
+        cutoff_days = (datetime.now(timezone.utc) - datetime(2026, 9, 1, tzinfo=timezone.utc)).days
+        assert drop_partitions_older_than(db, cutoff_days) == 1
+        assert set(list_partitions(db)) == {(2026, 9)}
+
+
+def test_long_ranges_split_under_attach_limit():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "workproof.db"
+        for m in range(1, 13):
+            sqlite3.connect(str(partition_path(db, 2025, m))).close()
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        end = datetime(2025, 12, 31, tzinfo=timezone.utc)
+        ranges = routed_ranges(db, start, end)
+        assert len(ranges) == 2
+        assert ranges[0][0] == start and ranges[-1][1] == end
+        assert ranges[1][0] == datetime(2025, 1 + database.MAX_ATTACHED_PARTITIONS, 1, tzinfo=timezone.utc)
+
+
+def test_iter_sessions_keeps_night_shift_whole_across_partitions():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "workproof.db"
+        initialize(db)
+        night = datetime(2026, 9, 30, 23, 50, tzinfo=timezone.utc)
+        records = [_sample(night + timedelta(minutes=i), "Night") for i in range(20)]  # runs past midnight
+        records.append(LogRecord(night + timedelta(hours=2), "Night", "[]", 900, None, "sample", None))
+        records.append(_sample(night + timedelta(hours=10), "Day"))
+        with db_session(db) as conn:
+            insert_logs(conn, records)
+        archive_closed_months(db, now=datetime(2026, 11, 2, tzinfo=timezone.utc))
+        assert set(list_partitions(db)) == {(2026, 9), (2026, 10)}
+
+        sessions = list(iter_sessions(db, night - timedelta(days=1), night + timedelta(days=1), 60, 300, chunk_size=3))
+        assert [(s.main_app, s.samples) for s in sessions] == [("Night", 20), ("Day", 1)]
+        assert sessions[0].start_time == night
+        assert sessions[0].end_time == night + timedelta(minutes=19)
+
+
+def test_reimport_after_archive_skips_archived_rows():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "workproof.db"
+        initialize(db)
+        day = datetime(2026, 8, 12, 9, 0, tzinfo=timezone.utc)
+        src = Path(d) / "aug.jsonl"
+        src.write_text(
+            "\n".join(
+                json.dumps({"timestamp": (day + timedelta(seconds=10 * i)).isoformat(), "active_app": "Editor",
+                            "running_apps": [], "idle_seconds": 0, "project_path": None, "event_type": "sample"})
+                for i in range(6)
+            ),
+            encoding="utf-8",
+        )
+        assert import_jsonl(db, src).inserted == 6
+        archive_closed_months(db, now=datetime(2026, 10, 15, tzinfo=timezone.utc))
+        stats = import_jsonl(db, src)
+        assert (stats.inserted, stats.skipped) == (0, 6)
+        assert q_active_seconds(db, day - timedelta(hours=1), day + timedelta(hours=1), 10, 60) == 60
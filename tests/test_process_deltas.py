@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from src.workproof.database import POOL, db_session, initialize, insert_logs, process_set_at, LogRecord
+from src.workproof.utils.platform_adapters import ProcessSnapshotter
+
+
+def _delta(ts: datetime, spawned=(), exited=()) -> LogRecord:
+    meta = json.dumps({"spawned": list(spawned), "exited": list(exited)})
+    return LogRecord(ts, None, "[]", 0, None, "proc_delta", meta)
+
+
+def test_process_set_rebuilt_from_keyframe_and_deltas():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        with db_session(db) as conn:
+            insert_logs(conn, [
+                LogRecord(base - timedelta(hours=3), None, '["bash", "code"]', 0, None, "sample", None),
+                LogRecord(base, None, '["bash", "code", "firefox"]', 0, None, "proc_keyframe", None),
+                LogRecord(base, "code", "[]", 0, None, "sample", None),
+                _delta(base + timedelta(seconds=10), spawned=["python"]),
+                _delta(base + timedelta(seconds=20), exited=["firefox"]),
+                _delta(base + timedelta(seconds=30), spawned=["firefox"], exited=["python"]),
+            ])
+        assert process_set_at(db, base + timedelta(seconds=5)) == ["bash", "code", "firefox"]
+        assert process_set_at(db, base + timedelta(seconds=20)) == ["bash", "code", "python"]
+        assert process_set_at(db, base + timedelta(seconds=45)) == ["bash", "code", "firefox"]
+        # before the first keyframe, legacy samples carry the full list
+        assert process_set_at(db, base - timedelta(hours=1)) == ["bash", "code"]
+        assert process_set_at(db, base - timedelta(days=2)) is None
+        POOL.close_all()
+
+
+def test_snapshotter_reports_only_changes():
+    snap = ProcessSnapshotter()
+    spawned, exited = snap.poll()
+    assert spawned == snap.names() and exited == []
+    assert spawned  # at least this interpreter
+    spawned, exited = snap.poll()
+    assert set(spawned).isdisjoint(exited)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import tempfile
+
+from src.workproof.database import POOL, db_session, initialize, insert_logs, LogRecord
+from src.workproof.projects import ProjectResolver
+
+
+def test_marker_detection_cache_and_invalidation():
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        for rel in ["mono/packages/api/src", "mono/docs", "loose/notes"]:
+            (root / rel).mkdir(parents=True)
+        (root / "mono" / ".git").mkdir()
+        (root / "mono" / "packages" / "api" / "package.json").write_text("{}", encoding="utf-8")
+        r = ProjectResolver(root)
+        api = str(root / "mono" / "packages" / "api")
+        assert r.project_for(str(root / "mono/packages/api/src/index.js")) == api
+        assert r.project_for(str(root / "mono/docs/readme.md")) == str(root / "mono")
+        assert r.project_for(str(root / "loose/notes/todo.txt")) == str(root / "loose")  # no marker: top-level dir
+        assert r.project_for(str(root / "top.txt")) == str(root)
+        # a new nested checkout is picked up once its marker invalidates the cache
+        (root / "mono" / "docs" / "pyproject.toml").write_text("", encoding="utf-8")
+        assert r.project_for(str(root / "mono/docs/conf.py")) == str(root / "mono")
+        r.invalidate(str(root / "mono" / "docs"))
+        assert r.project_for(str(root / "mono/docs/conf.py")) == str(root / "mono" / "docs")
+        assert r.project_for(str(root / "mono/packages/api/src/index.js")) == api
+
+
+def test_project_path_is_interned():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        ts = datetime.now(timezone.utc)
+        rows = [LogRecord(ts, None, "[]", 0, p, "file_modified", None) for p in ("/p/a", "/p/b", "/p/a")]
+        with db_session(db) as conn:
+            insert_logs(conn, rows)
+            ids = [r[0] for r in conn.execute("SELECT project_id FROM logs ORDER BY id")]
+            assert ids[0] == ids[2] != ids[1]
+            assert conn.execute("SELECT path FROM projects WHERE id=?", (ids[1],)).fetchone()[0] == "/p/b"
+        POOL.close_all()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import io
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import tempfile
+
+from src.workproof import dashboard, database
+from src.workproof.aggregator import iter_day_metrics
+from src.workproof.analytics import load_hourly_df, load_samples_df
+from src.workproof.database import (
+    POOL,
+    archive_closed_months,
+    db_session,
+    initialize,
+    insert_log,
+    list_partitions,
+    process_set_at,
+    purge_older_than,
+    routed_session,
+    LogRecord,
+)
+from src.workproof.metrics import METRICS, load_stats, persist_metrics
+from src.workproof.sessions import (
+    build_sessions_for_day,
+    focus_overlapping,
+    iter_sessions,
+    refresh_sessions,
+    sessions_overlapping,
+)
+from src.workproof.summarizer import summarize_day
+from src.workproof.transfer import export_logs, import_jsonl
+
+# the connection ping is "SELECT 1" alone; "SELECT 1 FROM ..." existence checks are real queries
+_SKIP = re.compile(r"^\s*(--|PRAGMA|BEGIN|COMMIT|ROLLBACK|ATTACH|DETACH|CREATE|ALTER|DROP|VACUUM|SELECT 1\s*$)", re.IGNORECASE)
+# archiving copies the whole (small) app / process-set / project dictionaries into each partition
+_WHOLE_TABLE = re.compile(r"^\s*INSERT OR IGNORE INTO arch\.(apps|process_sets|projects) SELECT", re.IGNORECASE)
+
+
+def _capture(fn, *args) -> list[str]:
+    """Run ``fn`` and return every statement it sent, through pooled and unpooled connections alike."""
+    seen: list[str] = []
+    connect = database._connect
+
+    def traced(*a, **kw):
+        conn = connect(*a, **kw)
+        conn.set_trace_callback(seen.append)
+        return conn
+
+    database._connect = traced
+    POOL.set_trace_callback(seen.append)
+    try:
+        result = fn(*args)
+        if hasattr(result, "__next__"):
+            list(result)
+    finally:
+        POOL.set_trace_callback(None)
+        database._connect = connect
+    return [q for q in dict.fromkeys(seen) if not _SKIP.match(q)]
+
+
+def _plan(conn: sqlite3.Connection, sql: str) -> list[str]:
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def _full_scans(conn: sqlite3.Connection, sql: str) -> list[str]:
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    aliases = set(re.findall(r"\b(?:FROM|JOIN)\s+\w+\s+(?:AS\s+)?(\w+)", sql, re.IGNORECASE))
+    plan = _plan(conn, sql)
+    # a view flattened into a co-routine (e.g. routed_session's UNION ALL over partitions)
+    subqueries = {m.group(1) for m in map(re.compile(r"(?:CO-ROUTINE|MATERIALIZE) (\w+)").match, plan) if m}
+    bad = []
+    for detail in plan:
+        m = re.match(r"SCAN (?:\w+\.)?(\w+)", detail)
+        # an R*Tree scan with constraints (e.g. "INDEX 2:B0D1") is an index search
+        if re.search(r"VIRTUAL TABLE INDEX \d+:\S+", detail):
+            continue
+        # scanning a subquery result is fine; scanning a stored table is not
+        if m and m.group(1) not in subqueries and (m.group(1) in tables or m.group(1) in aliases):
+            bad.append(detail)
+    return bad
+
+
+def test_package_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        day_start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        for i in range(20):
+            insert_log(db, LogRecord(day_start + timedelta(seconds=i * 10), "Editor", '["p"]', i, None, "sample", None))
+        insert_log(db, LogRecord(day_start + timedelta(seconds=5), None, "[]", 0, "ProjA", "file_modified", None))
+        insert_log(db, LogRecord(day_start + timedelta(seconds=6), "Editor", "[]", 0, None, "proof_capture", None))
+        s, e = dashboard.day_bounds_utc(day_start.date())
+
+        # per-day dashboard aggregates must be answered from an index alone
+        index_only = {
+            "q_active_seconds": _capture(dashboard.q_active_seconds, db, s, e, 10, 60),
+            "q_idle_sum": _capture(dashboard.q_idle_sum, db, s, e),
+            "q_top_apps": _capture(dashboard.q_top_apps, db, s, e, 10),
+            "q_top_projects": _capture(dashboard.q_top_projects, db, s, e),
+            "q_proofs_count": _capture(dashboard.q_proofs_count, db, s, e),
+            "load_samples_df": _capture(load_samples_df, db, s, e),
+            "load_hourly_df": _capture(load_hourly_df, db, s, e, 60),
+        }
+        others = {
+            "build_sessions_for_day": _capture(build_sessions_for_day, db, s, e, 60, 300),
+            "summarize_day": _capture(summarize_day, db, day_start.date(), 10),
+            "export_logs": _capture(export_logs, db, io.StringIO(), s, e),
+            "process_set_at": _capture(process_set_at, db, e),
+        }
+        POOL.close_all()
+
+        conn = sqlite3.connect(str(db))
+        try:
+            for name, queries in {**index_only, **others}.items():
+                assert queries, f"{name} issued no queries"
+                for q in queries:
+                    assert not _full_scans(conn, q), f"{name} falls back to a full scan:\n{q}\n{_plan(conn, q)}"
+            for name, queries in index_only.items():
+                for q in queries:
+                    if re.search(r"\bFROM meta\b", q):
+                        continue  # rollup threshold lookup
+                    plan = _plan(conn, q)
+                    # rollup tables are WITHOUT ROWID, so their primary key is the covering index
+                    assert any("COVERING INDEX" in p or "USING PRIMARY KEY" in p for p in plan), f"{name} is not index-only: {plan}"
+        finally:
+            conn.close()
+
+
+def test_session_metrics_and_maintenance_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        today = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        last_month = today.replace(day=1) - timedelta(days=3)
+        for base in (last_month, today):
+            for i in range(12):
+                insert_log(db, LogRecord(base + timedelta(seconds=i * 10), "Editor", "[]", 0, None, "sample", None))
+            insert_log(db, LogRecord(base + timedelta(seconds=5), None, "[]", 0, "ProjA", "file_modified", None))
+            insert_log(db, LogRecord(base + timedelta(seconds=6), "Editor", "[]", 0, None, "input_activity", '{"keys": 3}'))
+            insert_log(db, LogRecord(base + timedelta(hours=1), "Editor", "[]", 600, None, "sample", None))
+        with db_session(db) as conn:
+            refresh_sessions(conn, 60, 300)
+        with METRICS.timer("tracker.total"):
+            pass
+        persist_metrics(db)
+        # archiving initializes each new partition; its schema setup and one-off backfills are not range queries
+        schema_setup = set(_capture(initialize, Path(d) / "scratch.db"))
+        archived = [q for q in _capture(archive_closed_months, db) if q not in schema_setup]
+        (partition,) = list_partitions(db).values()
+        # a row stamped before the frontier sends refresh_sessions down the rebuild path
+        inserted = _capture(insert_log, db, LogRecord(today - timedelta(minutes=30), "Editor", "[]", 0, None, "sample", None))
+        s, e = dashboard.day_bounds_utc(today.date())
+        # one archived duplicate, one duplicate in the main DB, one new row
+        src = Path(d) / "import.jsonl"
+        src.write_text(
+            "\n".join(
+                json.dumps({"timestamp": ts.isoformat(), "active_app": "Editor", "idle_seconds": 0, "event_type": "sample"})
+                for ts in (last_month, today, today + timedelta(seconds=5))
+            ),
+            encoding="utf-8",
+        )
+
+        def refresh():
+            with db_session(db) as conn:
+                return refresh_sessions(conn, 60, 300)
+
+        main = {
+            "archive_closed_months": archived,
+            "insert_log (rollup fold)": inserted,
+            "import_jsonl": _capture(import_jsonl, db, src),
+            "refresh_sessions": _capture(refresh),
+            "build_sessions_for_day": _capture(build_sessions_for_day, db, s, e, 60, 300),
+            "sessions_overlapping": _capture(sessions_overlapping, db, s, e),
+            "focus_overlapping": _capture(focus_overlapping, db, s, e),
+            "load_stats": _capture(load_stats, db, s),
+            "purge_older_than": _capture(purge_older_than, db, 2),
+        }
+        # these read through routed_session: an unpooled connection with last month's partition attached
+        lo = last_month.replace(hour=0)
+        routed = {
+            "iter_day_metrics": _capture(iter_day_metrics, db, lo.date(), today.date(), 10, 60, 300),
+            "iter_sessions": _capture(iter_sessions, db, lo, e, 60, 300),
+        }
+        POOL.close_all()
+
+        assert any(re.search(r"\bFROM sessions_rtree\b", q) for q in main["refresh_sessions"]), "no rebuild happened"
+        assert any("rollup_hourly" in q for q in inserted), "no rollup fold"
+        assert any("FROM arch.logs" in q for q in main["import_jsonl"]), "no partition dedup lookup"
+        assert any("WHERE NOT EXISTS" in q for q in main["import_jsonl"]), "no main-DB dedup insert"
+        conn = sqlite3.connect(str(db))
+        try:
+            # statements that ran with a partition attached as "arch" are explained the same way
+            conn.execute("ATTACH DATABASE ? AS arch", (str(partition),))
+            for name, queries in main.items():
+                assert queries, f"{name} issued no queries"
+                for q in queries:
+                    if _WHOLE_TABLE.match(q):
+                        continue
+                    assert not _full_scans(conn, q), f"{name} falls back to a full scan:\n{q}\n{_plan(conn, q)}"
+        finally:
+            conn.close()
+        with routed_session(db, lo, e) as conn:
+            for name, queries in routed.items():
+                for q in queries:
+                    assert not _full_scans(conn, q), f"{name} falls back to a full scan:\n{q}\n{_plan(conn, q)}"
+        POOL.close_all()
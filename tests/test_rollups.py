@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from src.workproof import dashboard
+from src.workproof.database import POOL, db_session, initialize, insert_log, insert_logs, LogRecord
+from src.workproof.summarizer import summarize_day
+
+
+def _seed(db: Path, base: datetime) -> None:
+    # spread over two hours so several rollup rows are touched
+    for i in range(30):
+        app = "Editor" if i % 3 else "Browser"
+        insert_log(db, LogRecord(base + timedelta(minutes=i * 4), app, "[]", 600 if i % 5 == 0 else 2, None, "sample", None))
+    with db_session(db) as conn:
+        insert_logs(conn, [
+            LogRecord(base + timedelta(minutes=7), None, "[]", 0, "ProjA", "file_modified", None),
+            LogRecord(base + timedelta(minutes=70), None, "[]", 0, "ProjB", "file_created", None),
+            LogRecord(base + timedelta(minutes=71), None, "[]", 0, None, "file_deleted", None),
+            LogRecord(base + timedelta(minutes=8), "Editor", "[]", 0, None, "proof_capture", None),
+        ])
+
+
+def _report(db: Path, s: datetime, e: datetime) -> dict:
+    return {
+        "active": dashboard.q_active_seconds(db, s, e, 10, 60),
+        "idle": dashboard.q_idle_sum(db, s, e),
+        "apps": dashboard.q_top_apps(db, s, e, 10),
+        "projects": sorted((p["project"], p["events"]) for p in dashboard.q_top_projects(db, s, e)),
+        "proofs": dashboard.q_proofs_count(db, s, e),
+    }
+
+
+def test_rollups_match_raw_aggregates():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        _seed(db, base)
+        s, e = dashboard.day_bounds_utc(base.date())
+        from_rollups = _report(db, s, e)
+        # one ms off the hour boundary forces the raw query path
+        raw = _report(db, s, e - timedelta(milliseconds=1))
+        assert from_rollups == raw
+        assert from_rollups["proofs"] == 1
+        assert ("Unknown", 1) in from_rollups["projects"]
+        summary = summarize_day(db, base.date(), 10)
+        assert summary.total_samples == 30
+        assert summary.total_idle_seconds == raw["idle"]
+        assert summary.project_events == {"ProjA": 1, "ProjB": 1, "Unknown": 1}
+        with db_session(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM rollup_hourly").fetchone()[0] <= 6
+        POOL.close_all()
+
+
+def test_rollups_backfill_on_upgrade():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        base = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+        _seed(db, base)
+        s, e = dashboard.day_bounds_utc(base.date())
+        expected = _report(db, s, e)
+        POOL.close_all()
+        # pretend the DB predates the rollups
+        with db_session(db) as conn:
+            conn.execute("DROP TABLE rollup_hourly")
+            conn.execute("DROP TABLE rollup_project_hourly")
+            conn.execute("DELETE FROM meta WHERE key LIKE 'rollup_%'")
+            conn.execute("UPDATE meta SET value='6' WHERE key='schema_version'")
+        initialize(db)
+        assert _report(db, s, e) == expected
+        POOL.close_all()
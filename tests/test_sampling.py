@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from src.workproof import dashboard
+from src.workproof.aggregator import iter_day_metrics
+from src.workproof.analytics import sessions_between
+from src.workproof.database import POOL, db_session, initialize, insert_logs, LogRecord
+from src.workproof.sampling import AdaptiveInterval, SampleClock, SampleCoalescer
+from src.workproof.sessions import iter_sessions, refresh_sessions, sessions_overlapping
+
+
+def _ticks(base: datetime) -> list[LogRecord]:
+    # long focused runs with a few switches and an idle break, crossing an hour boundary
+    plan = [("Editor", 1, 200), ("Browser", 1, 15), ("Editor", 1, 120), (None, 900, 80), ("Terminal", 2, 150)]
+    out, t = [], base
+    for app, idle, n in plan:
+        for _ in range(n):
+            out.append(LogRecord(t, app, "[]", idle, None, "sample", '{"idle_threshold": 60}'))
+            t += timedelta(seconds=10)
+    return out
+
+
+def _coalesce(ticks: list[LogRecord]) -> list[LogRecord]:
+    c = SampleCoalescer(idle_threshold=60, heartbeat_seconds=300)
+    rows = [r for tick in ticks for r in c.push(tick)]
+    return rows + c.flush(end_run=True)
+
+
+def _report(db: Path, s: datetime, e: datetime) -> dict:
+    return {
+        "active": dashboard.q_active_seconds(db, s, e, 10, 60),
+        "idle": dashboard.q_idle_sum(db, s, e),
+        "apps": dashboard.q_top_apps(db, s, e, 10),
+    }
+
+
+def test_run_length_rows_match_per_tick_rows():
+    base = datetime(2024, 5, 6, 8, 20, tzinfo=timezone.utc)
+    ticks = _ticks(base)
+    rows = _coalesce(ticks)
+    assert sum(r.samples for r in rows) == len(ticks)
+    assert len(rows) * 10 < len(ticks)
+    extra = [
+        LogRecord(base + timedelta(minutes=5, seconds=3), None, "[]", 0, "ProjA", "file_modified", None),
+        LogRecord(base + timedelta(minutes=40, seconds=3), "Editor", "[]", 0, None, "proof_capture", None),
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as d:
+        for i, stream in enumerate((ticks, rows)):
+            db = Path(d) / f"test{i}.db"
+            initialize(db)
+            with db_session(db) as conn:
+                insert_logs(conn, stream + extra)
+                refresh_sessions(conn, 60, 300)
+            s, e = dashboard.day_bounds_utc(base.date())
+            end = base + timedelta(hours=3)
+            metrics = next(iter_day_metrics(db, base.date(), base.date(), 10, 60, 300))
+            results.append({
+                "rollups": _report(db, s, e),
+                "raw": _report(db, s, e - timedelta(milliseconds=1)),
+                "sessions": [(x.start_time, x.end_time, x.samples, x.files_edited) for x in iter_sessions(db, s, e, 60, 300)],
+                "persisted": [(x.start_time, x.end_time, x.samples) for x in sessions_overlapping(db, s, end)],
+                "vectorized": [(x.start_time, x.end_time, x.samples) for x in sessions_between(db, s, e, 60, 300)],
+                "day": (metrics.active_seconds, metrics.idle_seconds, metrics.top_apps),
+            })
+        POOL.close_all()
+    per_tick, coalesced = results
+    assert per_tick["rollups"] == per_tick["raw"]
+    for key in ("rollups", "raw", "day"):
+        assert coalesced[key] == per_tick[key], key
+    # a held run is stamped with its last tick, so session ends and counts agree
+    for key in ("sessions", "persisted", "vectorized"):
+        assert coalesced[key] == per_tick[key], key
+    assert len(per_tick["sessions"]) == 2
+
+
+def test_adaptive_interval_backs_off_and_weights_rows():
+    cadence = AdaptiveInterval(10, 300)
+    assert [cadence.next(True) for _ in range(6)] == [20, 40, 80, 160, 300, 300]
+    assert cadence.next(False) == 10
+    assert cadence.weight(None) == 1 and cadence.weight(10.4) == 1
+    assert cadence.weight(160.2) == 16
+    assert cadence.weight(7200) == 30  # never more than one back-off step
+
+    base = datetime(2024, 5, 6, 23, 0, tzinfo=timezone.utc)
+    idle = [LogRecord(base + timedelta(seconds=s), "Editor", "[]", 900, None, "sample", None, samples=n)
+            for s, n in ((0, 1), (20, 2), (60, 4), (140, 8))]
+    rows = _coalesce(idle)
+    assert [r.samples for r in rows] == [1, 14]
+    assert rows[-1].idle_seconds == 900
+
+
+def test_sample_clock_keeps_a_fixed_grid_and_detects_suspend():
+    now = {"mono": 100.0, "wall": 1_000.0}
+
+    def advance(mono: float, wall: float | None = None) -> None:
+        now["mono"] += mono
+        now["wall"] += mono if wall is None else wall
+
+    clock = SampleClock(max_elapsed=600, monotonic=lambda: now["mono"], wall=lambda: now["wall"])
+    assert clock.tick().elapsed is None
+    advance(1.5)  # a slow sample does not delay the next deadline
+    assert clock.delay(10) == 8.5
+    advance(8.5)
+    assert clock.tick().elapsed == 10
+    advance(13)  # an overrun skips the missed deadline
+    assert clock.delay(10) == 7
+    advance(7)
+    assert clock.tick().elapsed == 20
+    advance(3)
+    clock.delay(10)
+    advance(7, wall=3600)  # suspended for an hour: wall clock ran ahead
+    tick = clock.tick()
+    assert tick.gap and tick.elapsed is None
+    advance(10)
+    assert clock.tick().elapsed == 10
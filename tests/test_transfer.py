@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import io
+import json
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import tempfile
+
+from src.workproof.database import initialize
+from src.workproof.transfer import export_logs, import_jsonl
+
+
+def test_import_skips_duplicates_and_normalises_offsets():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        src = Path(d) / "in.jsonl"
+        initialize(db)
+        lines = [
+            {"timestamp": "2025-01-01T10:00:00+00:00", "active_app": "VSCode", "running_apps": ["VSCode"], "idle_seconds": 0, "project_path": None, "event_type": "sample", "meta": None},
+            # same instant expressed with a different offset
+            {"timestamp": "2025-01-01T12:00:00+02:00", "active_app": "VSCode", "running_apps": ["VSCode"], "idle_seconds": 0, "project_path": None, "event_type": "sample", "meta": None},
+            {"timestamp": "2025-01-01T10:00:10+00:00", "active_app": "Chrome", "running_apps": [], "idle_seconds": 3, "project_path": None, "event_type": "sample", "meta": {"k": 1}},
+        ]
+        src.write_text("\n".join(json.dumps(o) for o in lines) + "\nnot json\n", encoding="utf-8")
+        stats = import_jsonl(db, src, batch_size=2)
+        assert (stats.read, stats.inserted, stats.skipped, stats.invalid) == (4, 2, 1, 1)
+        # re-import is a no-op
+        assert import_jsonl(db, src).inserted == 0
+
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        out = io.StringIO()
+        assert export_logs(db, out, start, start + timedelta(days=1), fmt="jsonl") == 2
+        rows = [json.loads(l) for l in out.getvalue().splitlines()]
+        assert [r["active_app"] for r in rows] == ["VSCode", "Chrome"]
+        assert rows[1]["meta"] == {"k": 1}
+
+        out = io.StringIO()
+        assert export_logs(db, out, start, start + timedelta(days=1), fmt="csv") == 2
+        assert out.getvalue().splitlines()[0].startswith("timestamp,active_app")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from src.workproof.utils import platform_adapters as pa
+
+
+def test_fake_backend_and_latency_counters():
+    fake = pa.FakeWindowBackend("Editor — main.py")
+    pa.set_backend(fake)
+    try:
+        assert pa.get_active_window_title() == "Editor — main.py"
+        fake.title = None
+        assert pa.get_active_window_title() is None
+        st = pa.backend_stats()["fake"]
+        assert st.calls == 2 and st.errors == 0
+        assert 0 < st.max_seconds < 0.01
+    finally:
+        pa.set_backend(None)
+
+
+def test_backend_errors_are_counted_not_raised():
+    class Broken(pa.WindowBackend):
+        name = "broken"
+
+        def _query(self):
+            raise OSError("display gone")
+
+    b = Broken()
+    assert b.active_window_title() is None
+    assert b.stats.calls == 1 and b.stats.errors == 1
+
+
+def test_lost_x_connection_stops_thread_and_backend_is_replaced(monkeypatch):
+    class ClosedDisplay:
+        calls = 0
+
+        def next_event(self):
+            ClosedDisplay.calls += 1
+            raise OSError("Display connection closed by server")
+
+        def close(self):
+            pass
+
+    # the event loop alone, without a real X server
+    xb = pa.XlibBackend.__new__(pa.XlibBackend)
+    pa.WindowBackend.__init__(xb)
+    xb._display, xb._closed, xb._title = ClosedDisplay(), False, "stale title"
+    xb._thread = pa.threading.Thread(target=xb._run, daemon=True)
+    xb._thread.start()
+    xb._thread.join(timeout=1)
+    assert not xb._thread.is_alive() and ClosedDisplay.calls == 1
+    assert xb.active_window_title() is None and not xb.usable()
+
+    monkeypatch.setenv("WORKPROOF_WINDOW_BACKEND", "fake")
+    pa.set_backend(xb)
+    try:
+        assert pa.get_backend().name == "fake"
+        assert "xlib" in pa.backend_stats()
+    finally:
+        pa.set_backend(None)
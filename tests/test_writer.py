@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import tempfile
+
+from src.workproof.database import initialize, LogRecord, fetch_logs_between
+from src.workproof.writer import LogWriter
+
+
+def test_writer_batches_and_drains_on_stop():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        writer = LogWriter(db, flush_interval_seconds=60, batch_size=50)
+        writer.start()
+        ts = datetime.now(timezone.utc)
+        for i in range(120):
+            assert writer.submit(LogRecord(ts + timedelta(milliseconds=i), "App", "[]", 0, None, "sample", None))
+        writer.stop()
+        assert not writer.is_alive()
+        assert writer.written == 120
+        rows = list(fetch_logs_between(db, ts - timedelta(seconds=1), ts + timedelta(seconds=1)))
+        assert len(rows) == 120
+        # no longer accepting records once stopped
+        assert not writer.submit(LogRecord(ts, "App", "[]", 0, None, "sample", None))
+
+
+def test_writer_survives_a_failing_batch():
+    with tempfile.TemporaryDirectory() as d:
+        db = Path(d) / "test.db"
+        initialize(db)
+        writer = LogWriter(db, flush_interval_seconds=60, batch_size=1)
+        writer.start()
+        ts = datetime.now(timezone.utc)
+        assert writer.submit(LogRecord("not a datetime", "App", "[]", 0, None, "sample", None))
+        assert writer.submit(LogRecord(ts, "App", "[]", 0, None, "sample", None))
+        writer.stop()
+        assert writer.dropped == 1 and writer.written == 1
+        assert len(list(fetch_logs_between(db, ts - timedelta(seconds=1), ts + timedelta(seconds=1)))) == 1